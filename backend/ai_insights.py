@@ -1,4 +1,5 @@
-from emotion_tracker import journals_collection, app
+from emotion_tracker import app
+from database import journals_collection
 
 @app.get("/ai_insights")
 def get_ai_insights(user_id: str):
@@ -0,0 +1,108 @@
+import os
+
+# Per-analyzer frame-rate scheduling for the webcam analysis stage. Each analyzer
+# (face detection, mesh, pose, hands, emotion) runs every N frames at its own input
+# scale and the last result is reused in between. In adaptive mode, the cadence of
+# the slow-changing analyzers is stretched while frame time is over budget and
+# restored once it is back under.
+
+# name:every:scale, comma separated
+DEFAULT_SCHEDULE = "face_detection:1:0.5,face_mesh:1:0.75,pose:3:0.5,hands:2:0.5,emotion:3:1.0"
+
+# Target analysis time per frame in ms; 0 disables adaptive cadence
+FRAME_BUDGET_MS = float(os.getenv("WEBCAM_FRAME_BUDGET_MS", "0"))
+
+# Analyzers the adaptive mode may slow down, first to be slowed first
+ADAPTIVE_ORDER = ["hands", "pose", "face_mesh"]
+MAX_CADENCE_FACTOR = 4
+
+# Smoothing for the measured frame time, and how often (in frames) cadence is adjusted
+EMA_ALPHA = 0.2
+ADAPT_EVERY = 15
+
+
+def parse_schedule(spec):
+    schedule = {}
+    for item in spec.split(","):
+        name, every, scale = item.strip().split(":")
+        schedule[name] = AnalyzerSchedule(name, int(every), float(scale))
+    return schedule
+
+
+class AnalyzerSchedule:
+    def __init__(self, name, every=1, scale=1.0):
+        self.name = name
+        self.every = max(1, every)
+        self.scale = scale
+        # Cadence currently in effect (adaptive mode may raise it above every)
+        self.current_every = self.every
+        self.runs = 0
+        self.skips = 0
+
+
+class AnalysisScheduler:
+    def __init__(self, schedule=None, frame_budget_ms=FRAME_BUDGET_MS):
+        self.schedule = schedule or parse_schedule(os.getenv("WEBCAM_SCHEDULE", DEFAULT_SCHEDULE))
+        self.frame_budget = frame_budget_ms / 1000.0
+        self.frame_index = 0
+        self.frame_time = None
+        self._results = {}
+        self._views = None
+
+    def begin_frame(self, views):
+        # views: FrameViews for the current frame (see frame_ring.py)
+        self.frame_index += 1
+        self._views = views
+
+    def due(self, name):
+        entry = self.schedule.get(name)
+        if entry is None:
+            return True
+        return name not in self._results or self.frame_index % entry.current_every == 0
+
+    def input_for(self, name):
+        # Downscaled RGB input for the analyzer, shared by analyzers with the same scale
+        scale = self.schedule[name].scale if name in self.schedule else 1.0
+        return self._views.rgb(scale)
+
+    def run(self, name, analyzer, needs_input=True):
+        # analyzer(input_frame) -> result; reuses the last result when the analyzer isn't due.
+        # With needs_input=False the analyzer gets None and no RGB view is built for it.
+        entry = self.schedule.get(name)
+        if self.due(name):
+            self._results[name] = analyzer(self.input_for(name) if needs_input else None)
+            if entry is not None:
+                entry.runs += 1
+        elif entry is not None:
+            entry.skips += 1
+        return self._results.get(name)
+
+    def end_frame(self, elapsed):
+        self.frame_time = elapsed if self.frame_time is None else EMA_ALPHA * elapsed + (1 - EMA_ALPHA) * self.frame_time
+        if self.frame_budget > 0 and self.frame_index % ADAPT_EVERY == 0:
+            self._adapt()
+
+    def _adapt(self):
+        adaptive = [self.schedule[name] for name in ADAPTIVE_ORDER if name in self.schedule]
+        if self.frame_time > self.frame_budget:
+            # Over budget: slow down the first analyzer that can still be slowed
+            for entry in adaptive:
+                if entry.current_every < entry.every * MAX_CADENCE_FACTOR:
+                    entry.current_every += 1
+                    return
+        elif self.frame_time < 0.7 * self.frame_budget:
+            # Comfortably under budget: restore in reverse order
+            for entry in reversed(adaptive):
+                if entry.current_every > entry.every:
+                    entry.current_every -= 1
+                    return
+
+    def snapshot(self):
+        return {
+            "frame_time_ms": round(self.frame_time * 1000, 2) if self.frame_time is not None else None,
+            "frame_budget_ms": self.frame_budget * 1000,
+            "analyzers": {
+                name: {"every": entry.current_every, "scale": entry.scale, "runs": entry.runs, "skips": entry.skips}
+                for name, entry in self.schedule.items()
+            },
+        }
@@ -76,4 +76,11 @@ class AppointmentResponse(BaseModel):
     date: str
     time: str
     status: str
-    created_at: datetime
\ No newline at end of file
+    created_at: datetime
+
+class XPEvent(BaseModel):
+    user_id: str
+    action: str
+
+class XPEventBatch(BaseModel):
+    events: List[XPEvent]
@@ -1,5 +1,8 @@
 from fastapi import APIRouter, HTTPException
-from database import appointment_collection, users_collection
+from database import async_appointment_collection as appointment_collection
+from database import async_users_collection as users_collection
+from user_cache import aget_user
+from badge_engine import arecord_event
 from datetime import datetime
 from apimodels import AppointmentRequest
 from bson import ObjectId
@@ -10,17 +13,12 @@ router = APIRouter()
 async def create_appointment(appointment: AppointmentRequest):
     try:
         # Check if therapist exists
-        therapist = users_collection.find_one({
-            "_id": ObjectId(appointment.therapist_id),
-            "role": "therapist"
-        })
-        if not therapist:
+        therapist = await aget_user(appointment.therapist_id, "POST /appointments", users_collection)
+        if not therapist or therapist.get("role") != "therapist":
             raise HTTPException(status_code=404, detail="Therapist not found")
 
         # Check if patient exists
-        patient = users_collection.find_one({
-            "_id": ObjectId(appointment.patient_id)
-        })
+        patient = await aget_user(appointment.patient_id, "POST /appointments", users_collection)
         if not patient:
             raise HTTPException(status_code=404, detail="Patient not found")
 
@@ -34,7 +32,7 @@ async def create_appointment(appointment: AppointmentRequest):
             "created_at": datetime.utcnow()
         }
         
-        result = appointment_collection.insert_one(appointment_data)
+        result = await appointment_collection.insert_one(appointment_data)
         appointment_data["_id"] = str(result.inserted_id)
         
         return appointment_data
@@ -44,7 +42,7 @@ async def create_appointment(appointment: AppointmentRequest):
 @router.get("/appointments/therapist/{therapist_id}")
 async def get_therapist_appointments(therapist_id: str):
     try:
-        appointments = appointment_collection.find({"therapist_id": therapist_id})
+        appointments = await appointment_collection.find({"therapist_id": therapist_id}).to_list(length=None)
         return [{
             "id": str(appointment["_id"]),
             "patient_id": appointment["patient_id"],
@@ -71,7 +69,7 @@ async def update_appointment_status(appointment_id: str, status: str):
 
         # Update the appointment status in the database
         try:
-            result = appointment_collection.update_one(
+            result = await appointment_collection.update_one(
                 {"_id": appointment_id},
                 {"$set": {"status": status}}
             )
@@ -80,7 +78,9 @@ async def update_appointment_status(appointment_id: str, status: str):
                 raise HTTPException(status_code=404, detail="Appointment not found")
             
             # Fetch updated appointment data
-            updated_appointment = appointment_collection.find_one({"_id": appointment_id})
+            updated_appointment = await appointment_collection.find_one({"_id": appointment_id})
+            if status == "completed":
+                await arecord_event(updated_appointment["patient_id"], "sessions")
             
             # Return the updated appointment details
             return {
@@ -105,7 +105,7 @@ async def update_appointment_status(appointment_id: str, status: str):
 @router.get("/appointments/patient/{patient_id}")
 async def get_patient_appointments(patient_id: str):
     try:
-        appointments = appointment_collection.find({"patient_id": patient_id})
+        appointments = await appointment_collection.find({"patient_id": patient_id}).to_list(length=None)
         return [{
             "id": str(appointment["_id"]),
             "therapist_id": appointment["therapist_id"],
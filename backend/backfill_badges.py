@@ -0,0 +1,100 @@
+import argparse
+import heapq
+import itertools
+import time
+from bson import ObjectId
+from pymongo import UpdateOne
+from badge_engine import badge_stages
+from streaks import bitmap_words, day_number, streaks
+
+# Computes the badge counters (badge_engine.py) and activity bitmaps (streaks.py) for
+# existing users from their moods, journals and completed appointments, in one
+# streaming pass: moods and journals are read in user_id order (served by the user_id
+# indexes from db_indexes.py) and merged, so only one user's activity days are in
+# memory at a time. Completed sessions come from a single $group. Each user's stats are
+# written with the badge rules applied, in unordered bulk_writes. Stats are overwritten,
+# so run it before or instead of live traffic on the counters, not concurrently with it.
+#
+#   python backfill_badges.py --dry-run
+#   python backfill_badges.py --batch-size 1000
+
+
+def activity_events(cursor, counter):
+    for doc in cursor:
+        if doc.get("user_id"):
+            yield doc["user_id"], counter, doc.get("timestamp")
+
+
+def user_stats(events, sessions):
+    # (stats, activity bitmap) for one user's events
+    stats = {"moods": 0, "journals": 0, "sessions": sessions}
+    days = set()
+    for _, counter, timestamp in events:
+        stats[counter] += 1
+        if timestamp is not None:
+            days.add(day_number(timestamp))
+    if days:
+        stats["streak"], stats["longest_streak"] = streaks(days)
+        stats["last_active_day"] = max(days)
+    return stats, bitmap_words(days)
+
+
+def stats_update(user_id, stats, activity):
+    return UpdateOne({"_id": ObjectId(user_id)}, [{"$set": {"stats": stats, "activity": activity}}, *badge_stages()])
+
+
+def backfill(db, batch_size=1000, dry_run=False):
+    sessions = {
+        row["_id"]: row["count"]
+        for row in db["appointments"].aggregate([
+            {"$match": {"status": "completed"}},
+            {"$group": {"_id": "$patient_id", "count": {"$sum": 1}}},
+        ])
+    }
+
+    projection = {"_id": 0, "user_id": 1, "timestamp": 1}
+    moods = db["moods"].find({}, projection).sort("user_id", 1).allow_disk_use(True)
+    journals = db["journals"].find({}, projection).sort("user_id", 1).allow_disk_use(True)
+    merged = heapq.merge(activity_events(moods, "moods"), activity_events(journals, "journals"), key=lambda event: event[0])
+
+    batch = []
+    written = skipped = 0
+
+    def flush():
+        nonlocal written
+        if batch and not dry_run:
+            db["users"].bulk_write(batch, ordered=False)
+        written += len(batch)
+        batch.clear()
+
+    def add(user_id, stats, activity):
+        nonlocal skipped
+        if not ObjectId.is_valid(user_id):
+            skipped += 1
+            return
+        batch.append(stats_update(user_id, stats, activity))
+        if len(batch) >= batch_size:
+            flush()
+
+    for user_id, events in itertools.groupby(merged, key=lambda event: event[0]):
+        add(user_id, *user_stats(events, sessions.pop(user_id, 0)))
+    # Users with completed sessions but no moods or journals
+    for user_id, count in sessions.items():
+        add(user_id, *user_stats([], count))
+    flush()
+    return written, skipped
+
+
+def main(args):
+    from database import db
+    start = time.perf_counter()
+    written, skipped = backfill(db, args.batch_size, args.dry_run)
+    verb = "Would update" if args.dry_run else "Updated"
+    print(f"✅ {verb} {written} users in {time.perf_counter() - start:.1f}s ({skipped} invalid user ids skipped)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--dry-run", action="store_true", help="compute counters without writing them")
+    main(parser.parse_args())
@@ -0,0 +1,58 @@
+from datetime import datetime
+from bson import ObjectId
+from database import users_collection, async_users_collection
+from streaks import day_number, streak_stages
+
+# Badges as declarative rules over per-user counters. Each user document carries a
+# `stats` sub-document (moods, journals, sessions, streaks) that is updated as the
+# events happen, and the same update re-evaluates every rule server-side, so awarding
+# badges costs one atomic update per event: no counting queries, no collection scans.
+# backfill_badges.py computes the counters for users that predate this.
+
+# (badge id, field on the user document, minimum value); badge ids are keys of gamify.BADGES
+BADGE_RULES = [
+    ("first_mood", "stats.moods", 1),
+    ("mood_master", "stats.moods", 10),
+    ("journal_starter", "stats.journals", 1),
+    ("therapy_hero", "stats.sessions", 5),
+    ("streak_3", "stats.longest_streak", 3),
+    ("streak_7", "stats.longest_streak", 7),
+    ("level_5", "level", 5),
+]
+
+# Counters an event can increment, and whether the event counts as a day of activity
+EVENTS = {
+    "moods": True,
+    "journals": True,
+    "sessions": False,
+}
+
+def badge_stages():
+    # Pipeline stages appending every badge whose rule now holds, keeping existing order
+    badges = {"$ifNull": ["$badges", []]}
+    return [
+        {"$set": {"badges": {"$cond": [
+            {"$or": [{"$lt": [{"$ifNull": [f"${field}", 0]}, minimum]}, {"$in": [badge, badges]}]},
+            badges,
+            {"$concatArrays": [badges, [badge]]}
+        ]}}}
+        for badge, field, minimum in BADGE_RULES
+    ]
+
+
+def event_update(counter, when=None):
+    # Update pipeline for one event: bump the counter, mark the day active (streaks.py)
+    # for mood / journal events, then evaluate the rules
+    stages = [{"$set": {f"stats.{counter}": {"$add": [{"$ifNull": [f"$stats.{counter}", 0]}, 1]}}}]
+    if EVENTS[counter]:
+        stages += streak_stages(day_number(when or datetime.utcnow()))
+    return stages + badge_stages()
+
+
+def record_event(user_id, counter, when=None):
+    # Sync routes; user_id as stored on moods / journals (the ObjectId hex string)
+    users_collection.update_one({"_id": ObjectId(user_id)}, event_update(counter, when))
+
+
+async def arecord_event(user_id, counter, when=None):
+    await async_users_collection.update_one({"_id": ObjectId(user_id)}, event_update(counter, when))
@@ -0,0 +1,107 @@
+import asyncio
+import os
+
+# Dynamic micro-batching: items submitted by concurrent requests are collected for up
+# to a short window (or until the batch is full) and handed to the runner as one list,
+# so the model does one forward pass per batch instead of one per request.
+
+BATCH_MAX_SIZE = int(os.getenv("MOOD_BATCH_MAX_SIZE", "16"))
+BATCH_WINDOW_MS = float(os.getenv("MOOD_BATCH_WINDOW_MS", "10"))
+
+
+class MicroBatcher:
+    def __init__(self, runner, max_batch_size=BATCH_MAX_SIZE, window_ms=BATCH_WINDOW_MS):
+        # runner: async callable taking a list of items and returning a list of results in the same order
+        self.runner = runner
+        self.max_batch_size = max_batch_size
+        self.window = window_ms / 1000.0
+        self._queue = None
+        self._task = None
+        # Batches being run; kept so they aren't garbage collected mid-run and close() can wait for them
+        self._runs = set()
+        self.batches = 0
+        self.items = 0
+
+    def _start(self):
+        # Bound to the running event loop on first use
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._task = asyncio.get_running_loop().create_task(self._collect())
+
+    async def submit(self, item):
+        self._start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        batch = []
+        try:
+            while True:
+                batch = [await self._queue.get()]
+                deadline = loop.time() + self.window
+
+                while len(batch) < self.max_batch_size:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+
+                # Run without blocking collection of the next batch
+                run = loop.create_task(self._run(batch))
+                self._runs.add(run)
+                run.add_done_callback(self._runs.discard)
+                batch = []
+        except asyncio.CancelledError:
+            # Closed while collecting: the items gathered so far won't be run
+            self._fail(batch)
+            raise
+
+    async def _run(self, batch):
+        self.batches += 1
+        self.items += len(batch)
+        try:
+            results = await self.runner([item for item, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def _fail(self, batch):
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(RuntimeError("Batcher closed"))
+
+    async def close(self, timeout=5.0):
+        # Stop collecting, fail items still waiting for a batch and give the batches
+        # already running up to `timeout` seconds to finish
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._queue is not None:
+            while not self._queue.empty():
+                self._fail([self._queue.get_nowait()])
+        if self._runs:
+            await asyncio.wait(set(self._runs), timeout=timeout)
+
+    def metrics(self):
+        return {
+            "max_batch_size": self.max_batch_size,
+            "window_ms": self.window * 1000.0,
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+        }
@@ -0,0 +1,113 @@
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from batching import MicroBatcher
+
+# Load test for mood detection micro-batching: throughput and p50/p99 latency
+# with and without batching.
+#
+# In-process (one model copy, like a single inference worker):
+#   python bench_batching.py --clients 32 --seconds 10
+#
+# End to end against running servers started with MOOD_BATCHING=1 / MOOD_BATCHING=0:
+#   python bench_batching.py --url http://localhost:8000 --image face.jpg --token <jwt>
+
+
+def _percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+def _report(label, latencies, elapsed, errors=0):
+    print(f"{label:>12}: {len(latencies) / elapsed:8.1f} req/s   "
+          f"p50 {_percentile(latencies, 0.5) * 1000:7.1f} ms   "
+          f"p99 {_percentile(latencies, 0.99) * 1000:7.1f} ms   "
+          f"errors {errors}")
+
+
+async def _drive(call, clients, seconds):
+    # Each client sends its next request as soon as the previous one answers
+    latencies = []
+    errors = 0
+    stop_at = time.perf_counter() + seconds
+
+    async def client():
+        nonlocal errors
+        while time.perf_counter() < stop_at:
+            start = time.perf_counter()
+            try:
+                await call()
+                latencies.append(time.perf_counter() - start)
+            except Exception:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    return latencies, time.perf_counter() - start, errors
+
+
+async def bench_in_process(args):
+    import numpy as np
+    from inference import engine, ROI_SIZE
+
+    engine.load()
+    model_thread = ThreadPoolExecutor(max_workers=1)
+    rng = np.random.default_rng(0)
+    faces = rng.integers(0, 256, size=(64, ROI_SIZE[1], ROI_SIZE[0], 3), dtype=np.uint8)
+
+    async def run_batch(face_rois):
+        loop = asyncio.get_running_loop()
+        probabilities, dominant = await loop.run_in_executor(model_thread, engine.predict, np.stack(face_rois))
+        return dominant
+
+    configs = [("unbatched", 1, 0.0), ("batched", args.max_batch_size, args.window_ms)]
+    for label, max_batch_size, window_ms in configs:
+        batcher = MicroBatcher(run_batch, max_batch_size=max_batch_size, window_ms=window_ms)
+        counter = iter(range(10 ** 9))
+
+        async def call():
+            return await batcher.submit(faces[next(counter) % len(faces)])
+
+        latencies, elapsed, errors = await _drive(call, args.clients, args.seconds)
+        await batcher.close()
+        _report(label, latencies, elapsed, errors)
+        print(f"{'':>12}  avg batch size {batcher.metrics()['avg_batch_size']}")
+
+
+async def bench_http(args):
+    import httpx
+
+    with open(args.image, "rb") as f:
+        image = f.read()
+    headers = {"Authorization": f"Bearer {args.token}"}
+
+    async with httpx.AsyncClient(base_url=args.url, timeout=60) as client:
+        async def call():
+            response = await client.post("/mood_detect", files={"file": ("face.jpg", image, "image/jpeg")}, headers=headers)
+            response.raise_for_status()
+
+        latencies, elapsed, errors = await _drive(call, args.clients, args.seconds)
+        _report(args.url, latencies, elapsed, errors)
+        print((await client.get("/metrics/inference")).json())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mood detection micro-batching load test")
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--max-batch-size", type=int, default=16)
+    parser.add_argument("--window-ms", type=float, default=10)
+    parser.add_argument("--url", help="benchmark a running server instead of the in-process engine")
+    parser.add_argument("--image", help="face image to upload (with --url)")
+    parser.add_argument("--token", help="JWT for /mood_detect (with --url)")
+    args = parser.parse_args()
+
+    if args.url:
+        asyncio.run(bench_http(args))
+    else:
+        asyncio.run(bench_in_process(args))
+
+
+if __name__ == "__main__":
+    main()
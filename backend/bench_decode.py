@@ -0,0 +1,97 @@
+import argparse
+import glob
+import os
+import time
+import cv2
+import numpy as np
+from image_decode import decode_image, detection_input
+
+# Upload decode + face detection time at full resolution vs the reduced-decode /
+# downscaled-detection path, over a corpus of images (or generated JPEGs of common
+# camera sizes when no corpus is given).
+#
+#   python bench_decode.py --corpus samples/ --detector mediapipe
+#   python bench_decode.py --detector haar
+#   python bench_decode.py --detector none   # decode only
+
+
+GENERATED_SIZES = [(640, 480), (1280, 720), (1920, 1080), (3024, 4032), (4000, 3000)]
+
+
+def generated_corpus():
+    # Textured JPEGs with a face-sized bright ellipse, at typical webcam / phone sizes
+    rng = np.random.default_rng(0)
+    images = []
+    for width, height in GENERATED_SIZES:
+        img = cv2.GaussianBlur(rng.integers(0, 255, (height, width, 3), dtype=np.uint8), (9, 9), 0)
+        cv2.ellipse(img, (width // 2, height // 2), (width // 8, height // 6), 0, 0, 360, (170, 190, 220), -1)
+        ok, buffer = cv2.imencode(".jpg", img, [int(cv2.IMWRITE_JPEG_QUALITY), 90])
+        images.append((f"generated {width}x{height}", buffer.tobytes()))
+    return images
+
+
+def load_corpus(path):
+    files = sorted(f for pattern in ("*.jpg", "*.jpeg", "*.png", "*.webp") for f in glob.glob(os.path.join(path, pattern)))
+    if not files:
+        raise SystemExit(f"❌ No images found in {path}")
+    images = []
+    for file in files:
+        with open(file, "rb") as f:
+            images.append((os.path.basename(file), f.read()))
+    return images
+
+
+def make_detector(name):
+    if name == "mediapipe":
+        from model_registry import registry
+        face_detection = registry.create("face_detection")
+        return lambda img: face_detection.process(cv2.cvtColor(img, cv2.COLOR_BGR2RGB))
+    if name == "none":
+        return lambda img: None
+    cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_alt2.xml")
+    return lambda img: cascade.detectMultiScale(cv2.cvtColor(img, cv2.COLOR_BGR2GRAY), scaleFactor=1.1, minNeighbors=4)
+
+
+def full_resolution(contents, detect):
+    img = cv2.imdecode(np.frombuffer(contents, np.uint8), cv2.IMREAD_COLOR)
+    detect(img)
+    return img.shape
+
+
+def reduced(contents, detect):
+    img = decode_image(contents)
+    small, _ = detection_input(img)
+    detect(small)
+    return img.shape
+
+
+def timed(func, contents, detect, repeat):
+    func(contents, detect)  # warm-up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        shape = func(contents, detect)
+    return (time.perf_counter() - start) / repeat, shape
+
+
+def main(args):
+    images = load_corpus(args.corpus) if args.corpus else generated_corpus()
+    detect = make_detector(args.detector)
+
+    print(f"{'image':>28} {'full ms':>9} {'reduced ms':>11} {'speedup':>8}  decoded at")
+    totals = [0.0, 0.0]
+    for name, contents in images:
+        full_time, _ = timed(full_resolution, contents, detect, args.repeat)
+        reduced_time, shape = timed(reduced, contents, detect, args.repeat)
+        totals[0] += full_time
+        totals[1] += reduced_time
+        print(f"{name[:28]:>28} {full_time * 1000:>9.1f} {reduced_time * 1000:>11.1f} "
+              f"{full_time / reduced_time:>7.2f}x  {shape[1]}x{shape[0]}")
+    print(f"{'total':>28} {totals[0] * 1000:>9.1f} {totals[1] * 1000:>11.1f} {totals[0] / totals[1]:>7.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", help="directory of .jpg / .png / .webp images")
+    parser.add_argument("--detector", choices=["mediapipe", "haar", "none"], default="mediapipe")
+    parser.add_argument("--repeat", type=int, default=5)
+    main(parser.parse_args())
@@ -0,0 +1,87 @@
+import argparse
+import threading
+import time
+import numpy as np
+from emotion_workers import EmotionProcessPool
+
+# Emotion analysis throughput as workers are added: the thread backend (shared model,
+# shared GIL) against the process backend (one model per process, crops handed over
+# through shared memory).
+#
+#   python bench_emotion_workers.py --max-workers 4 --seconds 10 --faces 5
+
+
+def bench_threads(workers, batches, seconds):
+    from concurrent.futures import ThreadPoolExecutor
+    from inference import engine
+
+    engine.load()
+    done = 0
+    stop_at = time.perf_counter() + seconds
+
+    def worker(i):
+        nonlocal done
+        while time.perf_counter() < stop_at:
+            engine.predict(batches[i % len(batches)])
+            done += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(worker, range(workers)))
+    return done, time.perf_counter() - start
+
+
+def bench_processes(workers, batches, seconds):
+    pool = EmotionProcessPool(workers=workers, capacity=len(batches[0]))
+    if not pool.wait_ready():
+        raise SystemExit("❌ Emotion workers did not start")
+
+    done = 0
+    finished = threading.Condition()
+
+    def on_result(probabilities, dominant):
+        nonlocal done
+        with finished:
+            done += 1
+            finished.notify()
+
+    # Keep every slot busy: submit whenever one frees up
+    start = time.perf_counter()
+    stop_at = start + seconds
+    i = 0
+    while time.perf_counter() < stop_at:
+        if pool.submit(list(batches[i % len(batches)]), on_result):
+            i += 1
+        else:
+            with finished:
+                finished.wait(0.01)
+    while pool.in_flight:
+        time.sleep(0.01)
+    elapsed = time.perf_counter() - start
+    pool.shutdown()
+    return done, elapsed
+
+
+def main(args):
+    rng = np.random.default_rng(0)
+    batches = [rng.integers(0, 256, size=(args.faces, 224, 224, 3), dtype=np.uint8) for _ in range(8)]
+
+    print(f"{'backend':>8} {'workers':>8} {'batches/s':>10} {'faces/s':>9} {'speedup':>8}")
+    for backend, run in (("thread", bench_threads), ("process", bench_processes)):
+        if backend not in args.backends:
+            continue
+        baseline = None
+        for workers in range(1, args.max_workers + 1):
+            done, elapsed = run(workers, batches, args.seconds)
+            rate = done / elapsed
+            baseline = baseline or rate
+            print(f"{backend:>8} {workers:>8} {rate:>10.1f} {rate * args.faces:>9.1f} {rate / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--max-workers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--faces", type=int, default=5, help="face crops per batch")
+    parser.add_argument("--backends", nargs="+", default=["thread", "process"])
+    main(parser.parse_args())
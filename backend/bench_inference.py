@@ -0,0 +1,77 @@
+import argparse
+import time
+from collections import Counter
+import cv2
+import numpy as np
+from deepface import DeepFace
+from inference import engine, prepare_batch
+
+# Per-request CPU and wall time of emotion analysis over an N-crop batch:
+# the old path (three DeepFace.analyze calls per crop, then a vote) against
+# EmotionInferenceEngine (one batched forward pass per model).
+#
+#   python bench_inference.py --crops 8 --repeat 20
+
+
+def old_analyze_emotion_ensemble(face_roi):
+    # analyze_emotion_ensemble as it was in emotion_tracker.py: the "models"
+    # list was never passed to DeepFace, so this is the same model run three times
+    models = ["VGG-Face", "ResNet50", "EfficientNetB0"]
+    predictions = []
+    face_roi = cv2.resize(face_roi, (224, 224))
+    face_roi = cv2.cvtColor(face_roi, cv2.COLOR_BGR2RGB)
+    for model in models:
+        result = DeepFace.analyze(face_roi, actions=["emotion"], enforce_detection=False, detector_backend="opencv")
+        if result and len(result) > 0:
+            predictions.append(result[0]["dominant_emotion"])
+    if predictions:
+        return Counter(predictions).most_common(1)[0][0]
+    return "Neutral"
+
+
+def old_request(face_rois):
+    labels = [old_analyze_emotion_ensemble(roi) for roi in face_rois]
+    return Counter(labels).most_common(1)[0][0] if labels else "Neutral"
+
+
+def new_request(face_rois):
+    return engine.analyze(prepare_batch(face_rois))["vote"]
+
+
+def _measure(call, face_rois, repeat):
+    # Warm-up call so model building is not counted, then average per request
+    call(face_rois)
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    for _ in range(repeat):
+        call(face_rois)
+    return (time.process_time() - cpu_start) / repeat, (time.perf_counter() - wall_start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Old DeepFace ensemble vs batched emotion engine")
+    parser.add_argument("--crops", type=int, default=8, help="face crops per request")
+    parser.add_argument("--repeat", type=int, default=20, help="requests timed per path")
+    args = parser.parse_args()
+
+    engine.load()
+    rng = np.random.default_rng(0)
+    # Crops of mixed sizes, like the face boxes cut out of webcam frames
+    face_rois = [
+        rng.integers(0, 256, size=(int(h), int(w), 3), dtype=np.uint8)
+        for h, w in rng.integers(80, 320, size=(args.crops, 2))
+    ]
+
+    results = {}
+    for label, call in [("old", old_request), ("engine", new_request)]:
+        cpu, wall = _measure(call, face_rois, args.repeat)
+        results[label] = (cpu, wall)
+        print(f"{label:>8}: cpu {cpu * 1000:8.1f} ms/request   wall {wall * 1000:8.1f} ms/request")
+
+    old_cpu, old_wall = results["old"]
+    new_cpu, new_wall = results["engine"]
+    print(f"✅ {args.crops} crops: old/engine CPU time {old_cpu / new_cpu:.1f}x, "
+          f"wall time {old_wall / new_wall:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
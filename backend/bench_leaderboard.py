@@ -0,0 +1,120 @@
+import argparse
+import os
+import random
+import time
+from bson import ObjectId
+
+# Leaderboard reads with 1M synthetic users: the in-memory SortedList leaderboard
+# against the Mongo aggregate (top-N) + count_documents (rank) it replaces. The Mongo
+# half needs a mongod and seeds a scratch database, dropped afterwards.
+#
+#   python bench_leaderboard.py --users 1000000
+#   python bench_leaderboard.py --users 1000000 --uri mongodb://localhost:27017
+#   python bench_leaderboard.py --users 1000000 --uri mongodb://localhost:27017 --no-index
+
+BENCH_DB = "bench_leaderboard"
+
+
+def synthetic_users(count, opt_out_rate=0.05, seed=0):
+    rng = random.Random(seed)
+    for i in range(count):
+        # Long-tailed XP, like real engagement
+        xp = int(rng.paretovariate(1.2) * 50)
+        yield {
+            "_id": ObjectId(),
+            "name": f"user{i}",
+            "xp": xp,
+            "level": xp // 100 + 1,
+            "badges": [],
+            "leaderboard_opt_out": rng.random() < opt_out_rate,
+        }
+
+
+def timed(func, repeat):
+    start = time.perf_counter()
+    for i in range(repeat):
+        func(i)
+    return (time.perf_counter() - start) / repeat
+
+
+def bench_memory(users, sample_ids, repeat):
+    from leaderboard import Leaderboard
+    board = Leaderboard()
+    start = time.perf_counter()
+    board.load(users)
+    build = time.perf_counter() - start
+
+    rng = random.Random(1)
+    results = {
+        "build (s)": build,
+        "top 10 (ms)": timed(lambda i: board.top(10), repeat) * 1000,
+        "rank (ms)": timed(lambda i: board.rank(sample_ids[i % len(sample_ids)]), repeat) * 1000,
+        "neighbors (ms)": timed(lambda i: board.neighbors(sample_ids[i % len(sample_ids)]), repeat) * 1000,
+        "xp update (ms)": timed(lambda i: board.update(sample_ids[i % len(sample_ids)], xp=rng.randint(0, 5000)), repeat) * 1000,
+    }
+    return results
+
+
+def bench_mongo(users, sample_ids, repeat, uri, index):
+    from pymongo import MongoClient
+    from db_indexes import INDEXES
+
+    client = MongoClient(uri)
+    collection = client[BENCH_DB]["users"]
+    collection.drop()
+    batch = []
+    for user in users:
+        batch.append(user)
+        if len(batch) == 10000:
+            collection.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        collection.insert_many(batch, ordered=False)
+    if index:
+        collection.create_indexes(INDEXES["users"])
+
+    pipeline = [
+        {"$match": {"leaderboard_opt_out": {"$ne": True}}},
+        {"$sort": {"xp": -1}},
+        {"$limit": 10},
+        {"$project": {"name": 1, "xp": 1, "level": 1, "badges": 1}},
+    ]
+
+    def rank(i):
+        user = collection.find_one({"_id": ObjectId(sample_ids[i % len(sample_ids)])})
+        return collection.count_documents({"xp": {"$gt": user.get("xp", 0)}, "leaderboard_opt_out": {"$ne": True}}) + 1
+
+    try:
+        return {
+            "top 10 (ms)": timed(lambda i: list(collection.aggregate(pipeline)), repeat) * 1000,
+            "rank (ms)": timed(rank, repeat) * 1000,
+        }
+    finally:
+        client.drop_database(BENCH_DB)
+        client.close()
+
+
+def main(args):
+    print(f"⏳ Generating {args.users} users")
+    users = list(synthetic_users(args.users))
+    ranked_ids = [str(u["_id"]) for u in users if not u["leaderboard_opt_out"]]
+    sample_ids = random.Random(2).sample(ranked_ids, min(1000, len(ranked_ids)))
+
+    rows = [("memory", bench_memory(users, sample_ids, args.repeat))]
+    if args.uri:
+        name = "mongo" + ("" if args.index else " (no index)")
+        rows.append((name, bench_mongo(users, sample_ids, max(1, args.repeat // 100), args.uri, args.index)))
+    else:
+        print("ℹ️ No --uri given, skipping the Mongo pipeline")
+
+    for name, results in rows:
+        print(f"{name:>18}: " + "  ".join(f"{metric} {value:.3f}" for metric, value in results.items()))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=10000)
+    parser.add_argument("--uri", default=os.getenv("MONGO_URI"), help="mongod to compare against (defaults to MONGO_URI)")
+    parser.add_argument("--no-index", dest="index", action="store_false", help="Mongo without the db_indexes.py users indexes")
+    main(parser.parse_args())
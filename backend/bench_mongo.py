@@ -0,0 +1,180 @@
+import argparse
+import asyncio
+import os
+import time
+from fastapi import APIRouter, FastAPI, HTTPException
+import httpx
+
+# Concurrent request throughput for the therapist routes, three ways:
+#   blocking    - sync pymongo called inside `async def` (how the routers used to work)
+#   threadpool  - sync pymongo in a plain `def` route (FastAPI's threadpool)
+#   motor       - the real `async def` routes on the Motor client
+# Requests go through an in-process ASGI app, so a blocked event loop shows up directly.
+#
+#   python bench_mongo.py --uri mongodb://localhost:27017 --concurrency 50 --requests 2000
+#   python bench_mongo.py --mock --latency-ms 2   # mongomock behind a simulated round-trip
+
+BENCH_DB = "bench_mental_health"
+
+
+class MockCollection:
+    # Sync stand-in: mongomock behind a blocking round-trip
+    def __init__(self, collection, latency):
+        self.collection = collection
+        self.latency = latency
+
+    def find(self, *args, **kwargs):
+        time.sleep(self.latency)
+        return list(self.collection.find(*args, **kwargs))
+
+    def find_one(self, *args, **kwargs):
+        time.sleep(self.latency)
+        return self.collection.find_one(*args, **kwargs)
+
+
+class MockCursor:
+    def __init__(self, documents, latency):
+        self.documents = documents
+        self.latency = latency
+
+    async def to_list(self, length=None):
+        await asyncio.sleep(self.latency)
+        return self.documents[:length] if length else self.documents
+
+
+class MockAsyncCollection:
+    # Async stand-in: the same round-trip, awaited instead of blocking
+    def __init__(self, collection, latency):
+        self.collection = collection
+        self.latency = latency
+
+    def find(self, *args, **kwargs):
+        return MockCursor(list(self.collection.find(*args, **kwargs)), self.latency)
+
+    async def find_one(self, *args, **kwargs):
+        await asyncio.sleep(self.latency)
+        return self.collection.find_one(*args, **kwargs)
+
+
+def seed(collection, therapists):
+    collection.delete_many({})
+    collection.insert_many([{
+        "name": f"Therapist {i}",
+        "role": "therapist",
+        "specialization": "CBT",
+        "bio": "",
+        "availableSlots": ["09:00", "10:00", "11:00"],
+    } for i in range(therapists)])
+    collection.insert_many([{"name": f"User {i}", "role": "user"} for i in range(therapists * 10)])
+    return [str(t["_id"]) for t in collection.find({"role": "therapist"}, {"_id": 1})]
+
+
+def therapist_summary(t):
+    return {"id": str(t["_id"]), "name": t.get("name", ""), "availableSlots": t.get("availableSlots", [])}
+
+
+def legacy_router(users):
+    from bson import ObjectId
+    router = APIRouter()
+
+    @router.get("/blocking/therapists")
+    async def blocking_therapists():
+        return [therapist_summary(t) for t in users.find({"role": "therapist"})]
+
+    @router.get("/blocking/therapists/{therapist_id}/slots")
+    async def blocking_slots(therapist_id: str):
+        therapist = users.find_one({"_id": ObjectId(therapist_id), "role": "therapist"})
+        if not therapist:
+            raise HTTPException(status_code=404, detail="Therapist not found")
+        return therapist.get("availableSlots", [])
+
+    @router.get("/threadpool/therapists")
+    def threadpool_therapists():
+        return [therapist_summary(t) for t in users.find({"role": "therapist"})]
+
+    @router.get("/threadpool/therapists/{therapist_id}/slots")
+    def threadpool_slots(therapist_id: str):
+        therapist = users.find_one({"_id": ObjectId(therapist_id), "role": "therapist"})
+        if not therapist:
+            raise HTTPException(status_code=404, detail="Therapist not found")
+        return therapist.get("availableSlots", [])
+
+    return router
+
+
+async def run_load(app, paths, concurrency, total):
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one(i):
+            async with semaphore:
+                started_at = time.perf_counter()
+                response = await client.get(paths[i % len(paths)])
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started_at)
+
+        await one(0)  # warm-up: connection pools, route compilation
+        latencies.clear()
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        elapsed = time.perf_counter() - start
+    latencies.sort()
+    return total / elapsed, latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.95)]
+
+
+def main(args):
+    if args.mock:
+        import mongomock
+        collection = mongomock.MongoClient()[BENCH_DB]["users"]
+        therapist_ids = seed(collection, args.therapists)
+        sync_users = MockCollection(collection, args.latency_ms / 1000)
+        async_users = MockAsyncCollection(collection, args.latency_ms / 1000)
+        cleanup = None
+    else:
+        # Never touch the real database: point the data layer at a scratch one
+        os.environ["MONGO_URI"] = args.uri
+        os.environ["MONGO_DB_NAME"] = BENCH_DB
+        os.environ.setdefault("MONGO_MAX_POOL_SIZE", str(args.concurrency))
+        import database
+        therapist_ids = seed(database.users_collection, args.therapists)
+        sync_users = database.users_collection
+        async_users = database.async_users_collection
+        cleanup = lambda: database.client.drop_database(BENCH_DB)
+
+    import therapists
+    from user_cache import user_cache, MemoryBackend
+    therapists.users_collection = async_users
+    # Measure the database path, not cache hits: keep nothing in the read-through cache
+    user_cache.backend = MemoryBackend(max_entries=0)
+
+    app = FastAPI()
+    app.include_router(legacy_router(sync_users))
+    app.include_router(therapists.router, prefix="/motor")
+
+    # One event loop for every run: the Motor client binds to the loop it is first used on
+    async def run_all():
+        print(f"{'route':>10} {'mode':>11} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8}")
+        for route, suffixes in (("list", ["/therapists"]),
+                                ("slots", [f"/therapists/{i}/slots" for i in therapist_ids])):
+            for mode in ("blocking", "threadpool", "motor"):
+                paths = [f"/{mode}{suffix}" for suffix in suffixes]
+                rate, p50, p95 = await run_load(app, paths, args.concurrency, args.requests)
+                print(f"{route:>10} {mode:>11} {rate:>9.1f} {p50 * 1000:>8.1f} {p95 * 1000:>8.1f}")
+
+    try:
+        asyncio.run(run_all())
+    finally:
+        if cleanup:
+            cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--uri", default="mongodb://localhost:27017")
+    parser.add_argument("--mock", action="store_true", help="mongomock with a simulated round-trip instead of a mongod")
+    parser.add_argument("--latency-ms", type=float, default=2.0, help="simulated round-trip for --mock")
+    parser.add_argument("--therapists", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=2000)
+    main(parser.parse_args())
@@ -0,0 +1,81 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# Reports import time and peak RSS for the "core" API and "vision" profiles.
+# Each profile runs in a fresh interpreter so earlier imports don't skew the numbers.
+#
+#   python bench_startup.py
+#   python bench_startup.py --load-models --max-core-seconds 1.0
+
+PROFILES = {
+    # What a core API worker (APP_PROFILE=core) imports
+    "core": {"env": {"APP_PROFILE": "core"}, "modules": ["emotion_tracker"]},
+    # Core app plus the full vision stack
+    "vision": {"env": {"APP_PROFILE": "all"}, "modules": ["emotion_tracker", "vision"]},
+}
+
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+for name in {modules!r}:
+    __import__(name)
+import_seconds = time.perf_counter() - start
+load_seconds = None
+if {load_models!r}:
+    from model_registry import registry
+    start = time.perf_counter()
+    registry.load_all()
+    load_seconds = time.perf_counter() - start
+print(json.dumps({{
+    "import_seconds": round(import_seconds, 3),
+    "load_seconds": load_seconds and round(load_seconds, 3),
+    "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    "heavy_modules": sorted(m for m in ("cv2", "mediapipe", "tensorflow", "deepface", "dlib", "scipy") if m in sys.modules),
+}}))
+"""
+
+
+def run_profile(name, load_models):
+    profile = PROFILES[name]
+    env = {**os.environ, **profile["env"], "PRELOAD_MODELS": "0"}
+    code = PROBE.format(modules=profile["modules"], load_models=load_models and name == "vision")
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{name} profile failed:\n{result.stderr}")
+    # Import-time prints from the app come first; the probe's JSON is the last line
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup import time / RSS per deployment profile")
+    parser.add_argument("--profile", choices=list(PROFILES), action="append")
+    parser.add_argument("--load-models", action="store_true", help="also time registry.load_all() for the vision profile")
+    parser.add_argument("--max-core-seconds", type=float, help="exit non-zero if the core import takes longer")
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.profile or list(PROFILES):
+        results[name] = run_profile(name, args.load_models)
+        stats = results[name]
+        print(f"{name:>7}: import {stats['import_seconds']}s, max RSS {stats['max_rss_mb']} MB, "
+              f"heavy modules: {', '.join(stats['heavy_modules']) or 'none'}"
+              + (f", model load {stats['load_seconds']}s" if stats["load_seconds"] is not None else ""))
+
+    core = results.get("core")
+    if core and args.max_core_seconds is not None:
+        if core["import_seconds"] > args.max_core_seconds or core["heavy_modules"]:
+            print(f"❌ core profile over budget ({args.max_core_seconds}s, no vision imports)")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+import bson
+from streaks import bitmap_words, day_number, streak_summary, streaks
+
+# Streak queries for users with years of history: scanning every mood / journal
+# timestamp (what answering "current streak" takes without server-side state) against
+# reading the per-user day bitmap and running streak fields from streaks.py. Both
+# answers are checked to agree; payload is the BSON a query would fetch per user.
+#
+#   python bench_streaks.py --users 200 --years 3 --events-per-day 2
+
+RECENT_DAYS = 30
+
+
+def synthetic_history(rng, today, years, events_per_day):
+    # Bursty activity: active stretches of a few days to weeks, separated by gaps
+    timestamps = []
+    day = today - int(years * 365)
+    while day <= today:
+        for d in range(day, min(today, day + rng.randint(1, 21)) + 1):
+            for _ in range(rng.randint(1, 2 * events_per_day - 1)):
+                timestamps.append(datetime(1970, 1, 1) + timedelta(days=d, seconds=rng.randint(0, 86399)))
+        day += rng.randint(5, 30)
+    return sorted(timestamps)
+
+
+def user_document(timestamps):
+    # The stats / activity fields event_update maintains, built from the same history
+    days = {day_number(t) for t in timestamps}
+    current, longest = streaks(days)
+    stats = {"streak": current, "longest_streak": longest, "last_active_day": max(days)}
+    return {"stats": stats, "activity": bitmap_words(days)}
+
+
+def date_scan(timestamps, today, days=RECENT_DAYS):
+    active = {day_number(t) for t in timestamps}
+    current, longest = streaks(active)
+    alive = max(active) >= today - 1
+    return {
+        "current_streak": current if alive else 0,
+        "longest_streak": longest,
+        "last_active_day": max(active),
+        "recent_activity": [day in active for day in range(today - days + 1, today + 1)],
+    }
+
+
+def timed(func, items, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for item in items:
+            func(item)
+    return (time.perf_counter() - start) / (repeat * len(items))
+
+
+def main(args):
+    rng = random.Random(0)
+    today = day_number(datetime.utcnow())
+    histories = [synthetic_history(rng, today, args.years, args.events_per_day) for _ in range(args.users)]
+    documents = [user_document(timestamps) for timestamps in histories]
+
+    for timestamps, document in zip(histories, documents):
+        assert date_scan(timestamps, today) == streak_summary(document, RECENT_DAYS, today), "answers differ"
+
+    scan_time = timed(lambda t: date_scan(t, today), histories, args.repeat)
+    bitmap_time = timed(lambda d: streak_summary(d, RECENT_DAYS, today), documents, args.repeat)
+    events = sum(len(t) for t in histories) / args.users
+    scan_bytes = sum(len(bson.encode({"ts": t})) for t in histories) / args.users
+    bitmap_bytes = sum(len(bson.encode(d)) for d in documents) / args.users
+
+    print(f"{args.users} users, {args.years} years, {events:.0f} events/user on average")
+    print(f"{'approach':>10} {'per query µs':>13} {'bytes/user':>11}")
+    print(f"{'date scan':>10} {scan_time * 1e6:>13.1f} {scan_bytes:>11.0f}")
+    print(f"{'bitmap':>10} {bitmap_time * 1e6:>13.1f} {bitmap_bytes:>11.0f}")
+    print(f"✅ Answers agree; bitmap is {scan_time / bitmap_time:.0f}x faster and {scan_bytes / bitmap_bytes:.0f}x smaller")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--years", type=float, default=3)
+    parser.add_argument("--events-per-day", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=5)
+    main(parser.parse_args())
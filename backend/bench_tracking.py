@@ -0,0 +1,82 @@
+import argparse
+import time
+import cv2
+from analysis_scheduler import AnalysisScheduler
+from face_tracker import FaceTracker
+from frame_ring import FrameViews
+
+# Face detection cost with and without tracking on a recorded clip: detector calls
+# per second, per-frame face-stage time, and how many track ids were handed out
+# (fewer ids for the same faces = more stable ids).
+#
+#   python bench_tracking.py --video clip.mp4 --redetect-every 10
+
+
+def load_frames(path, max_frames):
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise SystemExit(f"❌ Cannot open video file: {path}")
+    frames = []
+    while len(frames) < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(cv2.flip(frame, 1))
+    cap.release()
+    return frames
+
+
+def run(frames, analysis, tracker=None):
+    scheduler = AnalysisScheduler()
+    views = FrameViews()
+    calls = 0
+
+    def detect(rgb, frame_w, frame_h):
+        nonlocal calls
+        calls += 1
+        return analysis._detect_faces(rgb, frame_w, frame_h)
+
+    start = time.perf_counter()
+    for frame in frames:
+        h, w, _ = frame.shape
+        views.reset(frame)
+        scheduler.begin_frame(views)
+        rgb = scheduler.input_for("face_detection")
+        if tracker is None:
+            detect(rgb, w, h)
+        else:
+            tracker.update(rgb, w, h, detect)
+    return calls, time.perf_counter() - start
+
+
+def main(args):
+    from vision import WebcamAnalysis
+
+    frames = load_frames(args.video, args.max_frames)
+    if not frames:
+        raise SystemExit("❌ No frames decoded from the video")
+    clip_seconds = len(frames) / args.clip_fps
+    analysis = WebcamAnalysis("bench")
+
+    # Warm-up so graph initialization isn't counted
+    run(frames[:5], analysis)
+
+    calls, elapsed = run(frames, analysis)
+    print(f"{'per-frame':>10}: {calls / clip_seconds:6.1f} detections/s of video   "
+          f"{elapsed / len(frames) * 1000:6.2f} ms/frame")
+
+    tracker = FaceTracker(redetect_every=args.redetect_every)
+    calls, elapsed = run(frames, analysis, tracker)
+    print(f"{'tracked':>10}: {calls / clip_seconds:6.1f} detections/s of video   "
+          f"{elapsed / len(frames) * 1000:6.2f} ms/frame   "
+          f"track ids issued {tracker.next_id}")
+    analysis.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--video", required=True)
+    parser.add_argument("--max-frames", type=int, default=600)
+    parser.add_argument("--clip-fps", type=float, default=30.0, help="frame rate the detections/s figure is normalized to")
+    parser.add_argument("--redetect-every", type=int, default=10)
+    main(parser.parse_args())
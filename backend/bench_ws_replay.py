@@ -0,0 +1,114 @@
+import argparse
+import asyncio
+import json
+import time
+import cv2
+import websockets
+
+# Replay client for the /ws/emotion frame-ingest endpoint: feeds a video file over
+# N concurrent connections and reports sustained analyzed frames/sec per connection
+# and for the node, plus send-to-result latency and dropped frames.
+#
+#   python bench_ws_replay.py --url ws://localhost:8000/ws/emotion --token <jwt> \
+#       --video sample.mp4 --connections 8 --send-fps 15 --seconds 30
+
+
+def _percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+def load_frames(path, max_frames, width, quality):
+    # Encode the clip once up front so the client's own JPEG cost doesn't limit the send rate
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise SystemExit(f"❌ Cannot open video file: {path}")
+    frames = []
+    while len(frames) < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        if width and frame.shape[1] > width:
+            frame = cv2.resize(frame, (width, int(frame.shape[0] * width / frame.shape[1])), interpolation=cv2.INTER_AREA)
+        ok, buffer = cv2.imencode(".jpg", frame, [int(cv2.IMWRITE_JPEG_QUALITY), quality])
+        if ok:
+            frames.append(buffer.tobytes())
+    cap.release()
+    if not frames:
+        raise SystemExit("❌ No frames decoded from the video")
+    return frames
+
+
+async def connection(args, frames, stop_at):
+    url = f"{args.url}?token={args.token}&fps={args.server_fps}" if args.server_fps else f"{args.url}?token={args.token}"
+    sent_at = {}
+    stats = {"sent": 0, "results": 0, "errors": 0, "dropped": 0, "latencies": []}
+
+    async with websockets.connect(url, max_size=None) as ws:
+        async def sender():
+            interval = 1.0 / args.send_fps
+            next_send = time.perf_counter()
+            index = 0
+            while time.perf_counter() < stop_at:
+                sent_at[index] = time.perf_counter()
+                await ws.send(frames[index % len(frames)])
+                index += 1
+                stats["sent"] = index
+                next_send += interval
+                await asyncio.sleep(max(0.0, next_send - time.perf_counter()))
+
+        async def receiver():
+            while True:
+                result = json.loads(await ws.recv())
+                if "error" in result:
+                    stats["errors"] += 1
+                    continue
+                stats["results"] += 1
+                stats["dropped"] = result["dropped"]
+                if result["frame"] in sent_at:
+                    stats["latencies"].append(time.perf_counter() - sent_at.pop(result["frame"]))
+
+        receive_task = asyncio.create_task(receiver())
+        await sender()
+        # Let the last in-flight result arrive
+        await asyncio.sleep(1.0)
+        receive_task.cancel()
+    return stats
+
+
+async def main(args):
+    frames = load_frames(args.video, args.max_frames, args.width, args.quality)
+    print(f"Loaded {len(frames)} frames, avg {sum(map(len, frames)) / len(frames) / 1024:.1f} KiB")
+
+    start = time.perf_counter()
+    stop_at = start + args.seconds
+    results = await asyncio.gather(*(connection(args, frames, stop_at) for _ in range(args.connections)))
+    elapsed = args.seconds
+
+    for i, stats in enumerate(results):
+        print(f"conn {i:>3}: sent {stats['sent'] / elapsed:6.1f} fps   "
+              f"analyzed {stats['results'] / elapsed:6.1f} fps   "
+              f"p50 {_percentile(stats['latencies'], 0.5) * 1000:7.1f} ms   "
+              f"p99 {_percentile(stats['latencies'], 0.99) * 1000:7.1f} ms   "
+              f"dropped {stats['dropped']}   errors {stats['errors']}")
+
+    total = sum(stats["results"] for stats in results)
+    latencies = [latency for stats in results for latency in stats["latencies"]]
+    print(f"\nnode: {total / elapsed:.1f} analyzed fps over {args.connections} connections "
+          f"({total / elapsed / args.connections:.1f} per connection)   "
+          f"p50 {_percentile(latencies, 0.5) * 1000:.1f} ms   p99 {_percentile(latencies, 0.99) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="ws://localhost:8000/ws/emotion")
+    parser.add_argument("--token", required=True)
+    parser.add_argument("--video", required=True)
+    parser.add_argument("--connections", type=int, default=1)
+    parser.add_argument("--send-fps", type=float, default=15.0)
+    parser.add_argument("--server-fps", type=float, default=0.0, help="requested analysis rate, 0 for the server default")
+    parser.add_argument("--seconds", type=float, default=30.0)
+    parser.add_argument("--max-frames", type=int, default=300)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--quality", type=int, default=80)
+    asyncio.run(main(parser.parse_args()))
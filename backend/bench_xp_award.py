@@ -0,0 +1,121 @@
+import argparse
+import asyncio
+import sys
+import time
+from datetime import datetime
+from fastapi import FastAPI, HTTPException
+import httpx
+
+# Fires thousands of concurrent XP awards at a few users and checks that no XP is lost,
+# comparing three ways of applying them:
+#   read-modify-write  - find_one, compute in Python, $set (how award_xp used to work)
+#   atomic             - POST /xp/award, one pipeline update per award
+#   bulk               - POST /xp/award/bulk, batches applied with one bulk_write each
+# Needs a mongod; users are seeded in a scratch database that is dropped afterwards.
+#
+#   python bench_xp_award.py --uri mongodb://localhost:27017 --awards 5000 --users 20 --concurrency 200
+
+BENCH_DB = "bench_xp_award"
+ACTION = "mood_check"
+
+
+def legacy_award(users, xp_per_level, xp_amount):
+    from bson import ObjectId
+
+    async def award(user_id: str, action: str):
+        user = await users.find_one({"_id": ObjectId(user_id)})
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        new_xp = user.get("xp", 0) + xp_amount
+        await users.update_one(
+            {"_id": ObjectId(user_id)},
+            {"$set": {"xp": new_xp, "level": new_xp // xp_per_level + 1, "last_action_date": datetime.utcnow()}}
+        )
+        return {"new_xp": new_xp}
+
+    return award
+
+
+async def seed(users, count):
+    await users.delete_many({})
+    result = await users.insert_many([{"name": f"user{i}", "xp": 0, "level": 1, "badges": []} for i in range(count)])
+    return [str(_id) for _id in result.inserted_ids]
+
+
+async def fire(client, requests, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    failures = 0
+
+    async def one(method, path, kwargs):
+        nonlocal failures
+        async with semaphore:
+            response = await client.request(method, path, **kwargs)
+            failures += response.status_code != 200
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(*request) for request in requests))
+    return time.perf_counter() - start, failures
+
+
+async def run(args):
+    from motor.motor_asyncio import AsyncIOMotorClient
+    import gamify
+
+    mongo = AsyncIOMotorClient(args.uri, maxPoolSize=args.concurrency)
+    users = mongo[BENCH_DB]["users"]
+    gamify.users_collection = users
+    gamify.XP_BULK_API_KEY = "bench"
+    gamify.XP_BULK_MAX_EVENTS = max(gamify.XP_BULK_MAX_EVENTS, args.batch_size)
+    xp_amount = gamify.XP_REWARDS[ACTION]
+
+    app = FastAPI()
+    app.include_router(gamify.router)
+    # Every award is made as the user it credits
+    app.dependency_overrides[gamify.get_current_user] = lambda user_id: {"user_id": user_id}
+    app.post("/legacy/xp/award")(legacy_award(users, gamify.XP_PER_LEVEL, xp_amount))
+
+    lost_any = False
+    print(f"{'mode':>18} {'awards':>7} {'awards/s':>9} {'errors':>7} {'xp lost':>8}")
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for mode in ("read-modify-write", "atomic", "bulk"):
+            user_ids = await seed(users, args.users)
+            awards = [user_ids[i % len(user_ids)] for i in range(args.awards)]
+            if mode == "bulk":
+                requests = [
+                    ("POST", "/xp/award/bulk", {"headers": {"X-Internal-Key": "bench"}, "json": {"events": [
+                        {"user_id": user_id, "action": ACTION} for user_id in awards[i:i + args.batch_size]
+                    ]}})
+                    for i in range(0, len(awards), args.batch_size)
+                ]
+            else:
+                path = "/legacy/xp/award" if mode == "read-modify-write" else "/xp/award"
+                requests = [("POST", path, {"params": {"user_id": user_id, "action": ACTION}}) for user_id in awards]
+
+            elapsed, failures = await fire(client, requests, args.concurrency)
+            total = (await users.aggregate([{"$group": {"_id": None, "xp": {"$sum": "$xp"}}}]).to_list(None))[0]["xp"]
+            lost = args.awards * xp_amount - total
+            if mode != "read-modify-write":
+                lost_any |= lost != 0 or failures != 0
+            print(f"{mode:>18} {args.awards:>7} {args.awards / elapsed:>9.1f} {failures:>7} {lost:>8}")
+
+    await mongo.drop_database(BENCH_DB)
+    mongo.close()
+    return lost_any
+
+
+def main(args):
+    if asyncio.run(run(args)):
+        print("❌ XP was lost or awards failed with atomic updates")
+        sys.exit(1)
+    print("✅ No XP lost with atomic and bulk awards")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--uri", default="mongodb://localhost:27017")
+    parser.add_argument("--awards", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=20, help="few users, so awards collide")
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=500, help="events per /xp/award/bulk request")
+    main(parser.parse_args())
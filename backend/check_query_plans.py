@@ -0,0 +1,132 @@
+import argparse
+import os
+import sys
+from bson import ObjectId
+
+# Runs each hot endpoint query through explain() and exits non-zero if any winning plan
+# contains a COLLSCAN, i.e. a query that reads the whole collection instead of using
+# one of the indexes in db_indexes.py. Plans are read-only (queryPlanner verbosity).
+#
+#   python check_query_plans.py                       # MONGO_URI / MONGO_DB_NAME
+#   python check_query_plans.py --ensure              # create the indexes first
+#   python check_query_plans.py --uri mongodb://localhost:27017 --db scratch --ensure
+
+SAMPLE_USER_ID = "000000000000000000000000"
+
+# (endpoint, collection, explain command body) - keep in step with the route code
+HOT_QUERIES = [
+    ("GET /mood_history", "moods", {
+        "find": "moods",
+        "filter": {"user_id": SAMPLE_USER_ID},
+        "projection": {"_id": 0, "timestamp": 1, "mood": 1},
+        "sort": {"timestamp": -1},
+    }),
+    ("GET /journal", "journals", {
+        "find": "journals",
+        "filter": {"user_id": SAMPLE_USER_ID},
+        "projection": {"_id": 0},
+    }),
+    ("POST /signup, /login", "users", {
+        "find": "users",
+        "filter": {"email": "someone@example.com"},
+        "limit": 1,
+    }),
+    ("GET /therapists", "users", {
+        "find": "users",
+        "filter": {"role": "therapist"},
+    }),
+    ("GET /patients", "users", {
+        "find": "users",
+        "filter": {"role": "user"},
+    }),
+    ("GET /leaderboard", "users", {
+        "aggregate": "users",
+        "pipeline": [
+            {"$match": {"leaderboard_opt_out": {"$ne": True}}},
+            {"$sort": {"xp": -1}},
+            {"$limit": 10},
+            {"$project": {"name": 1, "xp": 1, "level": 1, "badges": 1}},
+        ],
+        "cursor": {},
+    }),
+    ("GET /leaderboard (rank)", "users", {
+        # count_documents runs as this aggregation
+        "aggregate": "users",
+        "pipeline": [
+            {"$match": {"xp": {"$gt": 100}, "leaderboard_opt_out": {"$ne": True}}},
+            {"$group": {"_id": 1, "n": {"$sum": 1}}},
+        ],
+        "cursor": {},
+    }),
+    ("GET /badges/{user_id}", "users", {
+        "find": "users",
+        "filter": {"_id": ObjectId(SAMPLE_USER_ID)},
+        "limit": 1,
+    }),
+    ("GET /appointments/therapist/{id}", "appointments", {
+        "find": "appointments",
+        "filter": {"therapist_id": SAMPLE_USER_ID},
+    }),
+    ("GET /appointments/patient/{id}", "appointments", {
+        "find": "appointments",
+        "filter": {"patient_id": SAMPLE_USER_ID},
+    }),
+]
+
+
+def winning_stages(explain):
+    # Every stage name in the winning plan(s), wherever the server version nests them
+    stages = []
+
+    def walk(node, in_winning):
+        if isinstance(node, dict):
+            if in_winning and "stage" in node:
+                stages.append(node["stage"])
+            for key, value in node.items():
+                if key == "rejectedPlans":
+                    continue
+                walk(value, in_winning or key == "winningPlan")
+        elif isinstance(node, list):
+            for item in node:
+                walk(item, in_winning)
+
+    walk(explain, False)
+    return stages
+
+
+def check(db):
+    failures = 0
+    print(f"{'endpoint':>32} {'collection':>12}  plan")
+    for endpoint, collection, command in HOT_QUERIES:
+        explain = db.command({"explain": command, "verbosity": "queryPlanner"})
+        stages = winning_stages(explain)
+        # EOF alone: the collection doesn't exist yet, so nothing can be verified
+        failed = "COLLSCAN" in stages or stages == ["EOF"]
+        failures += failed
+        print(f"{'❌' if failed else '✅'} {endpoint:>30} {collection:>12}  {' <- '.join(stages) or '?'}")
+    return failures
+
+
+def main(args):
+    if args.uri:
+        os.environ["MONGO_URI"] = args.uri
+    if args.db:
+        os.environ["MONGO_DB_NAME"] = args.db
+    from database import db
+    from db_indexes import ensure_indexes
+
+    if args.ensure:
+        ensure_indexes(db)
+    failures = check(db)
+    if failures:
+        print(f"❌ {failures} hot queries scan a whole collection (or the collection is missing)")
+        sys.exit(1)
+    print("✅ Every hot query uses an index")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--uri", help="defaults to MONGO_URI")
+    parser.add_argument("--db", help="defaults to MONGO_DB_NAME")
+    parser.add_argument("--ensure", action="store_true", help="create the indexes from db_indexes.py first")
+    main(parser.parse_args())
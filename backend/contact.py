@@ -1,5 +1,6 @@
 from fastapi import APIRouter, HTTPException
-from database import messages_collection
+from starlette.concurrency import run_in_threadpool
+from database import async_messages_collection as messages_collection
 from dotenv import load_dotenv
 import os
 import smtplib
@@ -18,7 +19,7 @@ therapist_emails = {
 @router.post("/contact-professional")
 async def contact_professional(data: ContactRequest):
     # Store in MongoDB
-    messages_collection.insert_one(data.model_dump())
+    await messages_collection.insert_one(data.model_dump())
 
     # Send Email
     therapist_email = therapist_emails.get(data.therapistId)
@@ -35,10 +36,14 @@ async def contact_professional(data: ContactRequest):
     {data.message}
     """)
 
-    try:
+    def send():
         with smtplib.SMTP_SSL("smtp.gmail.com", 465) as smtp:
             smtp.login(os.getenv("SMTP_USERNAME"), os.getenv("SMTP_PASSWORD"))
             smtp.send_message(msg)
+
+    try:
+        # smtplib blocks; run it in the threadpool so the event loop keeps serving
+        await run_in_threadpool(send)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Email send failed: {str(e)}")
 
@@ -1,16 +1,58 @@
 from pymongo import MongoClient
+from motor.motor_asyncio import AsyncIOMotorClient
 from dotenv import load_dotenv
 import os   
 
 
 load_dotenv()
 
+MONGO_URI = os.getenv("MONGO_URI")
+MONGO_DB_NAME = os.getenv("MONGO_DB_NAME", "mental_health")
+
+
+def _pool_options():
+    # Connection pool / timeout settings shared by the sync and async clients
+    options = {
+        "maxPoolSize": int(os.getenv("MONGO_MAX_POOL_SIZE", "100")),
+        "minPoolSize": int(os.getenv("MONGO_MIN_POOL_SIZE", "0")),
+        "serverSelectionTimeoutMS": int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000")),
+        "connectTimeoutMS": int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "10000")),
+    }
+    # Unset means no limit
+    for name, env in (("socketTimeoutMS", "MONGO_SOCKET_TIMEOUT_MS"),
+                      ("waitQueueTimeoutMS", "MONGO_WAIT_QUEUE_TIMEOUT_MS"),
+                      ("maxIdleTimeMS", "MONGO_MAX_IDLE_TIME_MS")):
+        if os.getenv(env):
+            options[name] = int(os.getenv(env))
+    return options
+
+
+MONGO_POOL_OPTIONS = _pool_options()
+
 # MongoDB setup
-client = MongoClient(os.getenv("MONGO_URI"))
-db = client["mental_health"]
+# Sync client, for plain `def` routes (FastAPI runs those in its threadpool)
+client = MongoClient(MONGO_URI, **MONGO_POOL_OPTIONS)
+db = client[MONGO_DB_NAME]
 moods_collection = db["moods"]
 users_collection = db["users"]
 journals_collection = db["journals"]
 messages_collection = db["messages"]
 appointment_collection = db["appointments"]
-therapist_collection = db["therapist"]
\ No newline at end of file
+therapist_collection = db["therapist"]
+
+# Async (Motor) client, for `async def` routes: queries are awaited instead of blocking
+# the event loop. Motor binds to the running loop on first use, so creating it at
+# import time is fine.
+async_client = AsyncIOMotorClient(MONGO_URI, **MONGO_POOL_OPTIONS)
+async_db = async_client[MONGO_DB_NAME]
+async_moods_collection = async_db["moods"]
+async_users_collection = async_db["users"]
+async_journals_collection = async_db["journals"]
+async_messages_collection = async_db["messages"]
+async_appointment_collection = async_db["appointments"]
+async_therapist_collection = async_db["therapist"]
+
+
+def close():
+    client.close()
+    async_client.close()
@@ -0,0 +1,60 @@
+import os
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import ConnectionFailure, PyMongoError
+
+# Indexes behind the hot queries, created idempotently at startup. create_indexes is a
+# no-op for an index that already exists with the same keys and name, so this is safe
+# to run on every boot; check_query_plans.py verifies the queries actually use them.
+
+# Set to 0 to leave index management to a migration / DBA
+MONGO_ENSURE_INDEXES = os.getenv("MONGO_ENSURE_INDEXES", "1") == "1"
+
+INDEXES = {
+    "moods": [
+        # /mood_history: one user's moods, newest first
+        IndexModel([("user_id", ASCENDING), ("timestamp", DESCENDING)], name="user_id_timestamp"),
+    ],
+    "journals": [
+        IndexModel([("user_id", ASCENDING)], name="user_id"),
+    ],
+    "users": [
+        # Signup / login lookups
+        IndexModel([("email", ASCENDING)], name="email"),
+        # /therapists, /patients
+        IndexModel([("role", ASCENDING)], name="role"),
+        # /leaderboard top-N and rank count; opt-out is filtered from the index keys
+        IndexModel([("xp", DESCENDING), ("leaderboard_opt_out", ASCENDING)], name="xp_leaderboard_opt_out"),
+    ],
+    "appointments": [
+        IndexModel([("therapist_id", ASCENDING)], name="therapist_id"),
+        IndexModel([("patient_id", ASCENDING)], name="patient_id"),
+    ],
+}
+
+
+def ensure_indexes(db):
+    # Sync (pymongo) database; returns {collection: [index names]}
+    created = {}
+    for collection, indexes in INDEXES.items():
+        try:
+            created[collection] = db[collection].create_indexes(indexes)
+        except ConnectionFailure as e:
+            print(f"⚠️ MongoDB unreachable, indexes not checked: {e}")
+            break
+        except PyMongoError as e:
+            print(f"⚠️ Could not create indexes on {collection}: {e}")
+    return created
+
+
+async def ensure_indexes_async(db):
+    # Same as ensure_indexes, on a Motor database (used from the startup hook)
+    created = {}
+    for collection, indexes in INDEXES.items():
+        try:
+            created[collection] = await db[collection].create_indexes(indexes)
+        except ConnectionFailure as e:
+            print(f"⚠️ MongoDB unreachable, indexes not checked: {e}")
+            break
+        except PyMongoError as e:
+            print(f"⚠️ Could not create indexes on {collection}: {e}")
+    return created
@@ -0,0 +1,99 @@
+import os
+import threading
+import time
+import cv2
+import numpy as np
+
+# Per-track emotion de-duplication and smoothing for the webcam stream. A face crop
+# that looks like the last one analyzed for the same track (small mean difference
+# between 16x16 grayscale thumbnails, brightness-normalized) skips inference; an
+# analysis is still forced every EMOTION_CACHE_MAX_AGE seconds. Results that do run
+# are smoothed per track with an EMA so single-frame flickers don't flip the label.
+
+EMOTION_CACHE_MAX_DIFF = float(os.getenv("EMOTION_CACHE_MAX_DIFF", "4.0"))
+EMOTION_CACHE_MAX_AGE = float(os.getenv("EMOTION_CACHE_MAX_AGE", "2.0"))
+EMOTION_SMOOTHING_ALPHA = float(os.getenv("EMOTION_SMOOTHING_ALPHA", "0.4"))
+
+SIGNATURE_SIZE = (16, 16)
+
+
+def crop_signature(face_roi):
+    # Tiny zero-mean grayscale thumbnail; cheap to compute and to compare
+    gray = cv2.cvtColor(face_roi, cv2.COLOR_BGR2GRAY)
+    thumb = cv2.resize(gray, SIGNATURE_SIZE, interpolation=cv2.INTER_AREA).astype(np.float32)
+    return thumb - thumb.mean()
+
+
+def similar(a, b, max_diff=EMOTION_CACHE_MAX_DIFF):
+    return float(np.abs(a - b).mean()) <= max_diff
+
+
+class EmotionCache:
+    def __init__(self, max_diff=EMOTION_CACHE_MAX_DIFF, max_age=EMOTION_CACHE_MAX_AGE, alpha=EMOTION_SMOOTHING_ALPHA):
+        self.max_diff = max_diff
+        self.max_age = max_age
+        self.alpha = alpha
+        # key -> (signature, analyzed at); track id -> smoothed emotions
+        self._analyzed = {}
+        self._smoothed = {}
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.hits = 0
+        self.inferences = 0
+
+    def should_analyze(self, key, face_roi, now=None):
+        # False when the crop is a near-duplicate of the last one analyzed under key
+        now = time.time() if now is None else now
+        signature = crop_signature(face_roi)
+        with self._lock:
+            self.lookups += 1
+            last = self._analyzed.get(key)
+            if last is not None and now - last[1] < self.max_age and similar(last[0], signature, self.max_diff):
+                self.hits += 1
+                return False
+            # Claimed now, so repeats of this crop are skipped while its inference is in flight
+            self._analyzed[key] = (signature, now)
+            return True
+
+    def claims(self, keys):
+        # Current claims for keys, to hand back to release() if their analysis never lands
+        with self._lock:
+            return {key: self._analyzed.get(key) for key in keys}
+
+    def release(self, claims):
+        # Forget claims that haven't been replaced since, so the next crop is analyzed
+        with self._lock:
+            for key, claim in claims.items():
+                if claim is not None and self._analyzed.get(key) is claim:
+                    del self._analyzed[key]
+
+    def smooth(self, track_id, emotions):
+        # EMA of the emotion vector per track; returns the smoothed reading
+        with self._lock:
+            self.inferences += 1
+            previous = self._smoothed.get(track_id)
+            if previous is None:
+                smoothed = dict(emotions)
+            else:
+                smoothed = {
+                    emotion: self.alpha * confidence + (1 - self.alpha) * previous.get(emotion, confidence)
+                    for emotion, confidence in emotions.items()
+                }
+            self._smoothed[track_id] = smoothed
+            return smoothed
+
+    def drop(self, track_ids):
+        with self._lock:
+            for track_id in track_ids:
+                self._smoothed.pop(track_id, None)
+                for key in [key for key in self._analyzed if key == track_id or (isinstance(key, tuple) and key[-1] == track_id)]:
+                    del self._analyzed[key]
+
+    def metrics(self):
+        return {
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "hit_rate": round(self.hits / self.lookups, 3) if self.lookups else 0.0,
+            "inferences": self.inferences,
+            "inferences_saved": self.hits,
+        }
@@ -0,0 +1,238 @@
+import bisect
+import json
+import os
+import threading
+import time
+
+# Append-only emotion event log: one JSON object per line, split into segment files
+# that rotate by size or age. Writers only append to an in-memory buffer; a background
+# thread flushes it, so recording a reading never rewrites history.
+
+EMOTION_LOG_DIR = os.getenv("EMOTION_LOG_DIR", "emotion_logs")
+LEGACY_LOG_PATH = "emotion_log.json"
+
+SEGMENT_MAX_BYTES = int(os.getenv("EMOTION_LOG_SEGMENT_MAX_BYTES", str(16 * 1024 * 1024)))
+SEGMENT_MAX_AGE = float(os.getenv("EMOTION_LOG_SEGMENT_MAX_AGE", str(24 * 3600)))
+MAX_SEGMENTS = int(os.getenv("EMOTION_LOG_MAX_SEGMENTS", "60"))
+FLUSH_INTERVAL = float(os.getenv("EMOTION_LOG_FLUSH_INTERVAL", "1.0"))
+
+# One timestamp index entry per this many records
+INDEX_STRIDE = 256
+
+SEGMENT_PREFIX = "emotion-"
+SEGMENT_SUFFIX = ".ndjson"
+
+
+def _segment_name(start_time):
+    # Names sort chronologically, so a directory listing is already in log order
+    return f"{SEGMENT_PREFIX}{int(start_time * 1000):015d}{SEGMENT_SUFFIX}"
+
+
+def segment_start_time(name):
+    return int(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]) / 1000.0
+
+
+def encode_cursor(position):
+    # Opaque to clients: "<segment start ms>.<byte offset of the next record>"
+    name, offset = position
+    return f"{name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]}.{offset}"
+
+
+def decode_cursor(cursor):
+    # Raises ValueError for anything encode_cursor didn't produce
+    start_ms, offset = cursor.split(".")
+    return _segment_name(int(start_ms) / 1000.0), int(offset)
+
+
+class EmotionEventLog:
+    def __init__(self, directory=EMOTION_LOG_DIR, segment_max_bytes=SEGMENT_MAX_BYTES,
+                 segment_max_age=SEGMENT_MAX_AGE, max_segments=MAX_SEGMENTS, flush_interval=FLUSH_INTERVAL):
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        self.segment_max_age = segment_max_age
+        self.max_segments = max_segments
+        self.flush_interval = flush_interval
+
+        self._pending = []
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread = None
+
+        # segment -> (sparse [(ts, offset)] entries, bytes indexed, records indexed)
+        self._index = {}
+        self._index_lock = threading.Lock()
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._active = None
+        self._active_size = 0
+        segments = self.segments()
+        if segments:
+            self._active = segments[-1]
+            self._active_size = os.path.getsize(self._path(self._active))
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def segments(self):
+        return sorted(
+            name for name in os.listdir(self.directory)
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX)
+        )
+
+    def append(self, record):
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self._lock:
+            self._pending.append((record.get("ts", time.time()), line))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._flush_loop, daemon=True, name="emotion-log-writer")
+                self._thread.start()
+
+    def _flush_loop(self):
+        while not self._stopped:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"⚠️ Emotion log flush error: {e}")
+
+    def _should_rotate(self, now):
+        if self._active is None:
+            return True
+        if self._active_size >= self.segment_max_bytes:
+            return True
+        return now - segment_start_time(self._active) >= self.segment_max_age
+
+    def _rotate(self, start_time):
+        name = _segment_name(start_time)
+        if name == self._active:
+            return
+        self._active = name
+        self._active_size = 0
+
+        # Retention: drop the oldest segments beyond the limit
+        segments = self.segments()
+        for old in segments[:max(0, len(segments) + 1 - self.max_segments)]:
+            os.remove(self._path(old))
+            with self._index_lock:
+                self._index.pop(old, None)
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return
+
+        with self._write_lock:
+            # Segments are named after their first record, so a name bounds every timestamp in it
+            first_ts = pending[0][0]
+            if self._should_rotate(time.time()):
+                self._rotate(first_ts)
+            data = "".join(line for _, line in pending).encode("utf-8")
+            with open(self._path(self._active), "ab") as f:
+                f.write(data)
+            self._active_size += len(data)
+
+    def close(self):
+        self._stopped = True
+        self._wake.set()
+        self.flush()
+
+    def _segments_since(self, segments, since):
+        # Skip segments that end (i.e. the next one starts) before since
+        first = 0
+        while first + 1 < len(segments) and segment_start_time(segments[first + 1]) <= since:
+            first += 1
+        return segments[first:]
+
+    def segment_index(self, name):
+        # Sparse (ts, offset) index with one entry every INDEX_STRIDE records. It is
+        # extended incrementally, so only bytes appended since the last lookup are scanned.
+        with self._index_lock:
+            entries, indexed_size, count = self._index.get(name, ([], 0, 0))
+            path = self._path(name)
+            if indexed_size < os.path.getsize(path):
+                with open(path, "rb") as f:
+                    f.seek(indexed_size)
+                    for line in f:
+                        if not line.endswith(b"\n"):
+                            break
+                        if count % INDEX_STRIDE == 0 and line.strip():
+                            entries.append((json.loads(line).get("ts", 0.0), indexed_size))
+                        count += 1
+                        indexed_size += len(line)
+                self._index[name] = (entries, indexed_size, count)
+            return entries
+
+    def read_range(self, since=None, until=None, position=None):
+        # Yields (record, position of the next record) in log order, starting at a
+        # decoded cursor position or at the first record with ts >= since
+        self.flush()
+        segments = self.segments()
+        start_offset = 0
+
+        if position is not None:
+            name, offset = position
+            segments = [segment for segment in segments if segment >= name]
+            if segments and segments[0] == name:
+                start_offset = offset
+        elif since is not None:
+            segments = self._segments_since(segments, since)
+            if segments:
+                entries = self.segment_index(segments[0])
+                i = bisect.bisect_left(entries, (since,)) - 1
+                start_offset = entries[i][1] if i >= 0 else 0
+
+        for name in segments:
+            if until is not None and segment_start_time(name) > until:
+                return
+            try:
+                with open(self._path(name), "rb") as f:
+                    f.seek(start_offset)
+                    offset = start_offset
+                    for line in f:
+                        # A line without its newline is still being written
+                        if not line.endswith(b"\n"):
+                            break
+                        offset += len(line)
+                        if not line.strip():
+                            continue
+                        record = json.loads(line)
+                        ts = record.get("ts", 0.0)
+                        if since is not None and ts < since:
+                            continue
+                        if until is not None and ts > until:
+                            return
+                        yield record, (name, offset)
+            except FileNotFoundError:
+                # Removed by retention while we were reading
+                pass
+            start_offset = 0
+
+    def iter_records(self, since=None):
+        # Oldest first; flush first so readers see everything recorded so far
+        for record, _ in self.read_range(since=since):
+            yield record
+
+    def import_legacy(self, path=LEGACY_LOG_PATH):
+        # One-off migration of the old rewrite-the-whole-file JSON log
+        if self.segments() or not os.path.exists(path):
+            return 0
+        try:
+            with open(path, "r") as f:
+                legacy = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return 0
+
+        for entry in legacy:
+            record = dict(entry)
+            if "ts" not in record:
+                try:
+                    record["ts"] = time.mktime(time.strptime(record["timestamp"], "%Y-%m-%d %H:%M:%S"))
+                except (KeyError, ValueError):
+                    record["ts"] = 0.0
+            self.append(record)
+        self.flush()
+        return len(legacy)
@@ -0,0 +1,67 @@
+import json
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from emotion_store import iter_history, history_page, compute_average_emotions, AVERAGE_WINDOWS, HISTORY_PAGE_SIZE, HISTORY_MAX_PAGE_SIZE
+from emotion_log import decode_cursor
+
+# Emotion history and averages. They only read the emotion store, not the vision
+# stack, so they are mounted in every APP_PROFILE, including core.
+
+router = APIRouter()
+
+
+def _parse_time(value):
+    # Epoch seconds or an ISO 8601 datetime
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid time: {value}")
+
+
+def _stream_history(since, until, cursor, limit):
+    # NDJSON, one record per line; a final {"next_cursor": ...} line if the limit cut it short
+    for i, (record, next_cursor) in enumerate(iter_history(since, until, cursor)):
+        if limit is not None and i == limit:
+            yield json.dumps({"next_cursor": previous_cursor}) + "\n"
+            return
+        yield json.dumps(record) + "\n"
+        previous_cursor = next_cursor
+
+
+@router.get("/emotion_history")
+def get_emotion_history(
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    format: str = "json",
+):
+    since_ts, until_ts = _parse_time(since), _parse_time(until)
+    if cursor:
+        try:
+            decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if format == "ndjson":
+        # Streamed straight from the log, so memory stays flat however much history matches
+        return StreamingResponse(_stream_history(since_ts, until_ts, cursor, limit), media_type="application/x-ndjson")
+    if format != "json":
+        raise HTTPException(status_code=400, detail="format must be json or ndjson")
+
+    page, next_cursor = history_page(since_ts, until_ts, cursor, min(limit or HISTORY_PAGE_SIZE, HISTORY_MAX_PAGE_SIZE))
+    return {"history": page, "next_cursor": next_cursor}
+
+@router.get("/average_emotions")
+def get_average_emotions(window: str = "all"):
+    if window not in AVERAGE_WINDOWS:
+        raise HTTPException(status_code=400, detail=f"window must be one of {AVERAGE_WINDOWS}")
+    return {"average_emotions": compute_average_emotions(window), "window": window}
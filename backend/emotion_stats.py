@@ -0,0 +1,127 @@
+import json
+import os
+import threading
+import time
+
+# Running emotion aggregates, updated as each reading is recorded so averages are
+# O(1) in the size of the history. All-time sums/counts plus bucketed counters for
+# recent windows; a snapshot is persisted so restarts don't need a full log replay.
+
+# window name -> (window length in seconds, bucket width in seconds)
+WINDOWS = {
+    "minute": (60, 1),
+    "hour": (3600, 60),
+    "day": (86400, 900),
+}
+
+SNAPSHOT_INTERVAL = float(os.getenv("EMOTION_STATS_SNAPSHOT_INTERVAL", "30"))
+
+
+def _add(sums, counts, emotions):
+    for emotion, confidence in emotions.items():
+        sums[emotion] = sums.get(emotion, 0.0) + confidence
+        counts[emotion] = counts.get(emotion, 0) + 1
+
+
+def _averages(sums, counts):
+    return {emotion: round(sums[emotion] / counts[emotion], 2) for emotion in sums if counts.get(emotion)}
+
+
+class EmotionAggregates:
+    def __init__(self, snapshot_path, snapshot_interval=SNAPSHOT_INTERVAL):
+        self.snapshot_path = snapshot_path
+        self.snapshot_interval = snapshot_interval
+        self._lock = threading.Lock()
+        self._last_saved = 0.0
+        self._reset()
+
+    def _reset(self):
+        self.sums = {}
+        self.counts = {}
+        self.last_ts = 0.0
+        # window -> {bucket index: [sums, counts]}; only the buckets inside the window are kept
+        self.buckets = {name: {} for name in WINDOWS}
+
+    def update(self, emotions, ts, persist=True):
+        with self._lock:
+            _add(self.sums, self.counts, emotions)
+            self.last_ts = max(self.last_ts, ts)
+
+            for name, (length, width) in WINDOWS.items():
+                buckets = self.buckets[name]
+                index = int(ts // width)
+                if index not in buckets:
+                    buckets[index] = [{}, {}]
+                    self._expire(name, index)
+                _add(buckets[index][0], buckets[index][1], emotions)
+
+        if persist and ts - self._last_saved >= self.snapshot_interval:
+            self.save()
+
+    def _expire(self, name, newest_index):
+        length, width = WINDOWS[name]
+        oldest = newest_index - length // width
+        buckets = self.buckets[name]
+        for index in [i for i in buckets if i <= oldest]:
+            del buckets[index]
+
+    def averages(self, window="all", now=None):
+        with self._lock:
+            if window == "all":
+                return _averages(self.sums, self.counts)
+
+            length, width = WINDOWS[window]
+            oldest = int((now if now is not None else time.time()) // width) - length // width
+            sums, counts = {}, {}
+            for index, (bucket_sums, bucket_counts) in self.buckets[window].items():
+                if index > oldest:
+                    for emotion, total in bucket_sums.items():
+                        sums[emotion] = sums.get(emotion, 0.0) + total
+                        counts[emotion] = counts.get(emotion, 0) + bucket_counts[emotion]
+            return _averages(sums, counts)
+
+    def save(self):
+        with self._lock:
+            snapshot = json.dumps({
+                "sums": self.sums,
+                "counts": self.counts,
+                "last_ts": self.last_ts,
+                "buckets": {name: {str(i): b for i, b in buckets.items()} for name, buckets in self.buckets.items()},
+            })
+            self._last_saved = self.last_ts
+
+            # Write-then-rename so a crash never leaves a half-written snapshot
+            tmp_path = self.snapshot_path + ".tmp"
+            with open(tmp_path, "w") as f:
+                f.write(snapshot)
+            os.replace(tmp_path, self.snapshot_path)
+
+    def load(self):
+        try:
+            with open(self.snapshot_path, "r") as f:
+                snapshot = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return False
+
+        with self._lock:
+            self.sums = snapshot["sums"]
+            self.counts = snapshot["counts"]
+            self.last_ts = snapshot["last_ts"]
+            self.buckets = {
+                name: {int(i): b for i, b in snapshot["buckets"].get(name, {}).items()}
+                for name in WINDOWS
+            }
+            self._last_saved = self.last_ts
+        return True
+
+    def restore(self, event_log):
+        # Load the snapshot, then replay only what was logged after it
+        since = self.last_ts if self.load() else None
+        replayed = 0
+        for record in event_log.iter_records(since=since):
+            if since is None or record.get("ts", 0.0) > since:
+                self.update(record["emotions"], record.get("ts", 0.0), persist=False)
+                replayed += 1
+        if replayed:
+            self.save()
+        return replayed
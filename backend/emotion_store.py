@@ -0,0 +1,120 @@
+import os
+import threading
+import time
+from collections import deque
+from itertools import islice
+from emotion_log import EmotionEventLog, encode_cursor, decode_cursor
+from emotion_stats import EmotionAggregates, WINDOWS
+
+# Emotion state and log shared by the vision pipeline and the read-only emotion routes.
+# Kept free of cv2/TensorFlow imports so core API workers can serve history and averages.
+
+# Number of recent readings kept in memory
+RECENT_LOG_SIZE = int(os.getenv("EMOTION_RECENT_LOG_SIZE", "1000"))
+
+# Session used when a reading isn't tied to a particular stream
+DEFAULT_SESSION = "camera:0"
+
+# Readings older than this (seconds) are no longer reported as a face's current emotion
+EMOTION_MAX_AGE = float(os.getenv("EMOTION_MAX_AGE", "3.0"))
+
+# Store (emotions, time) per session and face in a thread-safe dictionary; "log" is a bounded ring of recent readings
+emotion_data = {"sessions": {}, "log": deque(maxlen=RECENT_LOG_SIZE), "lock": threading.Lock()}
+
+# Durable, append-only history of every reading
+event_log = EmotionEventLog()
+event_log.import_legacy()
+
+# Running averages, restored from their snapshot plus whatever was logged after it
+aggregates = EmotionAggregates(os.path.join(event_log.directory, "aggregates.json"))
+aggregates.restore(event_log)
+
+AVERAGE_WINDOWS = ["all", *WINDOWS]
+
+
+def record_emotions(session_id, face_id, emotions, current_time):
+    timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(current_time))  # Format timestamp
+    record = {"ts": current_time, "timestamp": timestamp, "session": session_id, "emotions": emotions}
+
+    with emotion_data["lock"]:
+        emotion_data["last_update"] = current_time
+
+        # Store emotions and timestamp
+        emotion_data["sessions"].setdefault(session_id, {})[face_id] = (emotions, current_time)
+        emotion_data["log"].append(record)
+
+    # Buffered append; flushed to disk by the log's writer thread
+    event_log.append(record)
+    aggregates.update(emotions, current_time)
+
+    # Print emotions with timestamp
+    print(f"🕒 {timestamp} - Emotions: {emotions}")
+
+
+def current_emotions(session_id=DEFAULT_SESSION, face_id=0, max_age=EMOTION_MAX_AGE):
+    with emotion_data["lock"]:
+        emotions, updated_at = emotion_data["sessions"].get(session_id, {}).get(face_id, ({}, 0.0))
+    return emotions if time.time() - updated_at <= max_age else {}
+
+
+def session_faces(session_id, max_age=EMOTION_MAX_AGE):
+    # Every face's emotions in a session, leaving out readings older than max_age
+    now = time.time()
+    with emotion_data["lock"]:
+        faces = dict(emotion_data["sessions"].get(session_id, {}))
+    return {face_id: emotions for face_id, (emotions, updated_at) in faces.items() if now - updated_at <= max_age}
+
+
+def drop_faces(session_id, face_ids):
+    # Forget faces whose tracks ended
+    with emotion_data["lock"]:
+        faces = emotion_data["sessions"].get(session_id, {})
+        for face_id in face_ids:
+            faces.pop(face_id, None)
+
+
+def clear_session(session_id):
+    with emotion_data["lock"]:
+        emotion_data["sessions"].pop(session_id, None)
+
+
+# Default and maximum page size for /emotion_history
+HISTORY_PAGE_SIZE = 100
+HISTORY_MAX_PAGE_SIZE = 1000
+
+
+def iter_history(since=None, until=None, cursor=None):
+    # (record, cursor after it) pairs, read lazily from the log
+    position = decode_cursor(cursor) if cursor else None
+    for record, next_position in event_log.read_range(since=since, until=until, position=position):
+        yield record, encode_cursor(next_position)
+
+
+def history_page(since=None, until=None, cursor=None, limit=HISTORY_PAGE_SIZE):
+    # One page plus the cursor to continue from (None once the range is exhausted)
+    rows = list(islice(iter_history(since, until, cursor), limit + 1))
+    next_cursor = rows[limit - 1][1] if len(rows) > limit else None
+    return [record for record, _ in rows[:limit]], next_cursor
+
+
+# Function to compute average emotions
+def compute_average_emotions(window="all"):
+    try:
+        average_emotions = aggregates.averages(window)
+
+        if average_emotions:
+            print("\n📊 **Average Detected Emotions:**")
+            for emotion, avg_confidence in average_emotions.items():
+                print(f"  {emotion.upper()}: {avg_confidence}%")
+            return average_emotions
+        else:
+            print("⚠️ No emotion data recorded.")
+            return {}
+    except Exception as e:
+        print(f"Error computing average emotions: {e}")
+        return {}
+
+
+def close():
+    event_log.close()
+    aggregates.save()
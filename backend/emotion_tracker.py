@@ -1,34 +1,29 @@
-import json
-import cv2
-import numpy as np
-import threading
-import time
-import mediapipe as mp
-import dlib
 import warnings
 import os
-import io
 import bcrypt
-from PIL import Image
-from collections import Counter
-from deepface import DeepFace
-from concurrent.futures import ThreadPoolExecutor
-from scipy.spatial import distance as dist
 from datetime import datetime, timezone
-from typing import Dict
 from database import *
+from database import close as close_database
+from db_indexes import MONGO_ENSURE_INDEXES, ensure_indexes_async
+from badge_engine import record_event
+from user_cache import user_cache, get_user, aget_user, invalidate_user, ainvalidate_user, THERAPIST_LIST, PATIENT_LIST
 from apimodels import *
 # FastAPI imports
-from fastapi import FastAPI, HTTPException, File, UploadFile, Depends
+from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from starlette.concurrency import run_in_threadpool
 from fastapi import APIRouter, HTTPException, Depends
 from notifs import router as notifs_router
 from contact import router as contact_router
 from live import router as livekit_router
 from therapists import router as therapist_router
 from appointments import router as appointment_router
+from gamify import router as gamify_router
+from model_registry import registry, router as registry_router
+from vision_routes import router as vision_router, preload_vision, shutdown_vision
+from emotion_routes import router as emotion_router
+from emotion_store import compute_average_emotions, close as close_emotion_store
 from bson.objectid import ObjectId
 
 
@@ -38,6 +33,11 @@ from JWTAuth import *
 # Suppress Warnings
 warnings.filterwarnings("ignore")
 
+# Deployment profile: "all" serves every route, "core" leaves out the vision routes
+# so the worker never imports cv2/mediapipe/TensorFlow
+APP_PROFILE = os.getenv("APP_PROFILE", "all")
+VISION_ENABLED = APP_PROFILE != "core"
+
 # Initialize FastAPI Application
 app = FastAPI()
 
@@ -52,59 +52,6 @@ app.add_middleware(
 
 router = APIRouter()
 
-# Initialize Mediapipe Modules
-mp_face_detection = mp.solutions.face_detection
-mp_face_mesh = mp.solutions.face_mesh
-mp_pose = mp.solutions.pose
-mp_hands = mp.solutions.hands
-
-face_detection = mp_face_detection.FaceDetection(min_detection_confidence=0.2)
-face_mesh = mp_face_mesh.FaceMesh(max_num_faces=5, min_detection_confidence=0.6)
-pose = mp_pose.Pose(min_detection_confidence=0.6, min_tracking_confidence=0.6)
-hands = mp_hands.Hands(min_detection_confidence=0.6, min_tracking_confidence=0.6)
-
-# OpenCV Haar Cascade (Backup)
-face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_alt2.xml")
-
-# Dlib for High Precision Face Landmark Detection
-DLIB_LANDMARK_PATH = "models/shape_predictor_68_face_landmarks.dat"
-try:
-    dlib_detector = dlib.get_frontal_face_detector()
-    dlib_predictor = dlib.shape_predictor(DLIB_LANDMARK_PATH)
-except Exception as e:
-    print(f"⚠️ Dlib Error: {e}")
-    dlib_detector = None
-    dlib_predictor = None
-
-# Store emotions per face in a thread-safe dictionary
-emotion_data = {"faces": {}, "lock": threading.Lock()}
-last_known_faces = []  # Stores last detected faces
-
-# If No Faces Are Detected, Keep Last Known Faces for a While
-NO_FACE_LIMIT = 30  # Number of frames to retain last known faces
-
-# Thread Pool for Emotion Analysis
-executor = ThreadPoolExecutor(max_workers=4)
-
-# Gaze Tracking Variables
-EYE_AR_THRESH = 0.30  # Eye aspect ratio threshold for gaze detection
-
-# Colors for different landmarks
-COLORS = {
-    "eyes": (0, 255, 255),
-    "mouth": (255, 0, 0),
-    "face": (0, 255, 0),
-    "hands": (0, 0, 255),
-    "body": (255, 255, 0)
-}
-
-# Create emotion log file if it doesn't exist
-if not os.path.exists("emotion_log.json"):
-    with open("emotion_log.json", "w") as f:
-        json.dump([], f)
-
-
-
 from fastapi import HTTPException
 
 @app.put("/update_profile")
@@ -125,6 +72,7 @@ def update_profile(data: dict):
         {"_id": ObjectId(user_id)},
         {"$set": update_fields}
     )
+    invalidate_user(user_id)
 
     if result.modified_count == 1:
         return {"message": "Profile updated successfully"}
@@ -146,6 +94,7 @@ def save_journal(entry: JournalEntry, credentials: HTTPAuthorizationCredentials
         "text": entry.text,
         "timestamp": datetime.utcnow()
     })
+    record_event(user_id, "journals")
     return {"message": "Journal entry saved"}
 
 @app.get("/journal")
@@ -168,376 +117,11 @@ def verify_token(credentials: HTTPAuthorizationCredentials):
     except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
-# Emotion Analysis Functions
-def analyze_emotion(face_id, face_roi):
-    current_time = time.time()
-
-    with emotion_data["lock"]:
-        # Ensure log list exists
-        if "log" not in emotion_data:
-            emotion_data["log"] = []
-
-        emotion_data["last_update"] = current_time
-
-    try:
-        resized_face = cv2.resize(face_roi, (224, 224))
-        emotion_result = DeepFace.analyze(resized_face, actions=['emotion'], enforce_detection=False, detector_backend='opencv')
-
-        with emotion_data["lock"]:
-            emotions = emotion_result[0]['emotion']
-            timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(current_time))  # Format timestamp
-
-            # Store emotions and timestamp
-            emotion_data["faces"][face_id] = emotions
-            emotion_data["log"].append({"timestamp": timestamp, "emotions": emotions})
-
-            # Print emotions with timestamp
-            print(f"🕒 {timestamp} - Emotions: {emotions}")
-
-        # Save to JSON file (thread-safe)
-        with emotion_data["lock"]:
-            with open("emotion_log.json", "w") as f:
-                json.dump(emotion_data["log"], f, indent=4)
-
-    except Exception as e:
-        print(f"⚠️ Emotion detection error: {e}")
-
-def analyze_emotion_ensemble(face_roi):
-    models = ["VGG-Face", "ResNet50", "EfficientNetB0"]  # Using better models
-    predictions = []
-    
-    try:
-        # Convert face ROI to grayscale and resize
-        face_roi = cv2.resize(face_roi, (224, 224))  # Correct for VGG-Face, ResNet, etc.
-        face_roi = cv2.cvtColor(face_roi, cv2.COLOR_BGR2RGB)  # Convert to RGB
-        # face_roi = np.stack((face_roi,) * 3, axis=-1)  # Convert back to 3 channels
-        print(f"Shape before analyze: {face_roi.shape}")
-
-        for model in models:
-            result = DeepFace.analyze(face_roi, actions=["emotion"], enforce_detection=False, detector_backend="opencv")
-
-            if result and len(result) > 0:
-                dominant_emotion = result[0]["dominant_emotion"]
-                predictions.append(dominant_emotion)
-
-        # Get most frequent emotion from models
-        if predictions:
-            most_common = Counter(predictions).most_common(1)
-            if most_common:
-                most_common_emotion, count = most_common[0]
-                return most_common_emotion
-            else:
-                return "Neutral"
-        else:
-            return "Neutral"
-
-
-    except Exception as e:
-        print(f"⚠ Error analyzing emotion: {e}")
-        return "Neutral"
-
-def analyze_multiple_frames(frame_list):
-    emotions_list = []
-
-    for frame in frame_list:
-        try:
-            # Get face ROI from frame
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = face_detection.process(rgb_frame)
-            face_bboxes = []
-
-            if results.detections:
-                for detection in results.detections:
-                    bboxC = detection.location_data.relative_bounding_box
-                    h, w, _ = frame.shape
-                    x, y, w_box, h_box = int(bboxC.xmin * w), int(bboxC.ymin * h), int(bboxC.width * w), int(bboxC.height * h)
-                    face_bboxes.append((x, y, w_box, h_box))
-                    break  # Only process the first detected face
-
-            # If MediaPipe fails, use Haar Cascade
-            if not face_bboxes:
-                gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-                face_bboxes = face_cascade.detectMultiScale(gray_frame, scaleFactor=1.1, minNeighbors=4, minSize=(50, 50))
-
-            if face_bboxes:
-                x, y, w_box, h_box = face_bboxes[0]
-                face_roi = frame[y:y + h_box, x:x + w_box]
-                if face_roi.size > 0:
-                    dominant_emotion = analyze_emotion_ensemble(face_roi)
-                    emotions_list.append(dominant_emotion)
-        except Exception as e:
-            print(f"⚠ Error analyzing frame: {e}")
-            continue
-
-    # Get most frequent emotion from frames
-    if emotions_list:
-        most_common = Counter(emotions_list).most_common(1)
-        print(f"Most common result: {most_common}")
-        
-        if most_common: 
-            most_common_emotion, count = most_common[0]
-            print(f"Unpacked Emotion: {most_common_emotion}, Count: {count}")
-            return most_common_emotion
-        else:
-            return "Neutral"
-    else:
-        return "Neutral"
-    
-# Gaze Tracking Functions
-def eye_aspect_ratio(eye):
-    # Compute the Euclidean distances between the two sets of vertical eye landmarks
-    A = dist.euclidean(eye[1], eye[5])
-    B = dist.euclidean(eye[2], eye[4])
-    # Compute the Euclidean distance between the horizontal eye landmarks
-    C = dist.euclidean(eye[0], eye[3])
-    # Compute the eye aspect ratio
-    ear = (A + B) / (2.0 * C)
-    return ear
-
-def draw_gaze(frame, mesh_results):
-    if mesh_results.multi_face_landmarks:
-        for face_landmarks in mesh_results.multi_face_landmarks:
-            landmarks = face_landmarks.landmark
-            # Extract left and right eye landmarks
-            left_eye = [(landmarks[33].x, landmarks[33].y), (landmarks[160].x, landmarks[160].y),
-                        (landmarks[158].x, landmarks[158].y), (landmarks[133].x, landmarks[133].y),
-                        (landmarks[153].x, landmarks[153].y), (landmarks[144].x, landmarks[144].y)]
-            right_eye = [(landmarks[362].x, landmarks[362].y), (landmarks[385].x, landmarks[385].y),
-                         (landmarks[387].x, landmarks[387].y), (landmarks[263].x, landmarks[263].y),
-                         (landmarks[373].x, landmarks[373].y), (landmarks[380].x, landmarks[380].y)]
-            # Convert to pixel coordinates
-            left_eye = [(int(l[0] * frame.shape[1]), int(l[1] * frame.shape[0])) for l in left_eye]
-            right_eye = [(int(r[0] * frame.shape[1]), int(r[1] * frame.shape[0])) for r in right_eye]
-            # Draw eyes
-            for (x, y) in left_eye + right_eye:
-                cv2.circle(frame, (x, y), 2, COLORS["eyes"], -1)
-            # Calculate eye aspect ratio
-            left_ear = eye_aspect_ratio(left_eye)
-            right_ear = eye_aspect_ratio(right_eye)
-            ear = (left_ear + right_ear) / 2.0
-            # Display gaze direction
-            if ear < EYE_AR_THRESH:
-                cv2.putText(frame, "Looking forward", (10, 100), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-            else:
-                cv2.putText(frame, "Looking away", (10, 100), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
-
-# Visualization Functions
-def draw_face_mesh(frame, mesh_results):
-    if mesh_results.multi_face_landmarks:
-        for face_landmarks in mesh_results.multi_face_landmarks:
-            for landmark in face_landmarks.landmark:
-                x_l, y_l = int(landmark.x * frame.shape[1]), int(landmark.y * frame.shape[0])
-                cv2.circle(frame, (x_l, y_l), 1, COLORS["face"], -1)
-
-def draw_body_landmarks(frame, pose_results):
-    if pose_results.pose_landmarks:
-        for landmark in pose_results.pose_landmarks.landmark:
-            x_b, y_b = int(landmark.x * frame.shape[1]), int(landmark.y * frame.shape[0])
-            cv2.circle(frame, (x_b, y_b), 5, COLORS["body"], -1)
-
-def draw_hand_landmarks(frame, hand_results):
-    if hand_results.multi_hand_landmarks:
-        for hand_landmarks in hand_results.multi_hand_landmarks:
-            for landmark in hand_landmarks.landmark:
-                x_h, y_h = int(landmark.x * frame.shape[1]), int(landmark.y * frame.shape[0])
-                cv2.circle(frame, (x_h, y_h), 5, COLORS["hands"], -1)
-
-# Video Streaming Functions
-def generate_frames():
-    cap = cv2.VideoCapture(0, cv2.CAP_DSHOW)
-    if not cap.isOpened():
-        raise HTTPException(status_code=500, detail="❌ Camera not detected")
-
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
-
-    # Variables for FPS calculation
-    fps = 0
-    frame_count = 0
-    start_time = time.time()
-    frame_skip = 3  # Optimized FPS
-    no_face_counter = 0
-    last_known_faces = []
-
-    frame_buffer = []
-    FRAME_BATCH_SIZE = 5
-
-    try:
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                print("❌ Frame not captured. Retrying...")
-                continue
-
-            frame = cv2.flip(frame, 1)  # Flip the frame horizontally
-            frame_count += 1
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-
-            # Face Detection
-            results = face_detection.process(rgb_frame)
-            face_bboxes = []
-
-            if results.detections:
-                for detection in results.detections:
-                    bboxC = detection.location_data.relative_bounding_box
-                    h, w, _ = frame.shape
-                    x, y, w_box, h_box = int(bboxC.xmin * w), int(bboxC.ymin * h), int(bboxC.width * w), int(bboxC.height * h)
-                    face_bboxes.append((x, y, w_box, h_box))
-                    break  # Only process the first detected face
-
-            # If Mediapipe Fails, Use Haar Cascade
-            if not face_bboxes:
-                face_bboxes = face_cascade.detectMultiScale(gray_frame, scaleFactor=1.1, minNeighbors=4, minSize=(50, 50))
-
-            # If Still No Face, Use Last Known Position
-            if not face_bboxes:
-                face_bboxes = last_known_faces
-
-            # Store Last Known Face Positions
-            if face_bboxes:
-                last_known_faces = face_bboxes  # Update last known faces
-                no_face_counter = 0  # Reset counter
-            else:
-                no_face_counter += 1  # Increase the counter
-                if no_face_counter < NO_FACE_LIMIT:
-                    face_bboxes = last_known_faces  # Use last known positions
-
-            # Face Mesh
-            mesh_results = face_mesh.process(rgb_frame)
-
-            # Body & Hand Detection
-            pose_results = pose.process(rgb_frame)
-            hand_results = hands.process(rgb_frame)
-
-            # Process Only the First Face
-            if frame_count % frame_skip == 0 and face_bboxes:
-                x, y, w_box, h_box = face_bboxes[0]
-                face_roi = frame[y:y + h_box, x:x + w_box]
-                if face_roi.size > 0:
-                    executor.submit(analyze_emotion, 0, face_roi)
-            
-            # Store frame for batch processing
-            frame_buffer.append(frame.copy())
-            if len(frame_buffer) >= FRAME_BATCH_SIZE:
-                # Analyze emotions from multiple frames in background
-                executor.submit(analyze_multiple_frames, frame_buffer)
-                frame_buffer = []
-
-            # Draw Face Boxes & Emotions
-            with emotion_data["lock"]:
-                detected_faces = emotion_data["faces"]
-
-                for i, (x, y, w_box, h_box) in enumerate(face_bboxes):
-                    if i == 0:  # Only process the first face
-                        cv2.rectangle(frame, (x, y), (x + w_box, y + h_box), COLORS["face"], 2)
-
-                        # Draw Face Mesh
-                        draw_face_mesh(frame, mesh_results)
-
-                        # Display Emotions
-                        if i in detected_faces:
-                            emotions = detected_faces[i]
-                            text_x = x + w_box + 10
-                            text_y = y + 20
-                            for emotion, confidence in emotions.items():
-                                text = f"{emotion.upper()}: {round(confidence, 2)}%"
-                                cv2.putText(frame, text, (text_x, text_y), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
-                                text_y += 25
-
-            # Draw Gaze Direction
-            draw_gaze(frame, mesh_results)
-
-            # Draw Body Landmarks
-            draw_body_landmarks(frame, pose_results)
-
-            # Draw Hand Landmarks
-            draw_hand_landmarks(frame, hand_results)
-
-            # Display FPS
-            elapsed_time = time.time() - start_time
-            fps = round(frame_count / elapsed_time, 2)
-            cv2.putText(frame, f"FPS: {fps}", (20, 50), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 255), 2)
-
-            # Encode and yield the frame
-            _, buffer = cv2.imencode(".jpg", frame)
-            frame_bytes = buffer.tobytes()
-            yield (b"--frame\r\n" b"Content-Type: image/jpeg\r\n\r\n" + frame_bytes + b"\r\n")
-
-    except Exception as e:
-        print(f"Error in video streaming: {e}")
-        if 'cap' in locals():
-            cap.release()
-
 # API Endpoints
 @app.get("/")
 def read_root():
     return {"message": ""}
 
-@app.get("/webcam")
-def webcam_feed():
-    return StreamingResponse(generate_frames(), media_type="multipart/x-mixed-replace; boundary=frame")
-
-@app.get("/emotion_data")
-def get_emotion_data() -> Dict:
-    with emotion_data["lock"]:
-        if "faces" in emotion_data and 0 in emotion_data["faces"]:
-            return {"emotions": emotion_data["faces"][0]}
-        return {"emotions": {}}
-
-@app.get("/emotion_history")
-def get_emotion_history():
-    try:
-        with open("emotion_log.json", "r") as f:
-            log_data = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        log_data = []
-    return {"history": log_data}
-
-@app.get("/stop_webcam")
-def stop_webcam():
-    cv2.destroyAllWindows()
-    return {"message": "Webcam stopped successfully"}
-
-@app.post("/mood_detect")
-def detect_mood(file: UploadFile = File(...), credentials: HTTPAuthorizationCredentials = Depends(security)):
-    try:
-        # Read image and preprocess
-        contents = file.file.read()
-        nparr = np.frombuffer(contents, np.uint8)
-        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        
-        # Get face ROI
-        rgb_img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        results = face_detection.process(rgb_img)
-        face_roi = img
-        
-        if results.detections:
-            detection = results.detections[0]  # Use the first face
-            bboxC = detection.location_data.relative_bounding_box
-            h, w, _ = img.shape
-            x, y, w_box, h_box = int(bboxC.xmin * w), int(bboxC.ymin * h), int(bboxC.width * w), int(bboxC.height * h)
-            face_roi = img[y:y + h_box, x:x + w_box]
-        
-        # Perform emotion detection
-        emotion = analyze_emotion_ensemble(face_roi)
-
-        # Decode JWT to get user ID
-        token_data = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=["HS256"])
-        user_id = token_data["user_id"]
-
-        # Save mood history
-        moods_collection.insert_one({
-            "user_id": user_id,
-            "mood": emotion,
-            "timestamp": datetime.utcnow()
-        })
-
-        return {"mood": emotion}
-
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error analyzing mood: {str(e)}")
-
 @app.post("/mood")
 def save_mood(mood_data: MoodRequest, credentials: HTTPAuthorizationCredentials = Depends(security)):
     payload = verify_token(credentials)
@@ -549,6 +133,7 @@ def save_mood(mood_data: MoodRequest, credentials: HTTPAuthorizationCredentials
             'mood': mood_data.mood,
             'timestamp': datetime.now()
         })
+        record_event(user_id, "moods")
         return {"message": "Mood saved successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database Error: {str(e)}")
@@ -588,6 +173,7 @@ def signup(user: UserSignup):
 
     result = users_collection.insert_one(new_user)
     user_id = str(result.inserted_id)
+    user_cache.invalidate(THERAPIST_LIST, PATIENT_LIST)
 
     token = create_token({
         "user_id": user_id,
@@ -640,7 +226,7 @@ def signin(user: UserSignin):
 @app.get("/get_profile/{user_id}")
 def get_profile(user_id: str):
     try:
-        user = users_collection.find_one({"_id": ObjectId(user_id)})
+        user = get_user(user_id, "GET /get_profile/{user_id}")
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid user ID format")
 
@@ -662,61 +248,38 @@ def get_profile(user_id: str):
 
 
 
-# Function to compute average emotions
-def compute_average_emotions():
-    try:
-        with open("emotion_log.json", "r") as f:
-            log_data = json.load(f)
-
-        if log_data:
-            emotion_sums = {}
-            emotion_counts = {}
-            
-            for entry in log_data:
-                for emotion, confidence in entry["emotions"].items():
-                    if emotion in emotion_sums:
-                        emotion_sums[emotion] += confidence
-                        emotion_counts[emotion] += 1
-                    else:
-                        emotion_sums[emotion] = confidence
-                        emotion_counts[emotion] = 1
-
-            average_emotions = {emotion: round(emotion_sums[emotion] / emotion_counts[emotion], 2) for emotion in emotion_sums}
-            print("\n📊 **Average Detected Emotions:**")
-            for emotion, avg_confidence in average_emotions.items():
-                print(f"  {emotion.upper()}: {avg_confidence}%")
-            return average_emotions
-        else:
-            print("⚠️ No emotion data recorded.")
-            return {}
-    except Exception as e:
-        print(f"Error computing average emotions: {e}")
-        return {}
-
-@app.get("/average_emotions")
-def get_average_emotions():
-    return {"average_emotions": compute_average_emotions()}
+# Preload and warm up models so traffic is only routed once everything is hot
+@app.on_event("startup")
+async def startup_event():
+    if MONGO_ENSURE_INDEXES:
+        await ensure_indexes_async(async_db)
+    if VISION_ENABLED and os.getenv("PRELOAD_MODELS", "1") == "1":
+        preload_vision()
+    else:
+        registry.mark_ready()
 
 # Add shutdown event handler
 @app.on_event("shutdown")
 async def shutdown_event():
     print("Shutting down application...")
     compute_average_emotions()
-    executor.shutdown()
-    cv2.destroyAllWindows()
+    await shutdown_vision()
+    close_emotion_store()
+    close_database()
 
 
 @router.get("/user/settings")
 async def get_user_settings(user=Depends(create_token)):
-    user_data = users_collection.find_one({"_id": ObjectId(user["_id"])})
+    user_data = await aget_user(user["_id"], "GET /user/settings")
     return user_data.get("settings", {})
 
 @router.post("/user/settings")
 async def update_user_settings(data: SettingsUpdate, user=Depends(get_current_user)):
-    users_collection.update_one(
+    await async_users_collection.update_one(
         {"_id": ObjectId(user["_id"])},
         {"$set": {f"settings.{data.setting}": data.value}},
     )
+    await ainvalidate_user(user["_id"])
     return {"status": "success"}
 
 
@@ -729,20 +292,21 @@ async def change_password(data: ChangePassword):
         raise HTTPException(status_code=400, detail=f"Invalid user_id format. {str(e)}")
 
     # Query the database for the user
-    user = users_collection.find_one({"_id": user_id})
+    user = await async_users_collection.find_one({"_id": user_id})
     
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
     # Check if the current password matches
-    if not bcrypt.checkpw(data.current_password.encode('utf-8'), user['password'].encode('utf-8')):
+    # bcrypt is deliberately slow; keep it off the event loop
+    if not await run_in_threadpool(bcrypt.checkpw, data.current_password.encode('utf-8'), user['password'].encode('utf-8')):
         raise HTTPException(status_code=400, detail="Current password is incorrect")
     
     # Hash the new password
-    hashed_new_password = bcrypt.hashpw(data.new_password.encode('utf-8'), bcrypt.gensalt())
+    hashed_new_password = await run_in_threadpool(bcrypt.hashpw, data.new_password.encode('utf-8'), bcrypt.gensalt())
     
     # Update the password in the database
-    users_collection.update_one(
+    await async_users_collection.update_one(
         {"_id": user_id}, 
         {"$set": {"password": hashed_new_password.decode('utf-8')}}
     )
@@ -752,24 +316,37 @@ async def change_password(data: ChangePassword):
 
 @router.get("/patients")
 def get_patients():
-    patients_cursor = users_collection.find({"role": "user"})  # You can adjust this filter
-    patients = []
-    for user in patients_cursor:
-        first_name = user.get("firstName", "")
-        last_name = user.get("lastName", "")
-        fullname = f"{first_name} {last_name}".strip()
-        patients.append({
-            "id": str(user["_id"]),
-            "name": fullname,
-            "mood": user.get("current_mood", "😐")
-        })
-    return patients
+    def load():
+        patients_cursor = users_collection.find({"role": "user"})  # You can adjust this filter
+        patients = []
+        for user in patients_cursor:
+            first_name = user.get("firstName", "")
+            last_name = user.get("lastName", "")
+            fullname = f"{first_name} {last_name}".strip()
+            patients.append({
+                "id": str(user["_id"]),
+                "name": fullname,
+                "mood": user.get("current_mood", "😐")
+            })
+        return patients
+
+    return user_cache.get(PATIENT_LIST, load, "GET /patients")
+
+
+@router.get("/metrics/cache")
+def get_cache_metrics():
+    return user_cache.metrics()
 
 
 
 app.include_router(router)
+app.include_router(registry_router)
+app.include_router(emotion_router)
+if VISION_ENABLED:
+    app.include_router(vision_router)
 app.include_router(notifs_router, prefix='/api/notifs')
 app.include_router(contact_router, prefix="/api")
 app.include_router(livekit_router)
 app.include_router(therapist_router)
-app.include_router(appointment_router)
\ No newline at end of file
+app.include_router(appointment_router)
+app.include_router(gamify_router)
\ No newline at end of file
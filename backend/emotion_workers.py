@@ -0,0 +1,276 @@
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from collections import deque
+import cv2
+from frame_ring import FrameRing, attach
+
+# Process-pool backend for webcam emotion analysis (EMOTION_BACKEND=process). Each
+# worker process holds its own emotion model, so inference scales across cores
+# instead of contending on the GIL. Face crops are resized straight into a slot of a
+# shared-memory ring; only (task id, slot, count) is sent to a worker, and results
+# come back through a queue to one collector thread that updates per-session state.
+
+EMOTION_WORKERS = int(os.getenv("EMOTION_WORKERS", "2"))
+# TensorFlow threads per worker; keep low so workers don't oversubscribe the cores
+EMOTION_WORKER_THREADS = int(os.getenv("EMOTION_WORKER_THREADS", "1"))
+# Seconds a task may take before it is failed (hung worker)
+EMOTION_TASK_TIMEOUT = float(os.getenv("EMOTION_TASK_TIMEOUT", "10"))
+
+# Face crop size the engine expects (inference.ROI_SIZE, not imported to keep TensorFlow out)
+CROP_SHAPE = (224, 224, 3)
+
+
+def _worker_main(shm_name, shape, slots, threads, tasks, results):
+    # Runs in each worker process: load the model once, then serve crop batches from shared memory
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+    from inference import engine
+    engine.load()
+
+    shm, frames = attach(shm_name, shape, slots)
+    results.put(("ready", os.getpid(), None))
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            task_id, slot_index, count = task
+            # Lets the parent fail this task if the process dies
+            results.put(("taken", task_id, os.getpid()))
+            started_at = time.perf_counter()
+            try:
+                probabilities, dominant = engine.predict(frames[slot_index, :count])
+                results.put((task_id, (probabilities, dominant), time.perf_counter() - started_at))
+            except Exception as e:
+                results.put((task_id, e, time.perf_counter() - started_at))
+    finally:
+        del frames
+        shm.close()
+
+
+class _Task:
+    def __init__(self, slot, on_result, on_error, deadline):
+        self.slot = slot
+        self.on_result = on_result
+        self.on_error = on_error
+        self.deadline = deadline
+        self.pid = None  # worker that took it
+
+
+class EmotionProcessPool:
+    def __init__(self, workers=EMOTION_WORKERS, capacity=5, slots=None, threads=EMOTION_WORKER_THREADS,
+                 timeout=EMOTION_TASK_TIMEOUT):
+        # capacity: most crops per task; slots: tasks that can be in flight at once
+        self.workers = workers
+        self.capacity = capacity
+        self.slot_count = slots or 2 * workers
+        self.threads = threads
+        self.timeout = timeout
+        self.ring = None
+        self._closed = False
+        self._processes = []
+        self._pending = {}
+        self._task_ids = itertools.count()
+        self._lock = threading.Lock()
+        self._collector = None
+        self._ready = 0
+        self.submitted = 0
+        self.completed = 0
+        self.dropped = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.restarts = 0
+        self.service_times = deque(maxlen=500)
+
+    def start(self):
+        with self._lock:
+            if self.ring is not None or self._closed:
+                return self
+            # spawn, not fork: TensorFlow isn't fork-safe
+            self._context = multiprocessing.get_context("spawn")
+            self.ring = FrameRing((self.capacity, *CROP_SHAPE), self.slot_count, shared=True)
+            self._tasks = self._context.Queue()
+            self._results = self._context.Queue()
+            for _ in range(self.workers):
+                self._processes.append(self._spawn())
+            self._collector = threading.Thread(target=self._collect, daemon=True, name="emotion-collector")
+            self._collector.start()
+        return self
+
+    def _spawn(self):
+        process = self._context.Process(
+            target=_worker_main,
+            args=(self.ring.name, self.ring.shape, self.slot_count, self.threads, self._tasks, self._results),
+            daemon=True,
+        )
+        process.start()
+        return process
+
+    def wait_ready(self, timeout=120):
+        # Block until every worker has loaded its model (used by warm-up and benchmarks)
+        self.start()
+        deadline = time.time() + timeout
+        while self._ready < self.workers and time.time() < deadline:
+            if any(not process.is_alive() for process in self._processes):
+                break
+            time.sleep(0.05)
+        return self._ready == self.workers
+
+    def submit(self, face_rois, on_result, on_error=None):
+        # face_rois: list of BGR crops. Exactly one of on_result(probabilities, dominant) or
+        # on_error(exception) runs later on the collector thread, including when the worker
+        # fails, hangs past the timeout or dies. Returns False, dropping the work (and calling
+        # neither), when every slot is still in flight or the pool has been shut down.
+        ring = self.start().ring
+        slot = ring.acquire() if ring is not None else None
+        if slot is None:
+            self.dropped += 1
+            return False
+
+        face_rois = face_rois[:self.capacity]
+        for i, face_roi in enumerate(face_rois):
+            cv2.resize(face_roi, CROP_SHAPE[1::-1], dst=slot.array[i])
+
+        task_id = next(self._task_ids)
+        with self._lock:
+            if self._closed:
+                slot.release()
+                self.dropped += 1
+                return False
+            self._pending[task_id] = _Task(slot, on_result, on_error, time.monotonic() + self.timeout)
+        self.submitted += 1
+        self._tasks.put((task_id, slot.index, len(face_rois)))
+        return True
+
+    def _collect(self):
+        while True:
+            try:
+                message = self._results.get(timeout=0.5)
+            except queue.Empty:
+                self._check_health()
+                continue
+            except (EOFError, OSError, ValueError):
+                return
+            task_id, outcome, service_time = message
+            if task_id is None:
+                return
+            if task_id == "ready":
+                self._ready += 1
+                continue
+            if task_id == "taken":
+                with self._lock:
+                    task = self._pending.get(outcome)
+                    if task is not None:
+                        task.pid = service_time
+                continue
+
+            task = self._finish(task_id)
+            if task is None:
+                # Already failed by the health check (timed out / worker died)
+                continue
+            self.service_times.append(service_time)
+            if isinstance(outcome, Exception):
+                self._fail(task, outcome)
+                continue
+            self.completed += 1
+            try:
+                task.on_result(*outcome)
+            except Exception as e:
+                print(f"⚠️ Emotion result handling error: {e}")
+            self._check_health()
+
+    def _finish(self, task_id):
+        with self._lock:
+            task = self._pending.pop(task_id, None)
+        if task is not None:
+            task.slot.release()
+        return task
+
+    def _fail(self, task, error):
+        self.failed += 1
+        print(f"⚠️ Emotion worker error: {error}")
+        if task.on_error is not None:
+            try:
+                task.on_error(error)
+            except Exception as e:
+                print(f"⚠️ Emotion error handling error: {e}")
+
+    def _check_health(self):
+        # Fail tasks past their deadline. When a worker has died, replace it and fail every
+        # task not known to be held by a live worker: a process killed mid-task may never
+        # have flushed its "taken" message, so its task can't be told apart from queued ones.
+        now = time.monotonic()
+        with self._lock:
+            dead = [process for process in self._processes if not process.is_alive()]
+            for process in dead:
+                print(f"⚠️ Emotion worker {process.pid} died (exit code {process.exitcode}), restarting")
+                self._processes[self._processes.index(process)] = self._spawn()
+                self._ready = max(0, self._ready - 1)
+                self.restarts += 1
+            alive = {process.pid for process in self._processes}
+            expired = [
+                task_id for task_id, task in self._pending.items()
+                if task.deadline <= now or (dead and task.pid not in alive)
+            ]
+        for task_id in expired:
+            task = self._finish(task_id)
+            if task is None:
+                continue
+            if task.deadline > now:
+                error = RuntimeError("emotion worker died")
+            else:
+                self.timed_out += 1
+                error = TimeoutError(f"emotion task took longer than {self.timeout}s")
+                # A hung worker is stopped here and replaced on the next check
+                for process in self._processes:
+                    if process.pid == task.pid:
+                        process.terminate()
+            self._fail(task, error)
+
+    @property
+    def in_flight(self):
+        return len(self._pending)
+
+    def shutdown(self):
+        # Final: later submits are refused rather than starting a new pool
+        with self._lock:
+            self._closed = True
+            if self.ring is None:
+                return
+            processes, self._processes = self._processes, []
+        for _ in processes:
+            self._tasks.put(None)
+        for process in processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self._results.put((None, None, 0.0))
+        self._collector.join(timeout=2)
+        with self._lock:
+            pending, self._pending = list(self._pending.values()), {}
+        for task in pending:
+            task.slot.release()
+            self._fail(task, RuntimeError("emotion pool shut down"))
+        # Frees the shared block once every slot is released
+        self.ring.close()
+        self.ring = None
+        self._ready = 0
+
+    def metrics(self):
+        service_times = sorted(self.service_times)
+        return {
+            "workers": self.workers,
+            "in_flight": self.in_flight,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "timed_out": self.timed_out,
+            "restarts": self.restarts,
+            "service_time_ms_p50": round(service_times[len(service_times) // 2] * 1000, 2) if service_times else 0.0,
+        }
@@ -0,0 +1,155 @@
+import os
+import cv2
+import numpy as np
+
+# Lightweight face tracking between detections. Boxes are carried from frame to
+# frame with sparse optical flow on points inside each face; the detector only runs
+# every FACE_REDETECT_EVERY frames, or sooner when a track's flow confidence drops.
+# Detections are matched to tracks by IoU so each face keeps a stable id.
+
+FACE_REDETECT_EVERY = int(os.getenv("FACE_REDETECT_EVERY", "10"))
+FACE_TRACK_MIN_CONFIDENCE = float(os.getenv("FACE_TRACK_MIN_CONFIDENCE", "0.6"))
+MAX_FACES = int(os.getenv("MAX_FACES", "5"))
+
+# A detection continues a track when their boxes overlap at least this much
+IOU_MATCH_THRESHOLD = 0.3
+
+# Flow points per face, and the fewest that still count as a successful track
+MAX_TRACK_POINTS = 30
+MIN_TRACK_POINTS = 5
+
+# Forward-backward error (pixels) above which a flow point is rejected
+MAX_FB_ERROR = 1.0
+
+LK_PARAMS = {"winSize": (15, 15), "maxLevel": 2, "criteria": (cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 10, 0.03)}
+
+
+def iou(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    iw = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    ih = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = iw * ih
+    union = aw * ah + bw * bh - inter
+    return inter / union if union > 0 else 0.0
+
+
+class Track:
+    def __init__(self, track_id, box, frame_index):
+        self.id = track_id
+        self.box = box  # (x, y, w, h) in full-frame pixels
+        self.confidence = 1.0
+        self.last_detected = frame_index
+
+
+class FaceTracker:
+    def __init__(self, redetect_every=FACE_REDETECT_EVERY, min_confidence=FACE_TRACK_MIN_CONFIDENCE,
+                 max_faces=MAX_FACES, max_age=30):
+        self.redetect_every = max(1, redetect_every)
+        self.min_confidence = min_confidence
+        self.max_faces = max_faces
+        # Frames a track survives without being confirmed by a detection
+        self.max_age = max_age
+        self.tracks = []
+        self.removed = []
+        self.frame_index = 0
+        self.frames_since_detect = 0
+        self.detections = 0
+        self.tracked = 0
+        self.next_id = 0
+        self._prev_gray = None
+
+    def _due(self):
+        if not self.tracks or self.frames_since_detect >= self.redetect_every:
+            return True
+        return min(track.confidence for track in self.tracks) < self.min_confidence
+
+    def update(self, rgb_input, frame_w, frame_h, detect):
+        # rgb_input may be downscaled; detect(rgb_input, frame_w, frame_h) -> full-frame boxes
+        self.frame_index += 1
+        self.removed = []
+        gray = cv2.cvtColor(rgb_input, cv2.COLOR_RGB2GRAY)
+        scale = rgb_input.shape[1] / frame_w
+
+        if self._prev_gray is not None and self._prev_gray.shape == gray.shape:
+            for track in self.tracks:
+                self._flow(track, self._prev_gray, gray, scale, frame_w, frame_h)
+        self._prev_gray = gray
+
+        if self._due():
+            self._match(detect(rgb_input, frame_w, frame_h))
+            self.detections += 1
+            self.frames_since_detect = 0
+        else:
+            self.tracked += 1
+            self.frames_since_detect += 1
+
+        # Drop tracks no detection has confirmed for a while
+        expired = [t for t in self.tracks if self.frame_index - t.last_detected > self.max_age]
+        if expired:
+            self.removed = [t.id for t in expired]
+            self.tracks = [t for t in self.tracks if t not in expired]
+        return self.tracks
+
+    def _flow(self, track, prev_gray, gray, scale, frame_w, frame_h):
+        # Shift the box by the median motion of the points that track reliably both ways
+        x, y, w, h = (int(v * scale) for v in track.box)
+        x, y = max(0, x), max(0, y)
+        region = prev_gray[y:y + h, x:x + w]
+        points = cv2.goodFeaturesToTrack(region, MAX_TRACK_POINTS, 0.01, 3) if region.size else None
+        if points is None or len(points) < MIN_TRACK_POINTS:
+            track.confidence = 0.0
+            return
+
+        points = points.reshape(-1, 1, 2) + np.array([x, y], dtype=np.float32)
+        moved, status, _ = cv2.calcOpticalFlowPyrLK(prev_gray, gray, points, None, **LK_PARAMS)
+        back, back_status, _ = cv2.calcOpticalFlowPyrLK(gray, prev_gray, moved, None, **LK_PARAMS)
+        fb_error = np.linalg.norm((points - back).reshape(-1, 2), axis=1)
+        good = (status.ravel() == 1) & (back_status.ravel() == 1) & (fb_error < MAX_FB_ERROR)
+
+        track.confidence = float(good.mean())
+        if good.sum() < MIN_TRACK_POINTS:
+            track.confidence = 0.0
+            return
+
+        dx, dy = np.median((moved - points).reshape(-1, 2)[good], axis=0) / scale
+        bx, by, bw, bh = track.box
+        track.box = (
+            int(min(max(0, bx + dx), frame_w - 1)),
+            int(min(max(0, by + dy), frame_h - 1)),
+            bw,
+            bh,
+        )
+
+    def _match(self, boxes):
+        # Greedy IoU matching, best overlaps first
+        pairs = sorted(
+            ((iou(track.box, box), ti, bi) for ti, track in enumerate(self.tracks) for bi, box in enumerate(boxes)),
+            reverse=True,
+        )
+        matched_tracks, matched_boxes = set(), set()
+        for overlap, ti, bi in pairs:
+            if overlap < IOU_MATCH_THRESHOLD:
+                break
+            if ti in matched_tracks or bi in matched_boxes:
+                continue
+            track = self.tracks[ti]
+            track.box = tuple(boxes[bi])
+            track.confidence = 1.0
+            track.last_detected = self.frame_index
+            matched_tracks.add(ti)
+            matched_boxes.add(bi)
+
+        for bi, box in enumerate(boxes):
+            if bi not in matched_boxes and len(self.tracks) < self.max_faces:
+                self.tracks.append(Track(self.next_id, tuple(box), self.frame_index))
+                self.next_id += 1
+
+    def snapshot(self):
+        frames = self.detections + self.tracked
+        return {
+            "tracks": len(self.tracks),
+            "detections": self.detections,
+            "tracked_frames": self.tracked,
+            "detection_ratio": round(self.detections / frames, 3) if frames else 0.0,
+        }
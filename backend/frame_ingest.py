@@ -0,0 +1,115 @@
+import asyncio
+import itertools
+import json
+import os
+import time
+from inference_pool import inference_pool, QueueFullError
+from emotion_store import record_emotions, clear_session
+
+# WebSocket frame ingest: browser clients stream binary JPEG / WebP frames and get
+# compact emotion results back. The receiver keeps only the newest frame and the
+# analyzer takes it at most WS_MAX_FPS times a second, so a client that sends faster
+# than the server analyzes has its stale frames dropped instead of queued.
+#
+# Client -> server: binary frame, or text {"fps": n} to lower this connection's rate
+# Server -> client: {"frame": i, "latency_ms": ..., "faces": [{"box", "emotion", "scores"}], "dropped": n}
+
+WS_MAX_FPS = float(os.getenv("WS_MAX_FPS", "5"))
+WS_MAX_FRAME_BYTES = int(os.getenv("WS_MAX_FRAME_BYTES", str(512 * 1024)))
+
+_connection_ids = itertools.count(1)
+
+
+class FrameIngest:
+    def __init__(self, websocket, user_id, fps=WS_MAX_FPS):
+        self.websocket = websocket
+        # Emotion readings from this connection are stored under their own session
+        self.session_id = f"ws:{user_id}:{next(_connection_ids)}"
+        self.set_rate(fps)
+        self.latest = None  # (frame index, encoded bytes, received at)
+        self.frame_ready = asyncio.Event()
+        self.received = 0
+        self.analyzed = 0
+        self.dropped = 0
+        self.busy = 0
+
+    def set_rate(self, fps):
+        # Clients can ask for less than the server limit, never more
+        fps = min(float(fps), WS_MAX_FPS) if fps and float(fps) > 0 else WS_MAX_FPS
+        self.interval = 1.0 / fps
+
+    async def run(self):
+        analyzer = asyncio.create_task(self._analyze_loop())
+        try:
+            await self._receive_loop()
+        finally:
+            analyzer.cancel()
+            try:
+                await analyzer
+            except (asyncio.CancelledError, Exception):
+                pass
+            clear_session(self.session_id)
+
+    async def _receive_loop(self):
+        while True:
+            message = await self.websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+
+            data = message.get("bytes")
+            if data is not None:
+                index = self.received
+                self.received += 1
+                if len(data) > WS_MAX_FRAME_BYTES:
+                    self.dropped += 1
+                    continue
+                # Latest wins: an unanalyzed frame is replaced, not queued
+                if self.latest is not None:
+                    self.dropped += 1
+                self.latest = (index, data, time.perf_counter())
+                self.frame_ready.set()
+            elif message.get("text"):
+                try:
+                    self.set_rate(json.loads(message["text"]).get("fps"))
+                except (ValueError, TypeError, AttributeError):
+                    pass
+
+    async def _analyze_loop(self):
+        while True:
+            await self.frame_ready.wait()
+            self.frame_ready.clear()
+            if self.latest is None:
+                continue
+            index, data, received_at = self.latest
+            self.latest = None
+            started = time.perf_counter()
+
+            try:
+                result = await inference_pool.run("inference_tasks.analyze_frame", data)
+            except QueueFullError:
+                # The node is saturated; this frame is dropped and the next one tried
+                self.busy += 1
+                self.dropped += 1
+                await asyncio.sleep(self.interval)
+                continue
+            except Exception as e:
+                await self._send({"frame": index, "error": str(e)})
+                continue
+
+            now = time.time()
+            for face_id, face in enumerate(result["faces"]):
+                record_emotions(self.session_id, face_id, face["scores"], now)
+            self.analyzed += 1
+
+            await self._send({
+                "frame": index,
+                "latency_ms": round((time.perf_counter() - received_at) * 1000, 1),
+                "faces": result["faces"],
+                "dropped": self.dropped,
+            })
+
+            # Server-controlled rate: frames arriving meanwhile overwrite each other
+            await asyncio.sleep(max(0.0, self.interval - (time.perf_counter() - started)))
+
+    async def _send(self, payload):
+        await self.websocket.send_text(json.dumps(payload, separators=(",", ":")))
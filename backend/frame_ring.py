@@ -0,0 +1,140 @@
+import threading
+import weakref
+from multiprocessing import shared_memory
+import cv2
+import numpy as np
+
+# Preallocated, reference-counted frame buffers for the webcam pipeline. Captured
+# frames are written straight into a free slot and the same slot is handed to every
+# stage that needs the frame; it goes back to the pool when the last stage releases
+# it. With shared=True the slots live in one multiprocessing.shared_memory block, so
+# other processes can attach and read a frame by slot index instead of unpickling it.
+# close() stops handing out slots; the buffer itself is freed once the last slot is
+# released, so a stage still holding a slot never writes into unmapped memory.
+
+
+class FrameSlot:
+    def __init__(self, ring, index, array):
+        self.ring = ring
+        self.index = index
+        self.array = array
+        self.refs = 0
+        self.captured_at = 0.0
+
+    def retain(self):
+        self.ring.retain(self)
+        return self
+
+    def release(self):
+        self.ring.release(self)
+
+
+class FrameRing:
+    def __init__(self, shape, slots=8, shared=False, dtype=np.uint8):
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.frame_bytes = int(np.prod(self.shape)) * self.dtype.itemsize
+        self._lock = threading.Lock()
+        self._closed = False
+        self.exhausted = 0
+
+        self.shm = shared_memory.SharedMemory(create=True, size=self.frame_bytes * slots) if shared else None
+        buffer = self.shm.buf if shared else bytearray(self.frame_bytes * slots)
+        self._frames = np.ndarray((slots, *self.shape), dtype=self.dtype, buffer=buffer)
+        self.slots = [FrameSlot(self, i, self._frames[i]) for i in range(slots)]
+        self._free = list(reversed(self.slots))
+
+    @property
+    def name(self):
+        # Shared memory block name for attach(); None for process-local rings
+        return self.shm.name if self.shm is not None else None
+
+    def acquire(self):
+        # Free slot with one reference, or None when every slot is still in use
+        with self._lock:
+            if self._closed:
+                return None
+            if not self._free:
+                self.exhausted += 1
+                return None
+            slot = self._free.pop()
+            slot.refs = 1
+            return slot
+
+    def retain(self, slot):
+        with self._lock:
+            slot.refs += 1
+
+    def release(self, slot):
+        with self._lock:
+            slot.refs -= 1
+            if slot.refs == 0:
+                self._free.append(slot)
+                if self._closed and len(self._free) == len(self.slots):
+                    self._free_buffer()
+
+    def in_use(self):
+        with self._lock:
+            return len(self.slots) - len(self._free)
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            if len(self._free) == len(self.slots):
+                self._free_buffer()
+
+    def _free_buffer(self):
+        # Called with the lock held once no slot is referenced. Every slice of a slot
+        # keeps the frames array alive (numpy doesn't pin the shared buffer itself), so
+        # the block is unmapped only once the last view is gone, e.g. FrameViews.frame.
+        for slot in self.slots:
+            slot.array = None
+        self.slots = []
+        self._free = []
+        if self.shm is not None:
+            self.shm.unlink()
+            weakref.finalize(self._frames, self.shm.close)
+            self.shm = None
+        self._frames = None
+
+
+def attach(name, shape, slots, dtype=np.uint8):
+    # Reader side of a shared ring: (SharedMemory handle, slots x shape array view)
+    shm = shared_memory.SharedMemory(name=name)
+    frames = np.ndarray((slots, *shape), dtype=np.dtype(dtype), buffer=shm.buf)
+    return shm, frames
+
+
+class FrameViews:
+    # Colour-converted / downscaled versions of one BGR frame, computed at most once per
+    # frame and shared by every analyzer. Output buffers are reused from frame to frame.
+    def __init__(self):
+        self.frame = None
+        self._buffers = {}
+        self._ready = set()
+
+    def reset(self, frame):
+        self.frame = frame
+        self._ready.clear()
+
+    def _buffer(self, key, shape):
+        buffer = self._buffers.get(key)
+        if buffer is None or buffer.shape != shape:
+            buffer = self._buffers[key] = np.empty(shape, dtype=np.uint8)
+        return buffer
+
+    def rgb(self, scale=1.0):
+        if scale not in self._ready:
+            h, w = self.frame.shape[:2]
+            if scale == 1.0:
+                cv2.cvtColor(self.frame, cv2.COLOR_BGR2RGB, dst=self._buffer(scale, self.frame.shape))
+            else:
+                # Downscale first, then convert in place: fewer pixels to convert
+                size = (max(1, int(w * scale)), max(1, int(h * scale)))
+                buffer = self._buffer(scale, (size[1], size[0], 3))
+                cv2.resize(self.frame, size, dst=buffer, interpolation=cv2.INTER_AREA)
+                cv2.cvtColor(buffer, cv2.COLOR_BGR2RGB, dst=buffer)
+            self._ready.add(scale)
+        return self._buffers[scale]
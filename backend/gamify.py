@@ -1,15 +1,32 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Header
 from datetime import datetime, timedelta
-from database import users_collection
+from database import async_users_collection as users_collection
+from leaderboard import leaderboard, ensure_fresh, LEADERBOARD_PROJECTION
+from badge_engine import badge_stages
+from streaks import streak_summary
+from apimodels import XPEventBatch
+from JWTAuth import get_current_user
 from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
 from typing import List, Optional
-import math
+import hmac
+import os
 
 router = APIRouter()
 
 # XP thresholds for each level
 XP_PER_LEVEL = 100
 
+# Largest batch /xp/award/bulk accepts
+XP_BULK_MAX_EVENTS = int(os.getenv("XP_BULK_MAX_EVENTS", "500"))
+
+# /xp/award/bulk credits arbitrary users, so only internal jobs holding this key (sent
+# as X-Internal-Key) may call it; unset disables the endpoint
+XP_BULK_API_KEY = os.getenv("XP_BULK_API_KEY", "")
+
+# Longest activity window /streaks returns
+STREAK_MAX_DAYS = 366
+
 # XP rewards for different actions
 XP_REWARDS = {
     "mood_check": 10,
@@ -30,57 +47,125 @@ BADGES = {
     "level_5": {"name": "Level 5 Achieved", "description": "Reach level 5", "icon": "⭐"},
 }
 
+def xp_update(xp_amount, now):
+    # Update pipeline run atomically on the server: add the XP, recompute the level from
+    # the new total and evaluate the badge rules (level_5). Concurrent awards can't
+    # overwrite each other the way a read-modify-write in Python did.
+    return [
+        {"$set": {
+            "xp": {"$add": [{"$ifNull": ["$xp", 0]}, xp_amount]},
+            "last_action_date": now
+        }},
+        {"$set": {"level": {"$add": [{"$toInt": {"$floor": {"$divide": ["$xp", XP_PER_LEVEL]}}}, 1]}}},
+        *badge_stages()
+    ]
+
+
+def require_self(current_user, user_id):
+    # Write routes act only on the signed-in user's own account
+    if current_user.get("user_id") != user_id:
+        raise HTTPException(status_code=403, detail="Not allowed to modify another user")
+
+
+def require_internal_key(x_internal_key: Optional[str] = Header(None)):
+    if not XP_BULK_API_KEY:
+        raise HTTPException(status_code=403, detail="Bulk XP awards are disabled")
+    if not x_internal_key or not hmac.compare_digest(x_internal_key, XP_BULK_API_KEY):
+        raise HTTPException(status_code=403, detail="Invalid internal key")
+
+
+def sync_leaderboard(user):
+    # user: document with LEADERBOARD_PROJECTION, as stored after the write
+    if user.get("leaderboard_opt_out"):
+        leaderboard.remove(user["_id"])
+        return
+    leaderboard.update(
+        user["_id"],
+        name=user.get("name", ""),
+        xp=user.get("xp", 0),
+        level=user.get("level", 1),
+        badges=user.get("badges", []),
+    )
+
+
 @router.post("/xp/award")
-async def award_xp(user_id: str, action: str):
+async def award_xp(user_id: str, action: str, current_user=Depends(get_current_user)):
+    require_self(current_user, user_id)
     try:
         if action not in XP_REWARDS:
             raise HTTPException(status_code=400, detail="Invalid action")
 
         xp_amount = XP_REWARDS[action]
-        user = users_collection.find_one({"_id": ObjectId(user_id)})
-        
+        user = await users_collection.find_one_and_update(
+            {"_id": ObjectId(user_id)},
+            xp_update(xp_amount, datetime.utcnow()),
+            projection=LEADERBOARD_PROJECTION,
+            return_document=ReturnDocument.AFTER
+        )
+
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
+        sync_leaderboard(user)
 
-        current_xp = user.get("xp", 0)
-        current_level = user.get("level", 1)
-        
-        # Calculate new XP and level
-        new_xp = current_xp + xp_amount
-        new_level = math.floor(new_xp / XP_PER_LEVEL) + 1
-        
-        # Update user document
-        update_data = {
-            "xp": new_xp,
-            "level": new_level,
-            "last_action_date": datetime.utcnow()
-        }
-        
-        # Check for level-up badge
-        if new_level > current_level and new_level >= 5:
-            badges = user.get("badges", [])
-            if "level_5" not in badges:
-                badges.append("level_5")
-                update_data["badges"] = badges
-
-        users_collection.update_one(
-            {"_id": ObjectId(user_id)},
-            {"$set": update_data}
-        )
+        new_xp = user["xp"]
+        new_level = user["level"]
+        previous_level = (new_xp - xp_amount) // XP_PER_LEVEL + 1
 
         return {
             "new_xp": new_xp,
             "new_level": new_level,
             "xp_gained": xp_amount,
-            "leveled_up": new_level > current_level
+            "leveled_up": new_level > previous_level
         }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/xp/award/bulk", dependencies=[Depends(require_internal_key)])
+async def award_xp_bulk(batch: XPEventBatch):
+    try:
+        if len(batch.events) > XP_BULK_MAX_EVENTS:
+            raise HTTPException(status_code=400, detail=f"At most {XP_BULK_MAX_EVENTS} events per batch")
+
+        # One update per user carrying the sum of their awards
+        totals = {}
+        rejected = []
+        for event in batch.events:
+            if event.action not in XP_REWARDS or not ObjectId.is_valid(event.user_id):
+                rejected.append(event.model_dump())
+                continue
+            totals[event.user_id] = totals.get(event.user_id, 0) + XP_REWARDS[event.action]
+
+        if not totals:
+            return {"accepted": 0, "users_updated": 0, "unknown_users": 0, "rejected": rejected}
+
+        now = datetime.utcnow()
+        user_ids = [ObjectId(user_id) for user_id in totals]
+        result = await users_collection.bulk_write(
+            [UpdateOne({"_id": _id}, xp_update(amount, now)) for _id, amount in zip(user_ids, totals.values())],
+            ordered=False
+        )
+
+        # Read the new totals back once for the whole batch
+        async for user in users_collection.find({"_id": {"$in": user_ids}}, LEADERBOARD_PROJECTION):
+            sync_leaderboard(user)
+
+        return {
+            "accepted": len(batch.events) - len(rejected),
+            "users_updated": result.modified_count,
+            "unknown_users": len(totals) - result.matched_count,
+            "rejected": rejected
+        }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/badges/{user_id}")
 async def get_badges(user_id: str):
     try:
-        user = users_collection.find_one({"_id": ObjectId(user_id)})
+        user = await users_collection.find_one({"_id": ObjectId(user_id)})
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
 
@@ -92,69 +177,111 @@ async def get_badges(user_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/badges/award")
-async def award_badge(user_id: str, badge_id: str):
+async def award_badge(user_id: str, badge_id: str, current_user=Depends(get_current_user)):
+    require_self(current_user, user_id)
     try:
         if badge_id not in BADGES:
             raise HTTPException(status_code=400, detail="Invalid badge")
 
-        result = users_collection.update_one(
+        result = await users_collection.update_one(
             {"_id": ObjectId(user_id)},
             {"$addToSet": {"badges": badge_id}}
         )
 
         if result.modified_count == 0:
             return {"message": "Badge already awarded or user not found"}
+        leaderboard.add_badge(user_id, badge_id)
 
         return {"message": f"Badge {BADGES[badge_id]['name']} awarded successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/streaks/{user_id}")
+async def get_streaks(user_id: str, days: int = 7):
+    try:
+        if not 1 <= days <= STREAK_MAX_DAYS:
+            raise HTTPException(status_code=400, detail=f"days must be between 1 and {STREAK_MAX_DAYS}")
+
+        user = await users_collection.find_one({"_id": ObjectId(user_id)}, {"stats": 1, "activity": 1})
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+
+        return streak_summary(user, days)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+async def leaderboard_from_db(limit, user_id):
+    # Full aggregate + count; only used while the in-memory leaderboard can't load
+    # Get users who haven't opted out of leaderboard
+    pipeline = [
+        {"$match": {"leaderboard_opt_out": {"$ne": True}}},
+        {"$sort": {"xp": -1}},
+        {"$limit": limit},
+        {"$project": {
+            "name": 1,
+            "xp": 1,
+            "level": 1,
+            "badges": 1
+        }}
+    ]
+    
+    entries = await users_collection.aggregate(pipeline).to_list(length=None)
+    
+    # If user_id is provided, get their rank
+    user_rank = None
+    if user_id:
+        user = await users_collection.find_one({"_id": ObjectId(user_id)})
+        if user and not user.get("leaderboard_opt_out"):
+            higher_xp = await users_collection.count_documents({
+                "xp": {"$gt": user.get("xp", 0)},
+                "leaderboard_opt_out": {"$ne": True}
+            })
+            user_rank = higher_xp + 1
+
+    for entry in entries:
+        entry["_id"] = str(entry["_id"])
+    return {
+        "leaderboard": entries,
+        "user_rank": user_rank
+    }
+
+
 @router.get("/leaderboard")
 async def get_leaderboard(limit: int = 10, user_id: Optional[str] = None):
     try:
-        # Get users who haven't opted out of leaderboard
-        pipeline = [
-            {"$match": {"leaderboard_opt_out": {"$ne": True}}},
-            {"$sort": {"xp": -1}},
-            {"$limit": limit},
-            {"$project": {
-                "name": 1,
-                "xp": 1,
-                "level": 1,
-                "badges": 1
-            }}
-        ]
-        
-        leaderboard = list(users_collection.aggregate(pipeline))
-        
-        # If user_id is provided, get their rank
-        user_rank = None
-        if user_id:
-            user = users_collection.find_one({"_id": ObjectId(user_id)})
-            if user and not user.get("leaderboard_opt_out"):
-                higher_xp = users_collection.count_documents({
-                    "xp": {"$gt": user.get("xp", 0)},
-                    "leaderboard_opt_out": {"$ne": True}
-                })
-                user_rank = higher_xp + 1
+        await ensure_fresh()
+        if leaderboard.loaded_at is None:
+            return await leaderboard_from_db(limit, user_id)
 
-        return {
-            "leaderboard": leaderboard,
-            "user_rank": user_rank
+        response = {
+            "leaderboard": leaderboard.top(limit),
+            "user_rank": leaderboard.rank(user_id) if user_id else None
         }
+        if user_id:
+            response["neighbors"] = leaderboard.neighbors(user_id)
+        return response
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/leaderboard/opt-out")
-async def toggle_leaderboard_opt_out(user_id: str, opt_out: bool):
+async def toggle_leaderboard_opt_out(user_id: str, opt_out: bool, current_user=Depends(get_current_user)):
+    require_self(current_user, user_id)
     try:
-        result = users_collection.update_one(
+        result = await users_collection.update_one(
             {"_id": ObjectId(user_id)},
             {"$set": {"leaderboard_opt_out": opt_out}}
         )
         
         if result.modified_count == 0:
             raise HTTPException(status_code=404, detail="User not found")
+
+        if opt_out:
+            leaderboard.remove(user_id)
+        else:
+            sync_leaderboard(await users_collection.find_one({"_id": ObjectId(user_id)}, LEADERBOARD_PROJECTION))
             
         return {"message": f"Leaderboard opt-out set to {opt_out}"}
     except Exception as e:
@@ -0,0 +1,85 @@
+import os
+import struct
+import cv2
+import numpy as np
+
+# Resolution-aware decoding and detection input for uploaded images. Large JPEGs are
+# decoded at 1/2, 1/4 or 1/8 scale by libjpeg itself (IMREAD_REDUCED_*), and face
+# detection runs on a copy no larger than DETECT_MAX_SIDE; boxes are mapped back to
+# the decoded image so face crops keep as much detail as the decode allows.
+
+# Longest side an upload is decoded to (never reduced below this)
+UPLOAD_DECODE_MAX_SIDE = int(os.getenv("UPLOAD_DECODE_MAX_SIDE", "1600"))
+
+# Longest side of the image face detection runs on
+DETECT_MAX_SIDE = int(os.getenv("DETECT_MAX_SIDE", "640"))
+
+REDUCED_FLAGS = [
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+]
+
+# JPEG start-of-frame markers (baseline, progressive, ...), which carry the image size
+_JPEG_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def image_size(contents):
+    # (width, height) from the JPEG / PNG / WebP header without decoding, or None
+    if contents[:8] == b"\x89PNG\r\n\x1a\n" and len(contents) >= 24:
+        return struct.unpack(">II", contents[16:24])
+    if contents[:4] == b"RIFF" and contents[8:12] == b"WEBP" and len(contents) >= 30:
+        chunk = contents[12:16]
+        if chunk == b"VP8X":
+            return int.from_bytes(contents[24:27], "little") + 1, int.from_bytes(contents[27:30], "little") + 1
+        if chunk == b"VP8 ":
+            width, height = struct.unpack("<HH", contents[26:30])
+            return width & 0x3FFF, height & 0x3FFF
+        if chunk == b"VP8L":
+            bits = int.from_bytes(contents[21:25], "little")
+            return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        return None
+    if contents[:2] != b"\xff\xd8":
+        return None
+
+    # Walk the JPEG segments up to the first start-of-frame
+    offset = 2
+    while offset + 4 <= len(contents):
+        if contents[offset] != 0xFF:
+            return None
+        marker = contents[offset + 1]
+        if marker == 0xFF:
+            offset += 1
+            continue
+        length = struct.unpack(">H", contents[offset + 2:offset + 4])[0]
+        if marker in _JPEG_SOF and offset + 9 <= len(contents):
+            height, width = struct.unpack(">HH", contents[offset + 5:offset + 9])
+            return width, height
+        offset += 2 + length
+    return None
+
+
+def decode_image(contents, max_side=UPLOAD_DECODE_MAX_SIDE):
+    # BGR image, decoded at the largest reduction that still leaves max_side pixels
+    buffer = np.frombuffer(contents, np.uint8)
+    size = image_size(contents)
+    flag = cv2.IMREAD_COLOR
+    if size is not None:
+        for factor, reduced_flag in REDUCED_FLAGS:
+            if max(size) // factor >= max_side:
+                flag = reduced_flag
+                break
+    img = cv2.imdecode(buffer, flag)
+    if img is None:
+        raise ValueError("Could not decode image")
+    return img
+
+
+def detection_input(img, max_side=DETECT_MAX_SIDE):
+    # (downscaled copy for detection, scale factor); the image itself when already small
+    h, w = img.shape[:2]
+    scale = min(1.0, max_side / max(h, w))
+    if scale == 1.0:
+        return img, 1.0
+    small = cv2.resize(img, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+    return small, scale
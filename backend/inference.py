@@ -0,0 +1,100 @@
+import threading
+import cv2
+import numpy as np
+from collections import Counter
+from deepface import DeepFace
+
+# Emotion labels in the order the DeepFace emotion model outputs them
+EMOTION_LABELS = ["angry", "disgust", "fear", "happy", "sad", "surprise", "neutral"]
+
+# Size of the face crops handed to the engine and the emotion model's own input size
+ROI_SIZE = (224, 224)
+MODEL_INPUT_SIZE = (48, 48)
+
+# Emotion models to run; each one is built once and run once per batch
+DEFAULT_EMOTION_MODELS = ["Emotion"]
+
+
+def prepare_roi(face_roi):
+    # Resize a BGR face crop of any size to the engine's ROI size
+    return cv2.resize(face_roi, ROI_SIZE)
+
+
+def prepare_batch(face_rois):
+    # Stack BGR face crops into one N x 224 x 224 x 3 uint8 batch
+    if not face_rois:
+        return np.empty((0, ROI_SIZE[1], ROI_SIZE[0], 3), dtype=np.uint8)
+    return np.stack([prepare_roi(roi) for roi in face_rois])
+
+
+def vote(labels):
+    # Most frequent label, "Neutral" when nothing was predicted
+    if labels:
+        most_common = Counter(labels).most_common(1)
+        if most_common:
+            most_common_emotion, count = most_common[0]
+            return most_common_emotion
+    return "Neutral"
+
+
+class EmotionInferenceEngine:
+    def __init__(self, model_names=None):
+        self.model_names = list(model_names or DEFAULT_EMOTION_MODELS)
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def load(self):
+        # Build every configured model once; safe to call from several threads
+        with self._lock:
+            for name in self.model_names:
+                if name not in self._models:
+                    client = DeepFace.build_model(model_name=name, task="facial_attribute")
+                    self._models[name] = client.model
+        return self
+
+    def _to_model_input(self, batch):
+        # Same preprocessing DeepFace applies per face (grayscale, 48x48, [0, 1]), done for the whole batch
+        gray = np.empty((len(batch), MODEL_INPUT_SIZE[1], MODEL_INPUT_SIZE[0]), dtype=np.float32)
+        for i, face in enumerate(batch):
+            face_gray = cv2.cvtColor(face, cv2.COLOR_BGR2GRAY)
+            gray[i] = cv2.resize(face_gray, MODEL_INPUT_SIZE, interpolation=cv2.INTER_AREA)
+        gray /= 255.0
+        return gray[..., np.newaxis]
+
+    def predict(self, batch):
+        # batch: N x 224 x 224 x 3 uint8 BGR face crops
+        # Returns (N x 7 probability array in percent, per-face dominant labels)
+        batch = np.asarray(batch)
+        if batch.ndim == 3:
+            batch = batch[np.newaxis]
+        if len(batch) == 0:
+            return np.empty((0, len(EMOTION_LABELS)), dtype=np.float32), []
+
+        self.load()
+        model_input = self._to_model_input(batch)
+
+        # One forward pass per model over the whole batch, averaged across models
+        probabilities = np.zeros((len(batch), len(EMOTION_LABELS)), dtype=np.float32)
+        for name in self.model_names:
+            raw = np.asarray(self._models[name](model_input, training=False), dtype=np.float32)
+            probabilities += raw / raw.sum(axis=1, keepdims=True)
+        probabilities = 100.0 * probabilities / len(self.model_names)
+
+        dominant = [EMOTION_LABELS[i] for i in probabilities.argmax(axis=1)]
+        return probabilities, dominant
+
+    def analyze(self, batch):
+        # Per-face emotion dicts (same shape as DeepFace's result["emotion"]) plus the batch vote
+        probabilities, dominant = self.predict(batch)
+        faces = [
+            {
+                "emotion": {label: float(p) for label, p in zip(EMOTION_LABELS, row)},
+                "dominant_emotion": label,
+            }
+            for row, label in zip(probabilities, dominant)
+        ]
+        return {"faces": faces, "vote": vote(dominant)}
+
+
+# Shared engine used by the API routes and the webcam loop
+engine = EmotionInferenceEngine()
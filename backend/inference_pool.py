@@ -0,0 +1,177 @@
+import asyncio
+import importlib
+import math
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# Dedicated process pool for heavy inference, so bursts of /mood_detect uploads
+# don't starve the Starlette threadpool shared by every other endpoint.
+# Each worker process holds its own copy of the models.
+
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "2"))
+INFERENCE_QUEUE_SIZE = int(os.getenv("INFERENCE_QUEUE_SIZE", "16"))
+
+# Number of recent requests kept for the wait / service time percentiles
+METRICS_WINDOW = 500
+
+
+class QueueFullError(Exception):
+    def __init__(self, retry_after, message="Inference queue is full"):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class PoolRestartingError(QueueFullError):
+    # A worker died and took the executor down with it; callers answer 503 like a full queue
+    def __init__(self, retry_after):
+        super().__init__(retry_after, "Inference worker crashed, pool is restarting")
+
+
+def _init_worker(init_path):
+    # Runs once in every worker process: load this worker's own model copy
+    module_name, func_name = init_path.rsplit(".", 1)
+    getattr(importlib.import_module(module_name), func_name)()
+
+
+def _run_task(func_path, submitted_at, args):
+    # Called by reference ("module.function") so the API process never has to import the vision stack
+    started_at = time.time()
+    module_name, func_name = func_path.rsplit(".", 1)
+    result = getattr(importlib.import_module(module_name), func_name)(*args)
+    return result, started_at - submitted_at, time.time() - started_at
+
+
+def _percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class InferencePool:
+    def __init__(self, workers=INFERENCE_WORKERS, queue_size=INFERENCE_QUEUE_SIZE, init_path="inference_tasks.init_inference_worker"):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.init_path = init_path
+        self._executor = None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.submitted = 0
+        self.rejected = 0
+        self.failed = 0
+        self.restarts = 0
+        self.wait_times = deque(maxlen=METRICS_WINDOW)
+        self.service_times = deque(maxlen=METRICS_WINDOW)
+
+    def start(self):
+        self._get_executor()
+        return self
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # spawn, not fork: TensorFlow and MediaPipe aren't fork-safe
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.init_path,),
+                )
+            return self._executor
+
+    def warm_up(self):
+        # Spawn every worker and wait for its initializer, so the first request doesn't pay for it
+        executor = self._get_executor()
+        futures = [executor.submit(_run_task, "os.getpid", time.time(), ()) for _ in range(self.workers)]
+        for future in futures:
+            future.result()
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def _restart(self, executor):
+        # An OOM-kill or native crash in one worker breaks the whole executor; drop it so
+        # the next start() spawns a fresh one. Only the first failed request does this.
+        with self._lock:
+            if self._executor is not executor:
+                return
+            print("⚠️ Inference worker died, restarting the pool")
+            self._executor = None
+            self.restarts += 1
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    @property
+    def queue_depth(self):
+        return max(0, self.in_flight - self.workers)
+
+    def retry_after(self):
+        # Seconds until a slot is likely to free up, at least 1
+        service = sum(self.service_times) / len(self.service_times) if self.service_times else 1.0
+        return max(1, math.ceil(service * (self.queue_depth + 1) / self.workers))
+
+    def _admit(self):
+        with self._lock:
+            if self.in_flight >= self.workers + self.queue_size:
+                self.rejected += 1
+                raise QueueFullError(self.retry_after())
+            self.in_flight += 1
+            self.submitted += 1
+
+    async def run(self, func_path, *args):
+        # Raises QueueFullError instead of queueing past workers + queue_size, and
+        # PoolRestartingError when a worker crash broke the pool under this request
+        executor = self._get_executor()
+        self._admit()
+        try:
+            loop = asyncio.get_running_loop()
+            result, wait_time, service_time = await loop.run_in_executor(
+                executor, _run_task, func_path, time.time(), args
+            )
+        except BrokenProcessPool:
+            self.failed += 1
+            self._restart(executor)
+            raise PoolRestartingError(self.retry_after())
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+        self.wait_times.append(wait_time)
+        self.service_times.append(service_time)
+        return result
+
+    def metrics(self):
+        wait_times = list(self.wait_times)
+        service_times = list(self.service_times)
+        return {
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "queue_depth": self.queue_depth,
+            "in_flight": self.in_flight,
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+            "failed": self.failed,
+            "restarts": self.restarts,
+            "wait_time_ms": {
+                "p50": round(_percentile(wait_times, 0.5) * 1000, 2),
+                "p99": round(_percentile(wait_times, 0.99) * 1000, 2),
+            },
+            "service_time_ms": {
+                "p50": round(_percentile(service_times, 0.5) * 1000, 2),
+                "p99": round(_percentile(service_times, 0.99) * 1000, 2),
+            },
+        }
+
+
+# Shared pool for the vision routes (started on first use or at preload)
+inference_pool = InferencePool()
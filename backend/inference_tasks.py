@@ -0,0 +1,101 @@
+import cv2
+from inference import engine, prepare_batch, prepare_roi, EMOTION_LABELS
+from model_registry import registry
+from face_tracker import MAX_FACES
+from image_decode import decode_image, detection_input, image_size
+
+# Entry points run in the inference pool's worker processes (inference_pool.py),
+# referenced as "inference_tasks.<function>". Only the model and decode modules are
+# imported here: vision.py also sets up the emotion store (log directory, aggregates
+# snapshot), which every spawned worker would otherwise repeat.
+
+
+def analyze_emotion_ensemble(face_roi):
+    try:
+        # Single batched pass over every configured emotion model
+        return engine.analyze(prepare_batch([face_roi]))["vote"]
+    except Exception as e:
+        print(f"⚠ Error analyzing emotion: {e}")
+        return "Neutral"
+
+
+def detect_face_boxes(img, max_faces=1, haar_fallback=True):
+    # Face boxes in img's pixels, detected on a copy no larger than DETECT_MAX_SIDE
+    small, scale = detection_input(img)
+    h, w = img.shape[:2]
+    face_bboxes = []
+
+    results = registry.face_detection.process(cv2.cvtColor(small, cv2.COLOR_BGR2RGB))
+    if results.detections:
+        for detection in results.detections[:max_faces]:
+            # Relative boxes map straight back to full resolution
+            bboxC = detection.location_data.relative_bounding_box
+            x, y = max(0, int(bboxC.xmin * w)), max(0, int(bboxC.ymin * h))
+            face_bboxes.append((x, y, int(bboxC.width * w), int(bboxC.height * h)))
+
+    # If MediaPipe fails, use Haar Cascade
+    if not face_bboxes and haar_fallback:
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        min_side = max(1, int(50 * scale))
+        boxes = registry.face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=4, minSize=(min_side, min_side))
+        face_bboxes = [tuple(int(v / scale) for v in box) for box in boxes[:max_faces]]
+
+    return face_bboxes
+
+
+def extract_face_roi(contents):
+    # Read image (reduced-size decode for large uploads) and preprocess
+    img = decode_image(contents)
+
+    # Get face ROI (first face; the whole image when none is found)
+    face_roi = img
+    face_bboxes = detect_face_boxes(img, haar_fallback=False)
+    if face_bboxes:
+        x, y, w_box, h_box = face_bboxes[0]
+        if img[y:y + h_box, x:x + w_box].size > 0:
+            face_roi = img[y:y + h_box, x:x + w_box]
+
+    # Fixed-size crop, ready to be batched with crops from other requests
+    return prepare_roi(face_roi)
+
+
+def classify_faces(face_rois):
+    # One forward pass over crops collected from concurrent requests
+    probabilities, dominant = engine.predict(prepare_batch(face_rois))
+    return dominant
+
+
+def detect_mood_from_image(contents):
+    # Perform emotion detection
+    return analyze_emotion_ensemble(extract_face_roi(contents))
+
+
+def analyze_frame(contents):
+    # WebSocket ingest: decode a client JPEG / WebP frame and classify every face in one pass
+    img = decode_image(contents)
+    face_bboxes = detect_face_boxes(img, max_faces=MAX_FACES)
+    face_bboxes = [(x, y, w_box, h_box) for x, y, w_box, h_box in face_bboxes if img[y:y + h_box, x:x + w_box].size > 0]
+    if not face_bboxes:
+        return {"faces": []}
+
+    # Boxes go back to the client in the coordinates of the frame it sent
+    size = image_size(contents)
+    factor = max(size) / max(img.shape[:2]) if size else 1.0
+
+    probabilities, dominant = engine.predict(prepare_batch([img[y:y + h_box, x:x + w_box] for x, y, w_box, h_box in face_bboxes]))
+    return {
+        "faces": [
+            {
+                "box": [int(v * factor) for v in box],
+                "emotion": label,
+                "scores": {emotion: round(float(p), 1) for emotion, p in zip(EMOTION_LABELS, row)},
+            }
+            for box, row, label in zip(face_bboxes, probabilities, dominant)
+        ]
+    }
+
+
+def init_inference_worker():
+    # Inference pool worker: load the models /mood_detect needs once per process
+    registry.get("face_detection")
+    registry.get("emotion")
@@ -0,0 +1,188 @@
+import asyncio
+import os
+import threading
+import time
+from sortedcontainers import SortedList
+from starlette.concurrency import run_in_threadpool
+from database import users_collection
+
+# In-memory XP leaderboard. Users who haven't opted out are kept in a SortedList keyed
+# by (-xp, user_id), so top-N is a slice, and a user's rank (1 + users with strictly
+# more XP, as the old count_documents query defined it) and neighbours are O(log n)
+# bisections instead of a sort and a count over the users collection. gamify.py updates
+# it on every XP / badge / opt-out write. Each worker process holds its own copy, so it
+# is also reloaded from Mongo every LEADERBOARD_RESYNC_SECONDS to pick up writes made
+# by other workers. Writes made while a reload is reading Mongo are buffered and
+# replayed on top of the new snapshot, so they aren't lost when it is swapped in.
+
+LEADERBOARD_RESYNC_SECONDS = float(os.getenv("LEADERBOARD_RESYNC_SECONDS", "300"))
+
+# Fields read from the users collection and returned per entry
+LEADERBOARD_PROJECTION = {"name": 1, "xp": 1, "level": 1, "badges": 1, "leaderboard_opt_out": 1}
+
+
+class Leaderboard:
+    def __init__(self):
+        self._ranked = SortedList()
+        # user id -> {"_id", "name", "xp", "level", "badges"} for every ranked user
+        self._entries = {}
+        self._lock = threading.Lock()
+        # ("update", user_id, fields), ("remove", user_id, None) and ("badge", user_id,
+        # badge_id) calls made while a load is reading users; None when not loading
+        self._replay = None
+        self.loaded_at = None
+        self.updates = 0
+
+    def load(self, users):
+        # Rebuild from user documents (an iterable / cursor with LEADERBOARD_PROJECTION)
+        with self._lock:
+            self._replay = []
+        try:
+            entries = self._read(users)
+        except Exception:
+            with self._lock:
+                self._replay = None
+            raise
+        ranked = SortedList((-entry["xp"], user_id) for user_id, entry in entries.items())
+        with self._lock:
+            for op, user_id, arg in self._replay:
+                if op == "remove":
+                    self._remove(entries, ranked, user_id)
+                elif op == "badge":
+                    self._add_badge(entries, user_id, arg)
+                elif arg.get("xp", 0) >= entries.get(user_id, {}).get("xp", 0):
+                    # XP only grows: a snapshot read after a newer write keeps that write
+                    self._update(entries, ranked, user_id, arg)
+            self._replay = None
+            self._entries = entries
+            self._ranked = ranked
+            self.loaded_at = time.time()
+        return len(entries)
+
+    def _read(self, users):
+        entries = {}
+        for user in users:
+            if user.get("leaderboard_opt_out"):
+                continue
+            user_id = str(user["_id"])
+            entries[user_id] = {
+                "_id": user_id,
+                "name": user.get("name", ""),
+                "xp": user.get("xp", 0),
+                "level": user.get("level", 1),
+                "badges": user.get("badges", []),
+            }
+        return entries
+
+    def needs_resync(self):
+        return self.loaded_at is None or time.time() - self.loaded_at > LEADERBOARD_RESYNC_SECONDS
+
+    def update(self, user_id, **fields):
+        # Apply changed fields (xp, level, badges, name) to a ranked user, adding them if new
+        user_id = str(user_id)
+        with self._lock:
+            self._update(self._entries, self._ranked, user_id, fields)
+            if self._replay is not None:
+                self._replay.append(("update", user_id, fields))
+            self.updates += 1
+
+    def remove(self, user_id):
+        # Opted out: no longer ranked or shown
+        user_id = str(user_id)
+        with self._lock:
+            if self._remove(self._entries, self._ranked, user_id):
+                self.updates += 1
+            if self._replay is not None:
+                self._replay.append(("remove", user_id, None))
+
+    def add_badge(self, user_id, badge_id):
+        user_id = str(user_id)
+        with self._lock:
+            self._add_badge(self._entries, user_id, badge_id)
+            if self._replay is not None:
+                self._replay.append(("badge", user_id, badge_id))
+
+    @staticmethod
+    def _update(entries, ranked, user_id, fields):
+        entry = entries.get(user_id)
+        if entry is None:
+            entry = entries[user_id] = {"_id": user_id, "name": "", "xp": 0, "level": 1, "badges": []}
+        else:
+            ranked.remove((-entry["xp"], user_id))
+        entry.update(fields)
+        ranked.add((-entry["xp"], user_id))
+
+    @staticmethod
+    def _add_badge(entries, user_id, badge_id):
+        entry = entries.get(user_id)
+        if entry is not None and badge_id not in entry["badges"]:
+            entry["badges"] = entry["badges"] + [badge_id]
+
+    @staticmethod
+    def _remove(entries, ranked, user_id):
+        entry = entries.pop(user_id, None)
+        if entry is not None:
+            ranked.remove((-entry["xp"], user_id))
+        return entry is not None
+
+    def __contains__(self, user_id):
+        return str(user_id) in self._entries
+
+    def top(self, limit=10):
+        with self._lock:
+            return [dict(self._entries[user_id]) for _, user_id in self._ranked.islice(0, limit)]
+
+    def rank(self, user_id):
+        # 1 + number of users with strictly more XP; None when not ranked
+        with self._lock:
+            entry = self._entries.get(str(user_id))
+            if entry is None:
+                return None
+            # "" sorts before every id, so this counts only strictly higher XP
+            return self._ranked.bisect_left((-entry["xp"], "")) + 1
+
+    def neighbors(self, user_id, count=2):
+        # Up to `count` users ranked directly above and below, with the user in the middle
+        user_id = str(user_id)
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return []
+            position = self._ranked.index((-entry["xp"], user_id))
+            window = self._ranked.islice(max(0, position - count), position + count + 1)
+            return [dict(self._entries[neighbor_id]) for _, neighbor_id in window]
+
+    def metrics(self):
+        return {
+            "users": len(self._entries),
+            "updates": self.updates,
+            "loaded_at": self.loaded_at,
+        }
+
+
+leaderboard = Leaderboard()
+_resync_task = None
+
+
+def resync():
+    # Blocking full reload from the users collection
+    return leaderboard.load(users_collection.find({}, LEADERBOARD_PROJECTION))
+
+
+async def _resync():
+    try:
+        count = await run_in_threadpool(resync)
+        print(f"🏆 Leaderboard loaded: {count} ranked users")
+    except Exception as e:
+        print(f"⚠️ Leaderboard resync failed: {e}")
+
+
+async def ensure_fresh():
+    # The first call waits for the initial load; later resyncs run in the background
+    # while the current copy keeps serving. leaderboard.loaded_at stays None if the
+    # initial load failed.
+    global _resync_task
+    if leaderboard.needs_resync() and (_resync_task is None or _resync_task.done()):
+        _resync_task = asyncio.ensure_future(_resync())
+    if leaderboard.loaded_at is None:
+        await _resync_task
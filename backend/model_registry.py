@@ -0,0 +1,197 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+# cv2, mediapipe, dlib and TensorFlow are imported inside the loaders so that
+# importing the registry (and its health routes) stays cheap for core API workers
+
+router = APIRouter()
+
+# Dlib for High Precision Face Landmark Detection
+DLIB_LANDMARK_PATH = "models/shape_predictor_68_face_landmarks.dat"
+
+# Models that may fail to load without making the service unready
+OPTIONAL_MODELS = {"dlib_detector", "dlib_predictor"}
+
+# Synthetic frame used for warm-up inference (same size as the webcam stream)
+WARMUP_FRAME_SIZE = (720, 1280)
+
+# MediaPipe graphs keep tracking state, so each webcam session creates its own with
+# create(); warm-up runs a throwaway set instead of holding shared copies
+SESSION_GRAPHS = ("face_detection", "face_mesh", "pose", "hands")
+
+
+def _load_emotion():
+    from inference import engine
+    return engine.load()
+
+def _load_face_detection():
+    import mediapipe as mp
+    return mp.solutions.face_detection.FaceDetection(min_detection_confidence=0.2)
+
+def _load_face_mesh():
+    import mediapipe as mp
+    return mp.solutions.face_mesh.FaceMesh(max_num_faces=5, min_detection_confidence=0.6)
+
+def _load_pose():
+    import mediapipe as mp
+    return mp.solutions.pose.Pose(min_detection_confidence=0.6, min_tracking_confidence=0.6)
+
+def _load_hands():
+    import mediapipe as mp
+    return mp.solutions.hands.Hands(min_detection_confidence=0.6, min_tracking_confidence=0.6)
+
+def _load_face_cascade():
+    # OpenCV Haar Cascade (Backup)
+    import cv2
+    return cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_alt2.xml")
+
+def _load_dlib_detector():
+    import dlib
+    return dlib.get_frontal_face_detector()
+
+def _load_dlib_predictor():
+    import dlib
+    return dlib.shape_predictor(DLIB_LANDMARK_PATH)
+
+
+LOADERS = {
+    "emotion": _load_emotion,
+    "face_detection": _load_face_detection,
+    "face_mesh": _load_face_mesh,
+    "pose": _load_pose,
+    "hands": _load_hands,
+    "face_cascade": _load_face_cascade,
+    "dlib_detector": _load_dlib_detector,
+    "dlib_predictor": _load_dlib_predictor,
+}
+
+
+class ModelRegistry:
+    def __init__(self, loaders):
+        self.loaders = loaders
+        self.models = {}
+        self.timings = {}
+        self.errors = {}
+        self.warmed_up = False
+        self.ready = threading.Event()
+        self._locks = {name: threading.Lock() for name in loaders}
+
+    def __getattr__(self, name):
+        # registry.face_mesh etc. resolve to the loaded model
+        if name in self.__dict__.get("loaders", {}):
+            return self.get(name)
+        raise AttributeError(name)
+
+    def get(self, name):
+        # Loads on first use if preloading was skipped or is still running
+        if name in self.models:
+            return self.models[name]
+        with self._locks[name]:
+            if name not in self.models:
+                self._load(name)
+        return self.models[name]
+
+    def create(self, name):
+        # Fresh, unshared instance, for stateful graphs (tracking) owned by one stream
+        return self.loaders[name]()
+
+    def _load(self, name):
+        start = time.perf_counter()
+        try:
+            self.models[name] = self.loaders[name]()
+            self.errors.pop(name, None)
+        except Exception as e:
+            if name not in OPTIONAL_MODELS:
+                raise
+            print(f"⚠️ {name} failed to load: {e}")
+            self.models[name] = None
+            self.errors[name] = str(e)
+        self.timings[name] = round(time.perf_counter() - start, 3)
+        print(f"📦 Loaded {name} in {self.timings[name]}s")
+
+    def load_all(self, names=None, parallel=True):
+        # names: shared models this process serves from (default: every loader)
+        names = list(self.loaders if names is None else names)
+        start = time.perf_counter()
+        try:
+            if parallel and names:
+                with ThreadPoolExecutor(max_workers=len(names)) as pool:
+                    list(pool.map(self.get, names))
+            else:
+                for name in names:
+                    self.get(name)
+            self.warm_up()
+        except Exception as e:
+            self.errors["startup"] = str(e)
+            print(f"❌ Model preloading failed: {e}")
+            return False
+
+        self.timings["total"] = round(time.perf_counter() - start, 3)
+        print(f"✅ Models ready in {self.timings['total']}s")
+        self.ready.set()
+        return True
+
+    def warm_up(self):
+        # Run the loaded models and one set of session graphs on a synthetic frame, so the
+        # first request / webcam frame doesn't pay for model files and kernels loading
+        import cv2
+        import numpy as np
+
+        start = time.perf_counter()
+        frame = np.zeros((*WARMUP_FRAME_SIZE, 3), dtype=np.uint8)
+        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+        for name in SESSION_GRAPHS:
+            graph = self.models.get(name) or self.create(name)
+            graph.process(rgb_frame)
+            if name not in self.models:
+                graph.close()
+        if self.models.get("face_cascade") is not None:
+            self.face_cascade.detectMultiScale(gray_frame, scaleFactor=1.1, minNeighbors=4, minSize=(50, 50))
+        if "emotion" in self.models:
+            from inference import engine, ROI_SIZE
+            engine.predict(np.zeros((1, ROI_SIZE[1], ROI_SIZE[0], 3), dtype=np.uint8))
+
+        self.warmed_up = True
+        self.timings["warm_up"] = round(time.perf_counter() - start, 3)
+        print(f"🔥 Warm-up inference done in {self.timings['warm_up']}s")
+
+    def start_preload(self):
+        # Load in the background so /healthz answers while models are loading
+        parallel = os.getenv("PRELOAD_PARALLEL", "1") == "1"
+        thread = threading.Thread(target=self.load_all, kwargs={"parallel": parallel}, daemon=True, name="model-preload")
+        thread.start()
+        return thread
+
+    def mark_ready(self):
+        # Workers that serve no vision routes, or load models lazily, are ready straight away
+        self.ready.set()
+
+    def status(self):
+        return {
+            "ready": self.ready.is_set(),
+            "warmed_up": self.warmed_up,
+            "loaded": sorted(name for name, model in self.models.items() if model is not None),
+            "timings": self.timings,
+            "errors": self.errors,
+        }
+
+
+registry = ModelRegistry(LOADERS)
+
+
+@router.get("/healthz")
+def healthz():
+    return {"status": "ok"}
+
+@router.get("/readyz")
+def readyz():
+    status = registry.status()
+    if not status["ready"]:
+        return JSONResponse(status_code=503, content=status)
+    return status
@@ -4,13 +4,14 @@ from pymongo import MongoClient
 from bson.objectid import ObjectId
 from apimodels import SettingsUpdate
 from database import users_collection
+from user_cache import get_user, invalidate_user
 from bson.objectid import ObjectId
 
 router = APIRouter()
 
 @router.get("/user/settings/email-notifications/{user_id}")
 def get_email_notifications(user_id: str):
-    user = users_collection.find_one({"_id": ObjectId(user_id)})
+    user = get_user(user_id, "GET /user/settings/email-notifications", users_collection)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -22,6 +23,7 @@ def update_user_settings(data: SettingsUpdate):
         {"_id": ObjectId(data.user_id)},
         {"$set": {data.setting: data.value}}
     )
+    invalidate_user(data.user_id)
 
     if update_result.modified_count == 0:
         raise HTTPException(status_code=400, detail="Setting not updated")
@@ -0,0 +1,96 @@
+from datetime import datetime, timezone
+
+# Server-side activity streaks. Each user document keeps a bitmap of active days (one bit
+# per UTC day, packed 32 days to an integer under activity.w<day // 32>) next to the
+# running stats.streak / stats.longest_streak / stats.last_active_day. A mood or journal
+# write sets today's bit and advances the streak in the same atomic update (see
+# badge_engine.event_update), so current and longest streak are read straight off the
+# document and last-N-day activity touches N / 32 words, however long the history.
+
+WORD_DAYS = 32
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def day_number(when):
+    # Days since the epoch, UTC; naive datetimes are taken as UTC (the repo stores utcnow())
+    if when.tzinfo is not None:
+        when = when.astimezone(timezone.utc).replace(tzinfo=None)
+    return (when - _EPOCH).days
+
+
+def word_field(day):
+    return f"activity.w{day // WORD_DAYS}"
+
+
+def streak_stages(today):
+    # Pipeline stages marking `today` active. Expressions in a $set stage see the document
+    # as it was, so the streak compares against the previous active day.
+    last_day = "$stats.last_active_day"
+    word = {"$ifNull": [f"${word_field(today)}", 0]}
+    mask = 1 << (today % WORD_DAYS)
+    return [
+        {"$set": {
+            "stats.streak": {"$switch": {
+                "branches": [
+                    {"case": {"$eq": [last_day, today]}, "then": {"$ifNull": ["$stats.streak", 1]}},
+                    {"case": {"$eq": [last_day, today - 1]}, "then": {"$add": [{"$ifNull": ["$stats.streak", 0]}, 1]}},
+                ],
+                "default": 1
+            }},
+            "stats.last_active_day": {"$max": [{"$ifNull": [last_day, today]}, today]},
+            # Set the day's bit with arithmetic ($bitOr needs MongoDB 6.3+): add the mask
+            # unless floor(word / mask) is already odd
+            word_field(today): {"$cond": [
+                {"$eq": [{"$mod": [{"$floor": {"$divide": [word, mask]}}, 2]}, 1]},
+                word,
+                {"$toLong": {"$add": [word, mask]}}
+            ]}
+        }},
+        {"$set": {"stats.longest_streak": {"$max": [{"$ifNull": ["$stats.longest_streak", 0]}, "$stats.streak"]}}},
+    ]
+
+
+def bitmap_words(days):
+    # {"w<index>": packed bits} for a set of day numbers (backfill, benchmarks)
+    words = {}
+    for day in days:
+        key = f"w{day // WORD_DAYS}"
+        words[key] = words.get(key, 0) | 1 << (day % WORD_DAYS)
+    return words
+
+
+def streaks(days):
+    # (streak ending on the last active day, longest streak) over a set of day numbers
+    current = longest = 0
+    previous = None
+    for day in sorted(days):
+        current = current + 1 if previous == day - 1 else 1
+        longest = max(longest, current)
+        previous = day
+    return current, longest
+
+
+def active(user, day):
+    word = user.get("activity", {}).get(f"w{day // WORD_DAYS}", 0)
+    return bool(word >> (day % WORD_DAYS) & 1)
+
+
+def recent_activity(user, days=7, today=None):
+    # Active / inactive for each of the last `days` days, oldest first
+    today = day_number(datetime.utcnow()) if today is None else today
+    return [active(user, day) for day in range(today - days + 1, today + 1)]
+
+
+def streak_summary(user, days=7, today=None):
+    today = day_number(datetime.utcnow()) if today is None else today
+    stats = user.get("stats", {})
+    last_active_day = stats.get("last_active_day")
+    # The streak is still alive until a whole day passes without activity
+    alive = last_active_day is not None and last_active_day >= today - 1
+    return {
+        "current_streak": stats.get("streak", 0) if alive else 0,
+        "longest_streak": stats.get("longest_streak", 0),
+        "last_active_day": last_active_day,
+        "recent_activity": recent_activity(user, days, today),
+    }
@@ -0,0 +1,322 @@
+import threading
+import time
+from collections import deque
+import cv2
+import numpy as np
+from frame_ring import FrameRing
+
+# Staged webcam pipeline: capture thread -> analysis worker(s) -> encode thread,
+# connected by small bounded queues that drop stale frames. Capture and encoding run
+# at camera rate; the heavy landmark models run at their own rate and their latest
+# results are overlaid on every frame. Frames live in a pooled FrameRing and are
+# passed between stages by reference.
+
+# Frames per stage used for the FPS / latency figures
+STATS_WINDOW = 60
+
+
+class LatestQueue:
+    # Bounded queue that drops its oldest item instead of blocking the producer
+    def __init__(self, maxsize=1, on_drop=None):
+        self._items = deque(maxlen=maxsize)
+        self._cond = threading.Condition()
+        self.on_drop = on_drop
+        self.dropped = 0
+
+    def put(self, item):
+        dropped = None
+        with self._cond:
+            if len(self._items) == self._items.maxlen:
+                self.dropped += 1
+                dropped = self._items[0]
+            self._items.append(item)
+            self._cond.notify()
+        if dropped is not None and self.on_drop is not None:
+            self.on_drop(dropped)
+
+    def clear(self):
+        with self._cond:
+            items = list(self._items)
+            self._items.clear()
+        if self.on_drop is not None:
+            for item in items:
+                self.on_drop(item)
+
+    def get(self, timeout=None):
+        # Returns None on timeout
+        with self._cond:
+            if not self._items:
+                self._cond.wait(timeout)
+            return self._items.popleft() if self._items else None
+
+
+def _call(callback):
+    if callback is not None:
+        try:
+            callback()
+        except Exception as e:
+            print(f"⚠ Error in dropped job callback: {e}")
+
+
+class LatestWinsSubmitter:
+    # Bounded background submission: per key (e.g. session and task type) at most one
+    # job runs and one waits. A newer submission replaces the waiting job, and a job
+    # that waited longer than max_age is discarded instead of run, so results are never
+    # staler than that and nothing accumulates however slow the backend is.
+    def __init__(self, run, max_age):
+        # run(job, done) starts job in the background and arranges for done() to be
+        # called once it has finished; returning False means the backend rejected it
+        self.run = run
+        self.max_age = max_age
+        self._pending = {}  # key -> (job, submitted at, on_drop) or None while only running
+        self._lock = threading.Lock()
+        self.counts = {}
+
+    def _count(self, key, name):
+        counts = self.counts.setdefault(key[-1], {"submitted": 0, "processed": 0, "dropped": 0, "expired": 0})
+        counts[name] += 1
+
+    def submit(self, key, job, on_drop=None):
+        # on_drop() runs if the job never runs: replaced, expired or rejected by the backend
+        superseded = None
+        with self._lock:
+            self._count(key, "submitted")
+            idle = key not in self._pending
+            if idle:
+                self._pending[key] = None
+            else:
+                superseded = self._pending[key]
+                if superseded is not None:
+                    self._count(key, "dropped")
+                self._pending[key] = (job, time.perf_counter(), on_drop)
+        if superseded is not None:
+            _call(superseded[2])
+        if idle:
+            self._start(key, job, on_drop)
+
+    def _start(self, key, job, on_drop=None):
+        try:
+            started = self.run(job, lambda: self._done(key, "processed"))
+        except Exception as e:
+            print(f"⚠ Error submitting background job: {e}")
+            started = False
+        if started is False:
+            _call(on_drop)
+            self._done(key, "dropped")
+
+    def _done(self, key, outcome):
+        expired = []
+        with self._lock:
+            self._count(key, outcome)
+            while True:
+                pending = self._pending.get(key)
+                if pending is None:
+                    # Idle keys are forgotten, so long sessions don't grow this map
+                    self._pending.pop(key, None)
+                    job = None
+                    break
+                self._pending[key] = None
+                job, submitted_at, on_drop = pending
+                if time.perf_counter() - submitted_at <= self.max_age:
+                    break
+                self._count(key, "expired")
+                expired.append(on_drop)
+                job = None
+        for callback in expired:
+            _call(callback)
+        if job is not None:
+            self._start(key, job, on_drop)
+
+    def snapshot(self):
+        with self._lock:
+            return {"active": len(self._pending), "tasks": {name: dict(counts) for name, counts in self.counts.items()}}
+
+
+class StageStats:
+    def __init__(self, name):
+        self.name = name
+        self.processed = 0
+        self._times = deque(maxlen=STATS_WINDOW)
+        self._latencies = deque(maxlen=STATS_WINDOW)
+
+    def record(self, latency):
+        self.processed += 1
+        self._times.append(time.perf_counter())
+        self._latencies.append(latency)
+
+    @property
+    def fps(self):
+        times = list(self._times)
+        if len(times) < 2 or times[-1] == times[0]:
+            return 0.0
+        return (len(times) - 1) / (times[-1] - times[0])
+
+    def snapshot(self):
+        latencies = list(self._latencies)
+        return {
+            "fps": round(self.fps, 2),
+            "latency_ms": round(1000 * sum(latencies) / len(latencies), 2) if latencies else 0.0,
+            "processed": self.processed,
+        }
+
+
+class FramePipeline:
+    def __init__(self, read_frame, analyze, render, analysis_workers=1, jpeg_quality=80):
+        # read_frame() -> (ok, frame); analyze(frame) -> results; render(frame, results, stats) draws in place
+        self.read_frame = read_frame
+        self.analyze = analyze
+        self.render = render
+        self.analysis_workers = analysis_workers
+        self.encode_params = [int(cv2.IMWRITE_JPEG_QUALITY), jpeg_quality]
+
+        # Created on the first frame, once the frame size is known. Every queued or
+        # in-progress frame holds a slot: queues + one per worker + one being captured.
+        self.ring = None
+        self.ring_slots = 1 + 2 + 1 + 2 * analysis_workers + 1
+        self._render_buffer = None
+        self.bytes_copied = 0
+        # Analysis workers waiting for a frame; frames are only handed to analysis when
+        # one is, so the frames analysis skips can be drawn on in place by encode
+        self._idle_workers = 0
+        self._idle_lock = threading.Lock()
+
+        self.analysis_queue = LatestQueue(1, on_drop=lambda slot: slot.release())
+        self.encode_queue = LatestQueue(2, on_drop=lambda slot: slot.release())
+        self.stats = {name: StageStats(name) for name in ("capture", "analysis", "encode")}
+
+        self.latest_results = None
+        self.latest_jpeg = None
+        self.frame_seq = 0
+        self._frame_cond = threading.Condition()
+        self._running = threading.Event()
+        self._threads = []
+
+    def start(self):
+        self._running.set()
+        targets = [("capture", self._capture_loop), ("encode", self._encode_loop)]
+        targets += [(f"analysis-{i}", self._analysis_loop) for i in range(self.analysis_workers)]
+        for name, target in targets:
+            thread = threading.Thread(target=target, daemon=True, name=f"webcam-{name}")
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self):
+        self._running.clear()
+        with self._frame_cond:
+            self._frame_cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout=2)
+        self._threads = []
+        self.analysis_queue.clear()
+        self.encode_queue.clear()
+        if self.ring is not None:
+            self.ring.close()
+
+    @property
+    def running(self):
+        return self._running.is_set()
+
+    def _acquire_slot(self, shape):
+        if self.ring is None or self.ring.shape != shape:
+            if self.ring is not None:
+                # Freed once the stages still holding its slots release them
+                self.ring.close()
+            self.ring = FrameRing(shape, self.ring_slots)
+        return self.ring.acquire()
+
+    def _capture_loop(self):
+        while self.running:
+            start = time.perf_counter()
+            ret, frame = self.read_frame()
+            if not ret:
+                print("❌ Frame not captured. Retrying...")
+                time.sleep(0.01)
+                continue
+            slot = self._acquire_slot(frame.shape)
+            if slot is None:
+                # Every slot is still referenced downstream: skip this frame
+                continue
+            cv2.flip(frame, 1, dst=slot.array)  # Flip the frame horizontally, straight into the slot
+            slot.captured_at = time.perf_counter()
+            self.stats["capture"].record(slot.captured_at - start)
+
+            # Both stages share the slot; each holds its own reference
+            if self._idle_workers > 0:
+                self.analysis_queue.put(slot.retain())
+            self.encode_queue.put(slot)
+
+    def _analysis_loop(self):
+        while self.running:
+            with self._idle_lock:
+                self._idle_workers += 1
+            slot = self.analysis_queue.get(timeout=0.5)
+            with self._idle_lock:
+                self._idle_workers -= 1
+            if slot is None:
+                continue
+            start = time.perf_counter()
+            try:
+                self.latest_results = self.analyze(slot.array)
+            except Exception as e:
+                print(f"⚠ Error analyzing frame: {e}")
+                continue
+            finally:
+                slot.release()
+            self.stats["analysis"].record(time.perf_counter() - start)
+
+    def _render_target(self, slot):
+        # Draw in place when encode holds the only reference; otherwise analysis may
+        # still be reading the frame, so draw on a reused copy
+        if slot.refs == 1:
+            return slot.array
+        if self._render_buffer is None or self._render_buffer.shape != slot.array.shape:
+            self._render_buffer = np.empty_like(slot.array)
+        np.copyto(self._render_buffer, slot.array)
+        self.bytes_copied += slot.array.nbytes
+        return self._render_buffer
+
+    def _encode_loop(self):
+        while self.running:
+            slot = self.encode_queue.get(timeout=0.5)
+            if slot is None:
+                continue
+            captured_at = slot.captured_at
+            try:
+                frame = slot.array
+                if self.latest_results is not None:
+                    frame = self._render_target(slot)
+                    self.render(frame, self.latest_results, self.stats)
+                ok, buffer = cv2.imencode(".jpg", frame, self.encode_params)
+            finally:
+                slot.release()
+            if not ok:
+                continue
+
+            with self._frame_cond:
+                self.latest_jpeg = buffer.tobytes()
+                self.frame_seq += 1
+                self._frame_cond.notify_all()
+            # Capture-to-encoded latency
+            self.stats["encode"].record(time.perf_counter() - captured_at)
+
+    def wait_frame(self, last_seq, timeout=1.0):
+        # Newest encoded frame after last_seq; slow consumers skip frames instead of queueing them
+        with self._frame_cond:
+            if self.frame_seq == last_seq and self.running:
+                self._frame_cond.wait(timeout)
+            return self.frame_seq, self.latest_jpeg
+
+    def snapshot(self):
+        stats = {name: stage.snapshot() for name, stage in self.stats.items()}
+        stats["analysis"]["dropped"] = self.analysis_queue.dropped
+        stats["encode"]["dropped"] = self.encode_queue.dropped
+        captured = self.stats["capture"].processed
+        stats["frames"] = {
+            "ring_slots": self.ring_slots,
+            "ring_exhausted": self.ring.exhausted if self.ring is not None else 0,
+            "copied_bytes_per_frame": round(self.bytes_copied / captured) if captured else 0,
+        }
+        if hasattr(self.analyze, "snapshot"):
+            stats["analyzers"] = self.analyze.snapshot()
+        return stats
@@ -0,0 +1,192 @@
+import os
+import threading
+import time
+import cv2
+import numpy as np
+from stream_pipeline import FramePipeline
+
+# Multi-session stream server: one capture + pipeline per video source, shared by
+# every viewer of that source. Frames are encoded once per source and fanned out;
+# capture is torn down when the last subscriber leaves.
+#
+# Sources:
+#   camera:<index>    local camera (default camera:0)
+#   file:<path>       video file, looped at its own frame rate (load testing)
+#   synthetic[:fps]   generated frames, no camera needed (load testing)
+
+DEFAULT_SOURCE = "camera:0"
+FRAME_SIZE = (1280, 720)
+
+# File sources read from the server's disk, so they're opt-in
+ALLOW_FILE_SOURCES = os.getenv("STREAM_ALLOW_FILE_SOURCES", "0") == "1"
+
+
+class SourceError(Exception):
+    pass
+
+
+class CameraSource:
+    def __init__(self, index):
+        backend = cv2.CAP_DSHOW if os.name == "nt" else cv2.CAP_ANY
+        self.cap = cv2.VideoCapture(index, backend)
+        if not self.cap.isOpened():
+            raise SourceError("❌ Camera not detected")
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, FRAME_SIZE[0])
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, FRAME_SIZE[1])
+
+    def read(self):
+        return self.cap.read()
+
+    def release(self):
+        self.cap.release()
+
+
+class FileSource:
+    def __init__(self, path):
+        self.cap = cv2.VideoCapture(path)
+        if not self.cap.isOpened():
+            raise SourceError(f"❌ Cannot open video file: {path}")
+        self.interval = 1.0 / (self.cap.get(cv2.CAP_PROP_FPS) or 30.0)
+        self._next = time.perf_counter()
+
+    def read(self):
+        # Paced to the file's frame rate, looping at the end
+        delay = self._next - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        self._next = max(self._next, time.perf_counter() - self.interval) + self.interval
+
+        ret, frame = self.cap.read()
+        if not ret:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read()
+        return ret, frame
+
+    def release(self):
+        self.cap.release()
+
+
+class SyntheticSource:
+    def __init__(self, fps=30.0):
+        self.interval = 1.0 / fps
+        self.index = 0
+        self._next = time.perf_counter()
+        width, height = FRAME_SIZE
+        self._background = np.tile(np.linspace(40, 200, width, dtype=np.uint8)[np.newaxis, :, np.newaxis], (height, 1, 3))
+
+    def read(self):
+        delay = self._next - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        self._next = max(self._next, time.perf_counter() - self.interval) + self.interval
+
+        # A face-sized disc moving across a gradient
+        frame = self._background.copy()
+        width, height = FRAME_SIZE
+        x = int((self.index * 8) % width)
+        cv2.circle(frame, (x, height // 2), 120, (180, 200, 230), -1)
+        self.index += 1
+        return True, frame
+
+    def release(self):
+        pass
+
+
+def parse_source(spec):
+    # (kind, argument) for a valid spec, without opening anything
+    kind, _, arg = spec.partition(":")
+    if kind == "file" and not ALLOW_FILE_SOURCES:
+        raise SourceError("File sources are disabled")
+    try:
+        if kind == "camera":
+            return kind, int(arg or 0)
+        if kind == "synthetic":
+            return kind, float(arg or 30)
+    except ValueError:
+        raise SourceError(f"Invalid source: {spec}")
+    if kind == "file":
+        return kind, arg
+    raise SourceError(f"Unknown source: {spec}")
+
+
+def open_source(spec):
+    kind, arg = parse_source(spec)
+    if kind == "camera":
+        return CameraSource(arg)
+    if kind == "file":
+        return FileSource(arg)
+    return SyntheticSource(arg)
+
+
+class StreamSession:
+    def __init__(self, session_id, source, pipeline):
+        self.session_id = session_id
+        self.source = source
+        self.pipeline = pipeline
+        self.subscribers = 0
+        self.started_at = time.time()
+
+    def frames(self):
+        # Multipart MJPEG chunks of the shared encoded frames
+        seq = 0
+        while self.pipeline.running:
+            seq, frame_bytes = self.pipeline.wait_frame(seq)
+            if frame_bytes is None:
+                continue
+            yield (b"--frame\r\n" b"Content-Type: image/jpeg\r\n\r\n" + frame_bytes + b"\r\n")
+
+    def close(self):
+        self.pipeline.stop()
+        self.source.release()
+        if hasattr(self.pipeline.analyze, "close"):
+            self.pipeline.analyze.close()
+
+
+class SessionManager:
+    def __init__(self, make_analysis, render):
+        # make_analysis(session_id) -> analyze callable for the session's pipeline
+        self.make_analysis = make_analysis
+        self.render = render
+        self.sessions = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, spec=DEFAULT_SOURCE):
+        # The source spec is the session id: viewers of the same source share one session
+        with self._lock:
+            session = self.sessions.get(spec)
+            if session is None:
+                source = open_source(spec)
+                pipeline = FramePipeline(source.read, self.make_analysis(spec), self.render).start()
+                session = StreamSession(spec, source, pipeline)
+                self.sessions[spec] = session
+                print(f"🎥 Started stream session {spec}")
+            session.subscribers += 1
+            return session
+
+    def unsubscribe(self, session):
+        with self._lock:
+            session.subscribers -= 1
+            if session.subscribers > 0:
+                return
+            self.sessions.pop(session.session_id, None)
+        session.close()
+        print(f"🛑 Stopped stream session {session.session_id}")
+
+    def close_all(self):
+        with self._lock:
+            sessions, self.sessions = list(self.sessions.values()), {}
+        for session in sessions:
+            session.close()
+
+    def stats(self):
+        with self._lock:
+            sessions = list(self.sessions.values())
+        return [
+            {
+                "session": session.session_id,
+                "subscribers": session.subscribers,
+                "uptime_s": round(time.time() - session.started_at, 1),
+                "pipeline": session.pipeline.snapshot(),
+            }
+            for session in sessions
+        ]
@@ -1,5 +1,6 @@
 from fastapi import APIRouter, HTTPException
-from database import users_collection
+from database import async_users_collection as users_collection
+from user_cache import user_cache, aget_user, ainvalidate_user, THERAPIST_LIST
 from datetime import datetime
 from apimodels import TherapistProfile
 from bson import ObjectId
@@ -9,8 +10,8 @@ router = APIRouter()
 
 @router.get("/therapists")
 async def get_therapists():
-    try:
-        therapists = users_collection.find({"role": "therapist"})
+    async def load():
+        therapists = await users_collection.find({"role": "therapist"}).to_list(length=None)
         return [
             {
                 "id": str(t["_id"]),
@@ -22,6 +23,9 @@ async def get_therapists():
             }
             for t in therapists
         ]
+
+    try:
+        return await user_cache.aget(THERAPIST_LIST, load, "GET /therapists")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -29,8 +33,8 @@ async def get_therapists():
 @router.get("/therapists/{therapist_id}/profile")
 async def get_therapist_profile(therapist_id: str):
     try:
-        therapist = users_collection.find_one({"_id": ObjectId(therapist_id), "role": "therapist"})
-        if not therapist:
+        therapist = await aget_user(therapist_id, "GET /therapists/{id}/profile", users_collection)
+        if not therapist or therapist.get("role") != "therapist":
             raise HTTPException(status_code=404, detail="Therapist not found")
 
         return {
@@ -48,7 +52,7 @@ async def get_therapist_profile(therapist_id: str):
 @router.put("/therapists/{therapist_id}/profile")
 async def update_therapist_profile(therapist_id: str, profile: TherapistProfile):
     try:
-        therapist = users_collection.find_one({"_id": ObjectId(therapist_id), "role": "therapist"})
+        therapist = await users_collection.find_one({"_id": ObjectId(therapist_id), "role": "therapist"})
         if not therapist:
             raise HTTPException(status_code=404, detail="Therapist not found")
 
@@ -61,10 +65,11 @@ async def update_therapist_profile(therapist_id: str, profile: TherapistProfile)
             "updated_at": datetime.utcnow()
         }
 
-        result = users_collection.update_one(
+        result = await users_collection.update_one(
             {"_id": ObjectId(therapist_id)},
             {"$set": update_data}
         )
+        await ainvalidate_user(therapist_id)
 
         if result.modified_count == 0:
             raise HTTPException(status_code=404, detail="No changes made or therapist not found")
@@ -77,8 +82,8 @@ async def update_therapist_profile(therapist_id: str, profile: TherapistProfile)
 @router.get("/therapists/{therapist_id}/slots")
 async def get_therapist_slots(therapist_id: str):
     try:
-        therapist = users_collection.find_one({"_id": ObjectId(therapist_id), "role": "therapist"})
-        if not therapist:
+        therapist = await aget_user(therapist_id, "GET /therapists/{id}/slots", users_collection)
+        if not therapist or therapist.get("role") != "therapist":
             raise HTTPException(status_code=404, detail="Therapist not found")
 
         return therapist.get("availableSlots", [])
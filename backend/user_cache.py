@@ -0,0 +1,247 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+import bson
+from bson import ObjectId
+from database import users_collection, async_users_collection
+
+# Read-through cache for user documents and the therapist / patient listings. Entries
+# expire after USER_CACHE_TTL seconds and the in-process backend evicts least recently
+# used entries past USER_CACHE_MAX_ENTRIES. Set USER_CACHE_URL (redis://...) to share
+# the cache between workers through Redis or anything that speaks its protocol. Routes
+# that write to a user call invalidate_user(); the TTL bounds staleness from writers
+# that don't (gamification counters aren't served from here).
+
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "60"))
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000"))
+USER_CACHE_URL = os.getenv("USER_CACHE_URL", "")
+
+THERAPIST_LIST = "list:therapists"
+PATIENT_LIST = "list:patients"
+
+# Never cache credentials
+USER_PROJECTION = {"password": 0}
+
+_MISSING = object()
+
+
+class MemoryBackend:
+    def __init__(self, max_entries=USER_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        # key -> (expires at, value), least recently used first
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return _MISSING
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    async def aget(self, key):
+        return self.get(key)
+
+    async def aset(self, key, value, ttl):
+        self.set(key, value, ttl)
+
+    async def adelete(self, keys):
+        self.delete(keys)
+
+    def size(self):
+        return len(self._entries)
+
+
+class RedisBackend:
+    # Any client with redis-py's get / set(px=) / delete works, e.g. fakeredis locally.
+    # Values are BSON-encoded so ObjectIds and datetimes survive the round-trip.
+    def __init__(self, client, async_client=None, prefix="user_cache:"):
+        self.client = client
+        self.async_client = async_client
+        self.prefix = prefix
+        self.evictions = 0
+
+    def _decode(self, data):
+        return _MISSING if data is None else bson.decode(data)["v"]
+
+    def get(self, key):
+        return self._decode(self.client.get(self.prefix + key))
+
+    def set(self, key, value, ttl):
+        self.client.set(self.prefix + key, bson.encode({"v": value}), px=int(ttl * 1000))
+
+    def delete(self, keys):
+        if keys:
+            self.client.delete(*[self.prefix + key for key in keys])
+
+    # Without an async client these fall back to the blocking calls
+    async def aget(self, key):
+        if self.async_client is None:
+            return self.get(key)
+        return self._decode(await self.async_client.get(self.prefix + key))
+
+    async def aset(self, key, value, ttl):
+        if self.async_client is None:
+            return self.set(key, value, ttl)
+        await self.async_client.set(self.prefix + key, bson.encode({"v": value}), px=int(ttl * 1000))
+
+    async def adelete(self, keys):
+        if self.async_client is None:
+            return self.delete(keys)
+        if keys:
+            await self.async_client.delete(*[self.prefix + key for key in keys])
+
+    def size(self):
+        return None
+
+
+def make_backend(url=USER_CACHE_URL):
+    if not url:
+        return MemoryBackend()
+    try:
+        import redis
+        import redis.asyncio
+    except ImportError:
+        print("⚠️ USER_CACHE_URL is set but redis is not installed, using the in-process cache")
+        return MemoryBackend()
+    return RedisBackend(redis.Redis.from_url(url), redis.asyncio.Redis.from_url(url))
+
+
+class ReadThroughCache:
+    def __init__(self, backend, ttl=USER_CACHE_TTL):
+        self.backend = backend
+        self.ttl = ttl
+        # endpoint -> [lookups, hits]
+        self._stats = {}
+        self._lock = threading.Lock()
+        self.backend_errors = 0
+
+    def _count(self, endpoint, hit):
+        with self._lock:
+            stats = self._stats.setdefault(endpoint, [0, 0])
+            stats[0] += 1
+            stats[1] += hit
+
+    def _backend_error(self, e):
+        # A cache outage degrades to plain DB reads instead of failing the request
+        self.backend_errors += 1
+        print(f"⚠️ User cache backend error: {e}")
+
+    def get(self, key, load, endpoint):
+        # load() runs on a miss; None results aren't cached
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            self._backend_error(e)
+            value = _MISSING
+        self._count(endpoint, value is not _MISSING)
+        if value is not _MISSING:
+            return value
+        value = load()
+        if value is not None:
+            try:
+                self.backend.set(key, value, self.ttl)
+            except Exception as e:
+                self._backend_error(e)
+        return value
+
+    async def aget(self, key, load, endpoint):
+        # Async routes: load is a coroutine function
+        try:
+            value = await self.backend.aget(key)
+        except Exception as e:
+            self._backend_error(e)
+            value = _MISSING
+        self._count(endpoint, value is not _MISSING)
+        if value is not _MISSING:
+            return value
+        value = await load()
+        if value is not None:
+            try:
+                await self.backend.aset(key, value, self.ttl)
+            except Exception as e:
+                self._backend_error(e)
+        return value
+
+    def invalidate(self, *keys):
+        try:
+            self.backend.delete(keys)
+        except Exception as e:
+            self._backend_error(e)
+
+    async def ainvalidate(self, *keys):
+        try:
+            await self.backend.adelete(keys)
+        except Exception as e:
+            self._backend_error(e)
+
+    def metrics(self):
+        with self._lock:
+            endpoints = {
+                endpoint: {
+                    "lookups": lookups,
+                    "hits": hits,
+                    "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+                    "db_calls": lookups - hits,
+                    "db_calls_saved": hits,
+                }
+                for endpoint, (lookups, hits) in self._stats.items()
+            }
+        return {
+            "backend": type(self.backend).__name__,
+            "entries": self.backend.size(),
+            "evictions": self.backend.evictions,
+            "backend_errors": self.backend_errors,
+            "endpoints": endpoints,
+        }
+
+
+user_cache = ReadThroughCache(make_backend())
+
+
+def user_key(user_id):
+    return f"user:{user_id}"
+
+
+def get_user(user_id, endpoint, collection=None):
+    # User document without the password hash; raises on a malformed id. Routers pass
+    # their own users collection so it can be swapped out (benchmarks, tests).
+    user_id = ObjectId(user_id)
+    collection = users_collection if collection is None else collection
+    return user_cache.get(user_key(user_id), lambda: collection.find_one({"_id": user_id}, USER_PROJECTION), endpoint)
+
+
+async def aget_user(user_id, endpoint, collection=None):
+    user_id = ObjectId(user_id)
+    collection = async_users_collection if collection is None else collection
+    return await user_cache.aget(
+        user_key(user_id), lambda: collection.find_one({"_id": user_id}, USER_PROJECTION), endpoint
+    )
+
+
+def invalidate_user(user_id):
+    # The user's document and the listings their name / role appears in
+    user_cache.invalidate(user_key(user_id), THERAPIST_LIST, PATIENT_LIST)
+
+
+async def ainvalidate_user(user_id):
+    await user_cache.ainvalidate(user_key(user_id), THERAPIST_LIST, PATIENT_LIST)
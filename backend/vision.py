@@ -0,0 +1,381 @@
+import os
+import cv2
+import time
+from concurrent.futures import ThreadPoolExecutor
+from scipy.spatial import distance as dist
+from fastapi import HTTPException
+from inference import engine, prepare_batch, vote, EMOTION_LABELS
+from model_registry import registry
+from emotion_store import record_emotions, session_faces, clear_session, drop_faces, EMOTION_MAX_AGE
+from stream_sessions import SessionManager, SourceError, DEFAULT_SOURCE, parse_source
+from stream_pipeline import LatestWinsSubmitter
+from analysis_scheduler import AnalysisScheduler
+from face_tracker import FaceTracker, MAX_FACES
+from emotion_cache import EmotionCache
+from frame_ring import FrameViews
+from emotion_workers import EmotionProcessPool
+
+# Vision stack: imported on first use of a vision route (see vision_routes.py)
+
+# If No Faces Are Detected, Keep Last Known Faces for a While
+NO_FACE_LIMIT = 30  # Number of frames a face track survives without a confirming detection
+
+# Thread Pool for Emotion Analysis
+executor = ThreadPoolExecutor(max_workers=4)
+
+# "thread" runs webcam emotion analysis on the executor above; "process" runs it in
+# worker processes with their own models, fed through shared memory
+EMOTION_BACKEND = os.getenv("EMOTION_BACKEND", "thread")
+emotion_pool = EmotionProcessPool(capacity=max(MAX_FACES, 5)) if EMOTION_BACKEND == "process" else None
+
+# Gaze Tracking Variables
+EYE_AR_THRESH = 0.30  # Eye aspect ratio threshold for gaze detection
+
+# Colors for different landmarks
+COLORS = {
+    "eyes": (0, 255, 255),
+    "mouth": (255, 0, 0),
+    "face": (0, 255, 0),
+    "hands": (0, 0, 255),
+    "body": (255, 255, 0)
+}
+
+# Emotion Analysis Functions
+def analyze_emotions(session_id, face_rois, cache=None, on_error=None):
+    # face_rois: {track id: crop}; every tracked face in one forward pass, smoothed per track when cached
+    try:
+        probabilities, dominant = engine.predict(prepare_batch(list(face_rois.values())))
+        record_face_emotions(session_id, list(face_rois), probabilities, cache)
+    except Exception as e:
+        print(f"⚠️ Emotion detection error: {e}")
+        if on_error is not None:
+            on_error()
+
+def record_face_emotions(session_id, face_ids, probabilities, cache=None):
+    current_time = time.time()
+    for face_id, row in zip(face_ids, probabilities):
+        emotions = {label: float(p) for label, p in zip(EMOTION_LABELS, row)}
+        if cache is not None:
+            emotions = cache.smooth(face_id, emotions)
+        record_emotions(session_id, face_id, emotions, current_time)
+
+def _run_job(job, done):
+    # LatestWinsSubmitter backend: job(done) for the process pool, job() on the thread executor
+    if emotion_pool is not None:
+        return job(done)
+
+    def call():
+        try:
+            job()
+        finally:
+            done()
+    executor.submit(call)
+
+# One running + one waiting job per session and task type; superseded work is dropped
+submitter = LatestWinsSubmitter(_run_job, max_age=EMOTION_MAX_AGE)
+
+def submit_emotions(session_id, face_rois, cache=None):
+    # Background emotion analysis on the configured backend. The cache marked these crops
+    # as analyzed when they were selected; if the job is superseded, expires or fails,
+    # that claim is released so the faces are picked up again on the next due frame.
+    release = None
+    if cache is not None:
+        claims = cache.claims(face_rois)
+        release = lambda: cache.release(claims)
+
+    if emotion_pool is None:
+        job = lambda: analyze_emotions(session_id, face_rois, cache, release)
+    else:
+        face_ids = list(face_rois)
+
+        def job(done):
+            def on_result(probabilities, dominant):
+                try:
+                    record_face_emotions(session_id, face_ids, probabilities, cache)
+                finally:
+                    done()
+
+            def on_error(error):
+                try:
+                    if release is not None:
+                        release()
+                finally:
+                    done()
+            return emotion_pool.submit(list(face_rois.values()), on_result, on_error)
+    submitter.submit((session_id, "emotion"), job, on_drop=release)
+
+def submit_vote(session_id, face_rois):
+    if emotion_pool is None:
+        job = lambda: vote_face_rois(face_rois)
+    else:
+        def job(done):
+            def on_result(probabilities, dominant):
+                print(f"Most common result: {vote(dominant)}")
+                done()
+            return emotion_pool.submit(face_rois, on_result, lambda error: done())
+    submitter.submit((session_id, "vote"), job)
+
+def vote_face_rois(face_rois):
+    # Crops of one face over several frames -> most common emotion
+    if not face_rois:
+        return "Neutral"
+
+    # Classify every face in the batch with one forward pass, then vote across frames
+    try:
+        result = engine.analyze(prepare_batch(face_rois))
+    except Exception as e:
+        print(f"⚠ Error analyzing emotion: {e}")
+        return "Neutral"
+
+    print(f"Most common result: {result['vote']}")
+    return result["vote"]
+    
+# Gaze Tracking Functions
+def eye_aspect_ratio(eye):
+    # Compute the Euclidean distances between the two sets of vertical eye landmarks
+    A = dist.euclidean(eye[1], eye[5])
+    B = dist.euclidean(eye[2], eye[4])
+    # Compute the Euclidean distance between the horizontal eye landmarks
+    C = dist.euclidean(eye[0], eye[3])
+    # Compute the eye aspect ratio
+    ear = (A + B) / (2.0 * C)
+    return ear
+
+def draw_gaze(frame, mesh_results):
+    if mesh_results.multi_face_landmarks:
+        for face_landmarks in mesh_results.multi_face_landmarks:
+            landmarks = face_landmarks.landmark
+            # Extract left and right eye landmarks
+            left_eye = [(landmarks[33].x, landmarks[33].y), (landmarks[160].x, landmarks[160].y),
+                        (landmarks[158].x, landmarks[158].y), (landmarks[133].x, landmarks[133].y),
+                        (landmarks[153].x, landmarks[153].y), (landmarks[144].x, landmarks[144].y)]
+            right_eye = [(landmarks[362].x, landmarks[362].y), (landmarks[385].x, landmarks[385].y),
+                         (landmarks[387].x, landmarks[387].y), (landmarks[263].x, landmarks[263].y),
+                         (landmarks[373].x, landmarks[373].y), (landmarks[380].x, landmarks[380].y)]
+            # Convert to pixel coordinates
+            left_eye = [(int(l[0] * frame.shape[1]), int(l[1] * frame.shape[0])) for l in left_eye]
+            right_eye = [(int(r[0] * frame.shape[1]), int(r[1] * frame.shape[0])) for r in right_eye]
+            # Draw eyes
+            for (x, y) in left_eye + right_eye:
+                cv2.circle(frame, (x, y), 2, COLORS["eyes"], -1)
+            # Calculate eye aspect ratio
+            left_ear = eye_aspect_ratio(left_eye)
+            right_ear = eye_aspect_ratio(right_eye)
+            ear = (left_ear + right_ear) / 2.0
+            # Display gaze direction
+            if ear < EYE_AR_THRESH:
+                cv2.putText(frame, "Looking forward", (10, 100), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+            else:
+                cv2.putText(frame, "Looking away", (10, 100), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
+
+# Visualization Functions
+def draw_face_mesh(frame, mesh_results):
+    if mesh_results.multi_face_landmarks:
+        for face_landmarks in mesh_results.multi_face_landmarks:
+            for landmark in face_landmarks.landmark:
+                x_l, y_l = int(landmark.x * frame.shape[1]), int(landmark.y * frame.shape[0])
+                cv2.circle(frame, (x_l, y_l), 1, COLORS["face"], -1)
+
+def draw_body_landmarks(frame, pose_results):
+    if pose_results.pose_landmarks:
+        for landmark in pose_results.pose_landmarks.landmark:
+            x_b, y_b = int(landmark.x * frame.shape[1]), int(landmark.y * frame.shape[0])
+            cv2.circle(frame, (x_b, y_b), 5, COLORS["body"], -1)
+
+def draw_hand_landmarks(frame, hand_results):
+    if hand_results.multi_hand_landmarks:
+        for hand_landmarks in hand_results.multi_hand_landmarks:
+            for landmark in hand_landmarks.landmark:
+                x_h, y_h = int(landmark.x * frame.shape[1]), int(landmark.y * frame.shape[0])
+                cv2.circle(frame, (x_h, y_h), 5, COLORS["hands"], -1)
+
+# Video Streaming Functions
+class WebcamAnalysis:
+    # Analysis stage of one stream session: detection, landmarks and emotion submission,
+    # each at the cadence and input scale given by the scheduler
+    def __init__(self, session_id, scheduler=None, tracker=None):
+        self.session_id = session_id
+        self.scheduler = scheduler or AnalysisScheduler()
+        # RGB / downscaled inputs, converted once per frame into reused buffers
+        self.views = FrameViews()
+        # Detection runs every few frames; faces are followed with optical flow in between
+        self.tracker = tracker or FaceTracker(max_age=NO_FACE_LIMIT)
+        # Skips inference on near-duplicate crops of the same track and smooths its results
+        self.emotion_cache = EmotionCache()
+
+        # MediaPipe graphs keep tracking state, so every session gets its own
+        self.face_detection = registry.create("face_detection")
+        self.face_mesh = registry.create("face_mesh")
+        self.pose = registry.create("pose")
+        self.hands = registry.create("hands")
+        self.face_cascade = registry.create("face_cascade")
+        self.frame_buffer = []
+        self.frame_batch_size = 5
+
+    def _detect_faces(self, rgb_input, frame_w, frame_h):
+        # Runs on the scheduler's downscaled input; boxes are returned in full-frame pixels
+        face_bboxes = []
+        results = self.face_detection.process(rgb_input)
+
+        if results.detections:
+            for detection in results.detections[:MAX_FACES]:
+                bboxC = detection.location_data.relative_bounding_box
+                x, y = max(0, int(bboxC.xmin * frame_w)), max(0, int(bboxC.ymin * frame_h))
+                face_bboxes.append((x, y, int(bboxC.width * frame_w), int(bboxC.height * frame_h)))
+
+        # If Mediapipe Fails, Use Haar Cascade
+        if not face_bboxes:
+            scale = rgb_input.shape[1] / frame_w
+            gray_input = cv2.cvtColor(rgb_input, cv2.COLOR_RGB2GRAY)
+            min_side = max(1, int(50 * scale))
+            boxes = self.face_cascade.detectMultiScale(gray_input, scaleFactor=1.1, minNeighbors=4, minSize=(min_side, min_side))
+            face_bboxes = [tuple(int(v / scale) for v in box) for box in boxes[:MAX_FACES]]
+
+        return face_bboxes
+
+    def __call__(self, frame):
+        start = time.perf_counter()
+        h, w, _ = frame.shape
+        self.views.reset(frame)
+        self.scheduler.begin_frame(self.views)
+
+        # Face Tracking (detection only when the tracker asks for it)
+        tracks = self.scheduler.run("face_detection", lambda rgb: self.tracker.update(rgb, w, h, self._detect_faces))
+        faces = [(track.id, track.box) for track in tracks or []]
+        if self.tracker.removed:
+            drop_faces(self.session_id, self.tracker.removed)
+            self.emotion_cache.drop(self.tracker.removed)
+
+        # Face Mesh, Body & Hand Detection (landmarks are normalized, so input scale doesn't change the overlay)
+        mesh_results = self.scheduler.run("face_mesh", self.face_mesh.process)
+        pose_results = self.scheduler.run("pose", self.pose.process)
+        hand_results = self.scheduler.run("hands", self.hands.process)
+
+        # Emotion for every tracked face, keyed by its track id. The frame is a pooled
+        # buffer that is reused once this call returns, so background work gets crop copies.
+        face_rois = {}
+        for face_id, (x, y, w_box, h_box) in faces:
+            face_roi = frame[y:y + h_box, x:x + w_box]
+            if face_roi.size > 0:
+                face_rois[face_id] = face_roi
+        if face_rois and self.scheduler.due("emotion"):
+            changed = {face_id: roi.copy() for face_id, roi in face_rois.items() if self.emotion_cache.should_analyze(face_id, roi)}
+            if changed:
+                # Works on the BGR crops above, so no RGB view of the frame is needed
+                self.scheduler.run(
+                    "emotion", lambda _: submit_emotions(self.session_id, changed, self.emotion_cache), needs_input=False
+                )
+
+        # Store the primary face's crop for batch processing, skipping near-duplicates
+        if face_rois:
+            face_id, face_roi = next(iter(face_rois.items()))
+            if self.emotion_cache.should_analyze(("vote", face_id), face_roi):
+                self.frame_buffer.append(face_roi.copy())
+        if len(self.frame_buffer) >= self.frame_batch_size:
+            # Analyze emotions from multiple frames in background
+            submit_vote(self.session_id, self.frame_buffer)
+            self.frame_buffer = []
+
+        self.scheduler.end_frame(time.perf_counter() - start)
+        return {
+            "session_id": self.session_id,
+            "faces": faces,
+            "face_bboxes": [box for _, box in faces],
+            "mesh": mesh_results,
+            "pose": pose_results,
+            "hands": hand_results,
+        }
+
+    def snapshot(self):
+        return {**self.scheduler.snapshot(), "tracking": self.tracker.snapshot(), "emotion_cache": self.emotion_cache.metrics()}
+
+    def close(self):
+        for graph in (self.face_detection, self.face_mesh, self.pose, self.hands):
+            graph.close()
+        clear_session(self.session_id)
+
+
+def render_overlay(frame, results, stats):
+    mesh_results = results["mesh"]
+
+    # Draw Face Boxes & Emotions
+    detected_faces = session_faces(results["session_id"])
+
+    for face_id, (x, y, w_box, h_box) in results["faces"]:
+        cv2.rectangle(frame, (x, y), (x + w_box, y + h_box), COLORS["face"], 2)
+        cv2.putText(frame, f"#{face_id}", (x, max(0, y - 8)), cv2.FONT_HERSHEY_SIMPLEX, 0.6, COLORS["face"], 2)
+
+        # Display Emotions
+        if face_id in detected_faces:
+            emotions = detected_faces[face_id]
+            text_x = x + w_box + 10
+            text_y = y + 20
+            for emotion, confidence in emotions.items():
+                text = f"{emotion.upper()}: {round(confidence, 2)}%"
+                cv2.putText(frame, text, (text_x, text_y), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
+                text_y += 25
+
+    # Draw Face Mesh
+    if results["faces"]:
+        draw_face_mesh(frame, mesh_results)
+
+    # Draw Gaze Direction
+    draw_gaze(frame, mesh_results)
+
+    # Draw Body Landmarks
+    draw_body_landmarks(frame, results["pose"])
+
+    # Draw Hand Landmarks
+    draw_hand_landmarks(frame, results["hands"])
+
+    # Display FPS
+    fps = round(stats["encode"].fps, 2)
+    cv2.putText(frame, f"FPS: {fps}", (20, 50), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 255), 2)
+
+
+# One capture / pipeline per source, shared by all of its viewers
+sessions = SessionManager(WebcamAnalysis, render_overlay)
+
+
+def generate_frames(source=DEFAULT_SOURCE):
+    # A malformed source spec fails the request itself; the session is only joined once
+    # the response starts streaming, so a response that never starts holds no subscription
+    try:
+        parse_source(source)
+    except SourceError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _stream(source)
+
+
+def _stream(source):
+    try:
+        session = sessions.subscribe(source)
+    except SourceError as e:
+        print(f"Error in video streaming: {e}")
+        return
+    try:
+        yield from session.frames()
+    except Exception as e:
+        print(f"Error in video streaming: {e}")
+    finally:
+        # Runs when the client disconnects and the response closes the generator
+        sessions.unsubscribe(session)
+
+
+def pipeline_stats():
+    return sessions.stats()
+
+
+def emotion_backend_stats():
+    stats = {"backend": "thread" if emotion_pool is None else "process", "submission": submitter.snapshot()}
+    if emotion_pool is not None:
+        stats["pool"] = emotion_pool.metrics()
+    return stats
+
+
+def shutdown():
+    sessions.close_all()
+    executor.shutdown()
+    if emotion_pool is not None:
+        emotion_pool.shutdown()
+    cv2.destroyAllWindows()
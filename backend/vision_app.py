@@ -0,0 +1,40 @@
+import os
+import warnings
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+from model_registry import registry, router as registry_router
+from vision_routes import router as vision_router, preload_vision, shutdown_vision
+from emotion_store import close as close_emotion_store
+
+# Standalone vision service: only the webcam / mood detection routes, so the
+# vision stack can be deployed and scaled separately from the core API
+# (run core workers with APP_PROFILE=core and route vision paths here)
+
+# Suppress Warnings
+warnings.filterwarnings("ignore")
+
+app = FastAPI()
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+@app.on_event("startup")
+async def startup_event():
+    if os.getenv("PRELOAD_MODELS", "1") == "1":
+        preload_vision()
+    else:
+        registry.mark_ready()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await shutdown_vision()
+    close_emotion_store()
+
+
+app.include_router(registry_router)
+app.include_router(vision_router)
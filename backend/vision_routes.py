@@ -0,0 +1,151 @@
+import importlib
+import os
+import threading
+from datetime import datetime
+from typing import Dict
+from fastapi import APIRouter, HTTPException, File, UploadFile, Depends, WebSocket
+from fastapi.responses import StreamingResponse
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from database import async_moods_collection as moods_collection
+from badge_engine import arecord_event
+from inference_pool import inference_pool, QueueFullError
+from batching import MicroBatcher
+from frame_ingest import FrameIngest, WS_MAX_FPS
+from emotion_store import DEFAULT_SESSION, current_emotions
+from model_registry import registry
+from JWTAuth import *
+
+# Vision routes. The heavy vision module (cv2, mediapipe, TensorFlow) is only
+# imported on first use, so workers that never serve these routes never pay for it.
+
+router = APIRouter()
+security = HTTPBearer()
+
+_vision_lock = threading.Lock()
+# Set only once the vision module has finished importing. sys.modules can't be used
+# for this: it holds the module while its body (TensorFlow etc.) is still running.
+_vision = None
+
+# Collect face crops from concurrent /mood_detect requests into one batched forward pass
+MOOD_BATCHING = os.getenv("MOOD_BATCHING", "1") == "1"
+
+
+async def _classify_batch(face_rois):
+    return await inference_pool.run("inference_tasks.classify_faces", face_rois)
+
+mood_batcher = MicroBatcher(_classify_batch)
+
+
+def get_vision():
+    global _vision
+    if _vision is None:
+        with _vision_lock:
+            if _vision is None:
+                _vision = importlib.import_module("vision")
+    return _vision
+
+
+def preload_vision():
+    # Import the vision stack and warm up its models in the background
+    def _preload():
+        try:
+            vision = get_vision()
+        except Exception as e:
+            registry.errors["startup"] = str(e)
+            print(f"❌ Vision import failed: {e}")
+            return
+        try:
+            inference_pool.warm_up()
+        except Exception as e:
+            registry.errors["inference_pool"] = str(e)
+            print(f"❌ Inference pool failed to start: {e}")
+            return
+        # Webcam sessions create their own graphs and /mood_detect runs in the
+        # inference pool, so this process only shares the emotion model
+        registry.load_all(["emotion"])
+        if vision.emotion_pool is not None:
+            vision.emotion_pool.wait_ready()
+
+    threading.Thread(target=_preload, daemon=True, name="vision-preload").start()
+
+
+async def shutdown_vision():
+    # Only tear down what was actually loaded. In-flight batches finish before the
+    # inference pool they run on is shut down.
+    await mood_batcher.close()
+    inference_pool.shutdown()
+    if _vision is not None:
+        _vision.shutdown()
+
+
+@router.get("/webcam")
+def webcam_feed(source: str = DEFAULT_SESSION):
+    # Viewers of the same source share one capture and pipeline
+    return StreamingResponse(get_vision().generate_frames(source), media_type="multipart/x-mixed-replace; boundary=frame")
+
+@router.get("/webcam/stats")
+def webcam_stats():
+    # Per-stage FPS / latency of each running stream session
+    if _vision is None:
+        return {"sessions": []}
+    return {"sessions": _vision.pipeline_stats(), "emotion": _vision.emotion_backend_stats()}
+
+@router.websocket("/ws/emotion")
+async def emotion_socket(websocket: WebSocket, token: str = "", fps: float = WS_MAX_FPS):
+    # Browsers can't set headers on a WebSocket, so the JWT comes as ?token=
+    try:
+        user_id = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])["user_id"]
+    except (jwt.InvalidTokenError, KeyError):
+        await websocket.close(code=1008)
+        return
+
+    await websocket.accept()
+    await FrameIngest(websocket, user_id, fps).run()
+
+@router.get("/emotion_data")
+def get_emotion_data(session: str = DEFAULT_SESSION) -> Dict:
+    return {"emotions": current_emotions(session, 0)}
+
+@router.get("/stop_webcam")
+def stop_webcam():
+    if _vision is not None:
+        _vision.cv2.destroyAllWindows()
+    return {"message": "Webcam stopped successfully"}
+
+@router.post("/mood_detect")
+async def detect_mood(file: UploadFile = File(...), credentials: HTTPAuthorizationCredentials = Depends(security)):
+    try:
+        # Read image and perform emotion detection in the inference pool
+        contents = await file.read()
+        if MOOD_BATCHING:
+            face_roi = await inference_pool.run("inference_tasks.extract_face_roi", contents)
+            emotion = await mood_batcher.submit(face_roi)
+        else:
+            emotion = await inference_pool.run("inference_tasks.detect_mood_from_image", contents)
+
+        # Decode JWT to get user ID
+        token_data = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=["HS256"])
+        user_id = token_data["user_id"]
+
+        # Save mood history
+        await moods_collection.insert_one({
+            "user_id": user_id,
+            "mood": emotion,
+            "timestamp": datetime.utcnow()
+        })
+        await arecord_event(user_id, "moods")
+
+        return {"mood": emotion}
+
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=503,
+            detail="Mood detection is busy, please retry",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error analyzing mood: {str(e)}")
+
+@router.get("/metrics/inference")
+def get_inference_metrics():
+    return {**inference_pool.metrics(), "batching": mood_batcher.metrics()}